@@ -0,0 +1,177 @@
+"""
+Нагрузочный замер получения курсов валют и цен акций ('src.external_api') на локальном сервере-заглушке API.
+Для каждой функции измеряются пропускная способность, задержки (медиана и хвосты), доля неудачных вызовов,
+а также количество запросов и соединений на стороне сервера (видно, переиспользуются ли соединения).
+
+Пример запуска из корня проекта:
+    python -m benchmarks.api_load --calls 200 --concurrency 8 --latency 0.05 --jitter 0.05
+    python -m benchmarks.api_load --calls 50 --latency 0.5 --timeout 0.2 --error-rate 0.1 --quota 100
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from benchmarks.api_stub import FIXTURES_PATH, StubApiServer, stub_endpoints
+from src.external_api import currency_exchanger, currency_exchanger_async, stock_exchanger, stock_exchanger_async
+
+CURRENCIES = ["USD", "EUR"]
+STOCKS = ["AAPL", "AMZN", "GOOGL", "MSFT", "TSLA"]
+PERCENTILES = (50, 95, 99)
+
+
+def _summary(latencies: List[float], failures: int, seconds: float, server: StubApiServer) -> Dict:
+    """Сводка замера: пропускная способность, процентили задержки в миллисекундах и счётчики сервера."""
+    milliseconds = np.array(latencies) * 1000
+    summary = {
+        "calls": len(latencies),
+        "failed_calls": failures,
+        "seconds": round(seconds, 6),
+        "calls_per_second": round(len(latencies) / seconds, 2) if seconds else None,
+        "requests_per_second": round(server.stats["requests"] / seconds, 2) if seconds else None,
+    }
+    for percentile, value in zip(PERCENTILES, np.percentile(milliseconds, PERCENTILES)):
+        summary[f"p{percentile}_ms"] = round(float(value), 3)
+    summary["max_ms"] = round(float(milliseconds.max()), 3)
+    summary["server"] = dict(server.stats)
+    return summary
+
+
+def load_sync(function: Callable, symbols: Sequence[str], calls: int, concurrency: int, server: StubApiServer) -> Dict:
+    """
+    Вызывает синхронную функцию 'calls' раз из 'concurrency' потоков.
+    Вызов считается неудачным, если получены данные не по всем символам.
+    """
+
+    def call() -> tuple:
+        started = time.perf_counter()
+        result = function(list(symbols))
+        return time.perf_counter() - started, len(result) < len(symbols)
+
+    # Первый вызов загружает библиотеки и не входит в замер
+    function(list(symbols[:1]))
+    server.reset()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(lambda _: call(), range(calls)))
+    seconds = time.perf_counter() - started
+    return _summary([latency for latency, _ in outcomes], sum(failed for _, failed in outcomes), seconds, server)
+
+
+def load_async(
+    function: Callable, symbols: Sequence[str], calls: int, concurrency: int, server: StubApiServer
+) -> Dict:
+    """Вызывает асинхронную функцию 'calls' раз, одновременно выполняется не больше 'concurrency' вызовов."""
+
+    async def scenario() -> List[tuple]:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call() -> tuple:
+            async with semaphore:
+                started = time.perf_counter()
+                result = await function(list(symbols))
+                return time.perf_counter() - started, len(result) < len(symbols)
+
+        return await asyncio.gather(*(call() for _ in range(calls)))
+
+    asyncio.run(function(list(symbols[:1])))
+    server.reset()
+    started = time.perf_counter()
+    outcomes = asyncio.run(scenario())
+    seconds = time.perf_counter() - started
+    return _summary([latency for latency, _ in outcomes], sum(failed for _, failed in outcomes), seconds, server)
+
+
+def run_load(
+    calls: int = 100,
+    concurrency: int = 4,
+    mode: str = "sync",
+    currencies: Sequence[str] = CURRENCIES,
+    stocks: Sequence[str] = STOCKS,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    quota: Optional[int] = None,
+    timeout: Optional[float] = None,
+    fixtures_path: Optional[str] = FIXTURES_PATH,
+    seed: int = 0,
+) -> Dict[str, Dict]:
+    """
+    Запускает сервер-заглушку с заданным поведением и замеряет 'currency_exchanger' и 'stock_exchanger'
+    (или их асинхронные варианты при mode='async').
+    :param calls: Количество вызовов каждой функции.
+    :param concurrency: Количество одновременных вызовов.
+    :param mode: 'sync' или 'async'.
+    :param currencies: Валюты, запрашиваемые за один вызов.
+    :param stocks: Акции, запрашиваемые за один вызов.
+    :param latency: Задержка ответа сервера в секундах.
+    :param jitter: Случайная добавка к задержке в секундах.
+    :param error_rate: Доля ответов с ошибкой 500.
+    :param quota: Количество успешных запросов к каждому API.
+    :param timeout: Время ожидания ответа клиентом в секундах (по умолчанию — 'HTTP_TIMEOUT').
+    :param fixtures_path: Файл с записанными ответами.
+    :param seed: Начальное значение генератора случайных ошибок и задержек.
+    :return: Словарь {имя функции: сводка замера}.
+    """
+    if mode not in ("sync", "async"):
+        raise ValueError(f"Неизвестный режим '{mode}'. Поддерживаются: sync, async.")
+    targets = {
+        "currency_exchanger": (currency_exchanger_async if mode == "async" else currency_exchanger, currencies),
+        "stock_exchanger": (stock_exchanger_async if mode == "async" else stock_exchanger, stocks),
+    }
+    load = load_async if mode == "async" else load_sync
+
+    results = {}
+    with StubApiServer(latency, jitter, error_rate, quota, fixtures_path, seed=seed) as server:
+        with stub_endpoints(server, timeout):
+            for name, (function, symbols) in targets.items():
+                # Лимит запросов и счётчики сервера у каждой функции свои
+                results[f"{name}[{mode}]"] = load(function, symbols, calls, concurrency, server)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Нагрузочный замер получения курсов finance-flow на заглушке API.")
+    parser.add_argument("--calls", type=int, default=100, help="Количество вызовов каждой функции.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Количество одновременных вызовов.")
+    parser.add_argument(
+        "--mode", choices=["sync", "async"], default="sync", help="Синхронные или асинхронные функции."
+    )
+    parser.add_argument("--currencies", nargs="+", default=CURRENCIES, help="Валюты за один вызов.")
+    parser.add_argument("--stocks", nargs="+", default=STOCKS, help="Акции за один вызов.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка ответа сервера в секундах.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Случайная добавка к задержке в секундах.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов с ошибкой 500.")
+    parser.add_argument("--quota", type=int, help="Количество успешных запросов к каждому API.")
+    parser.add_argument("--timeout", type=float, help="Время ожидания ответа клиентом в секундах.")
+    parser.add_argument("--output", help="Файл для сохранения результатов в JSON.")
+    args = parser.parse_args()
+
+    results = run_load(
+        args.calls,
+        args.concurrency,
+        args.mode,
+        args.currencies,
+        args.stocks,
+        args.latency,
+        args.jitter,
+        args.error_rate,
+        args.quota,
+        args.timeout,
+    )
+    text = json.dumps(results, indent=4, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
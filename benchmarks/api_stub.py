@@ -0,0 +1,410 @@
+"""
+Локальный HTTP-сервер, заменяющий API apilayer (курсы валют) и marketstack (цены акций) в тестах и нагрузочных замерах.
+
+Сервер отвечает по тем же путям, что и настоящие API, поэтому функции 'src.external_api' работают с ним без
+изменений: достаточно подменить адреса (см. 'stub_endpoints'). Задержка ответа, доля ошибок и лимит запросов
+настраиваются. Ответы берутся из записанных ответов настоящих API ('benchmarks/fixtures/api_responses.json'),
+а для незаписанных запросов формируются в той же структуре. В режиме записи сервер передаёт запросы
+настоящим API и сохраняет ответы (без ключей доступа).
+
+Пример записи ответов из корня проекта (нужны ключи в '.env'):
+    python -m benchmarks.api_stub --currencies USD EUR --stocks AAPL AMZN
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from contextlib import ExitStack, contextmanager
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+from unittest.mock import patch
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "api_responses.json")
+
+CURRENCY_CONVERT_PATH = "/exchangerates_data/convert"
+CURRENCY_TIMESERIES_PATH = "/exchangerates_data/timeseries"
+STOCK_LATEST_PATH = "/v1/eod/latest"
+# Адреса настоящих API для режима записи
+UPSTREAM = {
+    CURRENCY_CONVERT_PATH: "https://api.apilayer.com",
+    CURRENCY_TIMESERIES_PATH: "https://api.apilayer.com",
+    STOCK_LATEST_PATH: "http://api.marketstack.com",
+}
+# Параметры с ключом доступа не сохраняются и не участвуют в поиске записанного ответа
+SECRET_PARAMS = ("access_key",)
+
+# Ответы API при ошибке сервера и исчерпании лимита запросов
+APILAYER_ERRORS = {
+    401: {"message": "No API key found in request"},
+    429: {"message": "You have exceeded your daily/monthly API rate limit. Please upgrade your subscription plan."},
+    500: {"message": "Internal Server Error"},
+}
+MARKETSTACK_ERRORS = {
+    401: {
+        "error": {
+            "code": "missing_access_key",
+            "message": "You have not supplied an API Access Key. [Required format: access_key=YOUR_ACCESS_KEY]",
+        }
+    },
+    429: {
+        "error": {
+            "code": "usage_limit_reached",
+            "message": "Your monthly usage limit has been reached. Please upgrade your Subscription Plan.",
+        }
+    },
+    500: {"error": {"code": "internal_error", "message": "An internal error occurred."}},
+}
+
+# Ответ: (код статуса, тело)
+Response = Tuple[int, Dict]
+
+
+def fixture_key(path: str, params: Dict[str, str]) -> str:
+    """Ключ записанного ответа: путь и отсортированные параметры запроса без ключа доступа."""
+    return f"{path}?{urlencode(sorted((k, v) for k, v in params.items() if k not in SECRET_PARAMS))}"
+
+
+def load_fixtures(path: str = FIXTURES_PATH) -> Dict[str, Response]:
+    """
+    Загружает записанные ответы.
+    :param path: Путь до файла с записями.
+    :return: Словарь {ключ запроса: (код статуса, тело ответа)}. Если файла нет, возвращается пустой словарь.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as file:
+        records = json.load(file)
+    return {fixture_key(record["path"], record["params"]): (record["status"], record["body"]) for record in records}
+
+
+def save_fixtures(fixtures: Dict[str, Response], path: str = FIXTURES_PATH) -> None:
+    """Сохраняет записанные ответы в файл в порядке ключей, чтобы изменения было удобно сравнивать."""
+    records = []
+    for key in sorted(fixtures):
+        request_path, _, query = key.partition("?")
+        status, body = fixtures[key]
+        records.append({"path": request_path, "params": dict(parse_qsl(query)), "status": status, "body": body})
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(records, file, ensure_ascii=False, indent=2)
+        file.write("\n")
+
+
+def _price(symbol: str, low: float, high: float) -> float:
+    """Детерминированное значение из диапазона [low, high) для символа валюты или акции."""
+    return round(low + zlib.crc32(symbol.encode()) % 10000 / 10000 * (high - low), 2)
+
+
+def synthesize(path: str, params: Dict[str, str]) -> Response:
+    """
+    Формирует ответ в структуре настоящего API для запроса, которого нет среди записанных.
+    :param path: Путь запроса.
+    :param params: Параметры запроса.
+    :return: Код статуса и тело ответа.
+    """
+    if path == CURRENCY_CONVERT_PATH:
+        rate = _price(params.get("from", ""), 1, 120)
+        amount = float(params.get("amount", 1))
+        return 200, {
+            "success": True,
+            "query": {"from": params.get("from"), "to": params.get("to"), "amount": amount},
+            "info": {"timestamp": 1707523200, "rate": rate},
+            "date": "2024-02-10",
+            "result": round(rate * amount, 6),
+        }
+    if path == CURRENCY_TIMESERIES_PATH:
+        start, end = date.fromisoformat(params["start_date"]), date.fromisoformat(params["end_date"])
+        symbols = [symbol for symbol in params.get("symbols", "").split(",") if symbol]
+        days = (start + timedelta(days=offset) for offset in range((end - start).days + 1))
+        return 200, {
+            "success": True,
+            "timeseries": True,
+            "start_date": params["start_date"],
+            "end_date": params["end_date"],
+            "base": params.get("base", "EUR"),
+            "rates": {
+                day.isoformat(): {symbol: round(1 / _price(symbol, 1, 120), 8) for symbol in symbols} for day in days
+            },
+        }
+    symbols = [symbol for symbol in params.get("symbols", "").split(",") if symbol]
+    data = []
+    for symbol in symbols:
+        close = _price(symbol, 10, 500)
+        data.append(
+            {
+                "open": close,
+                "high": round(close * 1.01, 2),
+                "low": round(close * 0.99, 2),
+                "close": close,
+                "volume": 1000000.0,
+                "adj_high": None,
+                "adj_low": None,
+                "adj_close": close,
+                "adj_open": None,
+                "adj_volume": None,
+                "split_factor": 1.0,
+                "dividend": 0.0,
+                "symbol": symbol,
+                "exchange": "XNAS",
+                "date": "2024-02-09T00:00:00+0000",
+            }
+        )
+    return 200, {"pagination": {"limit": 100, "offset": 0, "count": len(data), "total": len(data)}, "data": data}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов сервера-заглушки. Соединения поддерживаются (HTTP/1.1 keep-alive)."""
+
+    protocol_version = "HTTP/1.1"
+    server: "_StubHTTPServer"
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.stub.count("connections")
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        status, body = self.server.stub.respond(url.path, dict(parse_qsl(url.query)), self.headers.get("apikey"))
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # Клиент закрыл соединение, не дождавшись ответа (истекло время ожидания)
+            self.server.stub.count("disconnected")
+            self.close_connection = True
+
+    def log_message(self, format: str, *args) -> None:
+        """Журнал запросов не выводится: при нагрузочных замерах он искажает время."""
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    stub: "StubApiServer"
+
+
+class StubApiServer:
+    """
+    Локальная замена API apilayer и marketstack. Каждое соединение обслуживается отдельным потоком.
+    Счётчики запросов, соединений, разорванных клиентом соединений, ошибок и отказов по лимиту доступны в 'stats'.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        quota: Optional[int] = None,
+        fixtures_path: Optional[str] = FIXTURES_PATH,
+        record: bool = False,
+        seed: int = 0,
+    ) -> None:
+        """
+        :param latency: Задержка каждого ответа в секундах.
+        :param jitter: Случайная добавка к задержке в секундах (равномерно от 0 до 'jitter').
+        :param error_rate: Доля запросов, на которые возвращается ошибка 500.
+        :param quota: Сколько запросов к каждому API выполняется успешно; остальные получают ответ 429
+                      (по умолчанию без ограничения).
+        :param fixtures_path: Файл с записанными ответами (None — ответы только формируются).
+        :param record: Если True, запросы передаются настоящим API, а ответы запоминаются для 'save_fixtures'.
+        :param seed: Начальное значение генератора случайных ошибок и задержек.
+        """
+        if not 0 <= error_rate <= 1:
+            raise ValueError(f"Доля ошибок должна быть от 0 до 1, получено {error_rate}.")
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.quota = quota
+        self.fixtures_path = fixtures_path
+        self.record = record
+        self.fixtures = load_fixtures(fixtures_path) if fixtures_path else {}
+        self.stats: Dict[str, int] = {}
+        self._used: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[_StubHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Обнуляет счётчики и израсходованный лимит запросов."""
+        with self._lock:
+            self.stats = dict.fromkeys(
+                (
+                    "requests",
+                    "connections",
+                    "disconnected",
+                    "errors",
+                    "quota_exceeded",
+                    "replayed",
+                    "synthesized",
+                    "recorded",
+                ),
+                0,
+            )
+            self._used = {}
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    @property
+    def url(self) -> str:
+        """Адрес запущенного сервера, например 'http://127.0.0.1:54321'."""
+        if self._server is None:
+            raise RuntimeError("Сервер-заглушка не запущен.")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubApiServer":
+        """Запускает сервер на свободном порту локального интерфейса в фоновом потоке."""
+        self._server = _StubHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="api-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Останавливает сервер и закрывает сокет."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "StubApiServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _delay(self) -> float:
+        with self._lock:
+            return self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def _fails(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def _over_quota(self, api: str) -> bool:
+        with self._lock:
+            self._used[api] = self._used.get(api, 0) + 1
+            return self.quota is not None and self._used[api] > self.quota
+
+    def respond(self, path: str, params: Dict[str, str], apikey: Optional[str] = None) -> Response:
+        """
+        Формирует ответ на запрос так же, как настоящий API: проверка ключа, лимит, случайная ошибка,
+        затем записанный или сформированный ответ.
+        :param path: Путь запроса.
+        :param params: Параметры запроса.
+        :param apikey: Значение заголовка 'apikey' (ключ apilayer).
+        :return: Код статуса и тело ответа.
+        """
+        self.count("requests")
+        if path not in UPSTREAM:
+            return 404, {"message": "no Route matched with those values"}
+        stock = path == STOCK_LATEST_PATH
+        errors = MARKETSTACK_ERRORS if stock else APILAYER_ERRORS
+        if not (params.get("access_key") if stock else apikey):
+            return 401, errors[401]
+        if self.record:
+            return self._record(path, params, apikey)
+
+        delay = self._delay()
+        if delay > 0:
+            time.sleep(delay)
+        if self._over_quota("marketstack" if stock else "apilayer"):
+            self.count("quota_exceeded")
+            return 429, errors[429]
+        if self.error_rate and self._fails():
+            self.count("errors")
+            return 500, errors[500]
+
+        key = fixture_key(path, params)
+        if key in self.fixtures:
+            self.count("replayed")
+            return self.fixtures[key]
+        self.count("synthesized")
+        return synthesize(path, params)
+
+    def _record(self, path: str, params: Dict[str, str], apikey: Optional[str]) -> Response:
+        """Передаёт запрос настоящему API и запоминает ответ."""
+        import requests
+
+        headers = {"apikey": apikey} if apikey else {}
+        response = requests.get(UPSTREAM[path] + path, params=params, headers=headers, timeout=30)
+        result = (response.status_code, response.json())
+        with self._lock:
+            self.fixtures[fixture_key(path, params)] = result
+            self.stats["recorded"] += 1
+        return result
+
+
+@contextmanager
+def stub_endpoints(server: StubApiServer, timeout: Optional[float] = None) -> Iterator[StubApiServer]:
+    """
+    Направляет запросы 'src.external_api' на сервер-заглушку. Если ключи API не заданы, подставляются тестовые
+    (в режиме записи используются настоящие ключи из '.env').
+    :param server: Запущенный сервер-заглушка.
+    :param timeout: Время ожидания ответа в секундах (по умолчанию — 'HTTP_TIMEOUT').
+    :return: Тот же сервер.
+    """
+    from src import external_api
+
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(external_api, "URL_CURRENCY", server.url + CURRENCY_CONVERT_PATH))
+        stack.enter_context(
+            patch.object(external_api, "URL_CURRENCY_TIMESERIES", server.url + CURRENCY_TIMESERIES_PATH)
+        )
+        stack.enter_context(patch.object(external_api, "URL_STOCK", server.url + STOCK_LATEST_PATH))
+        if not server.record:
+            stack.enter_context(
+                patch.object(external_api, "API_KEY_CURRENCY", external_api.API_KEY_CURRENCY or "stub")
+            )
+            stack.enter_context(patch.object(external_api, "API_KEY_STOCK", external_api.API_KEY_STOCK or "stub"))
+        if timeout is not None:
+            stack.enter_context(patch.object(external_api, "HTTP_TIMEOUT", timeout))
+        yield server
+
+
+def record_responses(currencies: List[str], stocks: List[str], fixtures_path: str = FIXTURES_PATH) -> int:
+    """
+    Записывает ответы настоящих API на запросы 'currency_exchanger' и 'stock_exchanger' и дополняет ими файл записей.
+    :param currencies: Коды валют.
+    :param stocks: Тикеры акций.
+    :param fixtures_path: Файл с записанными ответами.
+    :return: Количество записанных ответов.
+    """
+    from src.external_api import currency_exchanger, stock_exchanger
+
+    with StubApiServer(fixtures_path=fixtures_path, record=True) as server, stub_endpoints(server):
+        currency_exchanger(currencies)
+        stock_exchanger(stocks)
+    save_fixtures(server.fixtures, fixtures_path)
+    return server.stats["recorded"]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Запись ответов API курсов валют и акций для сервера-заглушки.")
+    parser.add_argument("--currencies", nargs="+", default=["USD", "EUR"], help="Валюты для записи.")
+    parser.add_argument(
+        "--stocks", nargs="+", default=["AAPL", "AMZN", "GOOGL", "MSFT", "TSLA"], help="Акции для записи."
+    )
+    parser.add_argument("--fixtures", default=FIXTURES_PATH, help="Файл с записанными ответами.")
+    args = parser.parse_args()
+
+    print(f"Записано ответов: {record_responses(args.currencies, args.stocks, args.fixtures)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
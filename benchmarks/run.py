@@ -0,0 +1,191 @@
+"""
+Бенчмарки функций проекта на синтетических данных.
+
+Пример запуска из корня проекта:
+    python -m benchmarks.run --sizes 10000 1000000 --baseline benchmarks/baseline.json
+    python -m benchmarks.run --sizes 10000 --baseline benchmarks/baseline.json --update-baseline
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+from unittest.mock import patch
+
+import numpy as np
+
+from src.cashback_rules import CashbackRules
+from src.cube import SpendingCube
+from src.dates import DateIndex, parse_operation_dates
+from src.fuzzy_search import TransactionSearchIndex
+from src.reports import category_spending
+from src.services import (cashback_analysis, find_personal_transfer, find_phone_numbers,
+                          find_recurring_payments_result, fuzzy_searching_transactions_result, investment_bank,
+                          searching_transactions, spending_percentiles_result)
+from src.synthetic import XLSX_MAX_ROWS, generate_transactions, write_transactions
+from src.utils import cost_analysis, filter_transactions_by_month, get_top_transactions, transaction_parser
+from src.views import main_view
+
+CURRENT_DATETIME = "2021-12-20 19:18:12"
+CURRENCY_STUB = [{"currency": "USD", "rate": 73.21}, {"currency": "EUR", "rate": 83.1}]
+STOCK_STUB = [{"stock": "AAPL", "price": 150.12}]
+CASHBACK_RULES = CashbackRules(
+    category_rates={"Супермаркеты": 0.05, "Фастфуд": 0.03},
+    excluded_categories=("Переводы", "Пополнения"),
+    monthly_cap=3000.0,
+)
+
+
+def measure(function: Callable, repeats: int = 3) -> Dict[str, float]:
+    """
+    Измеряет время выполнения (лучшее из нескольких запусков) и пиковое потребление памяти.
+    Память измеряется отдельным запуском под 'tracemalloc', чтобы не искажать время.
+    """
+    timings = []
+    for _ in range(repeats):
+        gc.collect()
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": round(min(timings), 6), "peak_mb": round(peak / 2**20, 3)}
+
+
+def build_cases(rows: int, workdir: str) -> List[Tuple[str, Callable]]:
+    """Готовит данные заданного размера и возвращает список измеряемых функций."""
+    transactions = generate_transactions(rows)
+    records = transactions.to_dict(orient="records")
+    search_index = TransactionSearchIndex(transactions)
+    date_index = DateIndex(transactions)
+    # 1000 окон по 30 дней, заканчивающихся в последовательные дни
+    window_ends = np.datetime64(CURRENT_DATETIME[:10]) - np.arange(1000).astype("timedelta64[D]")
+    window_starts = window_ends - np.timedelta64(29, "D")
+    cases: List[Tuple[str, Callable[[], object]]] = []
+
+    if rows <= XLSX_MAX_ROWS:
+        xlsx_path = write_transactions(transactions, os.path.join(workdir, f"operations_{rows}.xlsx"))
+        cases.append(("transaction_parser", lambda: transaction_parser(xlsx_path)))
+        cases.append(("main_view", lambda: main_view(CURRENT_DATETIME, xlsx_path)))
+
+    cases += [
+        ("parse_operation_dates", lambda: parse_operation_dates(transactions["Дата операции"])),
+        ("filter_transactions_by_month", lambda: filter_transactions_by_month(transactions.copy(), CURRENT_DATETIME)),
+        ("filter_transactions_by_month_indexed", lambda: filter_transactions_by_month(date_index, CURRENT_DATETIME)),
+        ("date_index_window_totals", lambda: date_index.window_totals(window_starts, window_ends)),
+        ("cost_analysis", lambda: cost_analysis(transactions.copy())),
+        ("get_top_transactions", lambda: get_top_transactions(transactions.copy())),
+        ("cashback_analysis", lambda: cashback_analysis(records, 2021, 12)),
+        ("cashback_rules", lambda: SpendingCube.from_transactions(transactions, CASHBACK_RULES).card_totals()),
+        ("investment_bank", lambda: investment_bank(records, "2021-12", 50)),
+        ("searching_transactions", lambda: searching_transactions(records, "Ozon.ru")),
+        (
+            "fuzzy_searching_transactions",
+            lambda: fuzzy_searching_transactions_result(transactions, "озон", index=search_index),
+        ),
+        ("find_phone_numbers", lambda: find_phone_numbers(records)),
+        ("find_personal_transfer", lambda: find_personal_transfer(records)),
+        ("find_recurring_payments", lambda: find_recurring_payments_result(transactions)),
+        ("spending_percentiles", lambda: spending_percentiles_result(transactions)),
+        ("spending_percentiles_exact", lambda: spending_percentiles_result(transactions, exact=True)),
+        # Без декоратора 'save_to_file', чтобы не измерять запись отчёта на диск
+        (
+            "spending_by_category",
+            lambda: category_spending(transactions.copy(), "Переводы", "2021-12-20"),
+        ),
+    ]
+    return cases
+
+
+def run_benchmarks(
+    sizes: List[int], repeats: int = 3, only: Optional[List[str]] = None
+) -> Dict[str, Dict[str, float]]:
+    """
+    Запускает бенчмарки для всех размеров. Внешние API подменяются локальными заглушками.
+    :return: Словарь {"функция@строк": {"seconds": ..., "peak_mb": ...}}.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir, patch(
+        "src.views.currency_exchanger", return_value=CURRENCY_STUB
+    ), patch("src.views.stock_exchanger", return_value=STOCK_STUB):
+        for rows in sizes:
+            for name, function in build_cases(rows, workdir):
+                if only and name not in only:
+                    continue
+                results[f"{name}@{rows}"] = measure(function, repeats)
+                print(f"{name}@{rows}: {results[f'{name}@{rows}']}", file=sys.stderr)
+    return results
+
+
+def compare_results(
+    results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float = 0.25
+) -> List[str]:
+    """
+    Сравнивает результаты с базовой линией.
+    :param tolerance: Допустимое относительное ухудшение (0.25 — на 25%).
+    :return: Список описаний регрессий (пустой, если регрессий нет).
+    """
+    regressions = []
+    for case, metrics in results.items():
+        if case not in baseline:
+            continue
+        for metric in ("seconds", "peak_mb"):
+            expected = baseline[case].get(metric)
+            if expected and metrics[metric] > expected * (1 + tolerance):
+                regressions.append(f"{case}: {metric} {metrics[metric]} > {expected} (+{tolerance:.0%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки finance-flow на синтетических данных.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000], help="Размеры выборок (строк).")
+    parser.add_argument("--repeats", type=int, default=3, help="Количество повторов для замера времени.")
+    parser.add_argument("--only", nargs="*", help="Запустить только указанные функции.")
+    parser.add_argument("--baseline", help="JSON-файл с базовой линией.")
+    parser.add_argument("--update-baseline", action="store_true", help="Перезаписать базовую линию результатами.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Допустимое ухудшение относительно базы.")
+    parser.add_argument("--output", help="Куда сохранить результаты в формате JSON.")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.repeats, args.only)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4, ensure_ascii=False)
+
+    if not args.baseline:
+        print(json.dumps(results, indent=4, ensure_ascii=False))
+        return 0
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, indent=4, ensure_ascii=False)
+        print(f"Базовая линия сохранена: {args.baseline}")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+
+    regressions = compare_results(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"РЕГРЕССИЯ {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
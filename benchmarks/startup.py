@@ -0,0 +1,76 @@
+"""
+Бенчмарк времени запуска: время импорта модулей проекта в отдельном процессе и список загруженных тяжёлых библиотек.
+
+Пример запуска из корня проекта:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --max-seconds 0.3
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["src.cli", "src.services", "src.views", "src.reports"]
+HEAVY_MODULES = ["pandas", "numpy", "requests", "openpyxl"]
+
+# Замер выполняется в чистом процессе: в текущем процессе модули уже могут быть загружены
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def measure_import(module: str, repeats: int = 3) -> Dict:
+    """
+    Измеряет время импорта модуля в новом процессе интерпретатора (лучшее из нескольких запусков).
+    :param module: Имя модуля, например 'src.cli'.
+    :param repeats: Количество запусков.
+    :return: Словарь {"seconds": ..., "loaded": [...]} с временем импорта и загруженными тяжёлыми библиотеками.
+    """
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    best = min(runs, key=lambda run: run["seconds"])
+    return {"seconds": round(best["seconds"], 6), "loaded": best["loaded"]}
+
+
+def run_startup_benchmarks(modules: Optional[List[str]] = None, repeats: int = 3) -> Dict[str, Dict]:
+    """Измеряет время импорта для каждого модуля."""
+    return {module: measure_import(module, repeats) for module in modules or MODULES}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк времени импорта модулей finance-flow.")
+    parser.add_argument("--modules", nargs="+", default=MODULES, help="Модули для замера.")
+    parser.add_argument("--repeats", type=int, default=3, help="Количество запусков для каждого модуля.")
+    parser.add_argument("--max-seconds", type=float, help="Максимально допустимое время импорта модуля.")
+    args = parser.parse_args()
+
+    results = run_startup_benchmarks(args.modules, args.repeats)
+    print(json.dumps(results, indent=4, ensure_ascii=False))
+
+    if args.max_seconds is None:
+        return 0
+    slow = [module for module, result in results.items() if result["seconds"] > args.max_seconds]
+    for module in slow:
+        print(f"РЕГРЕССИЯ {module}: импорт {results[module]['seconds']} с > {args.max_seconds} с")
+    return 1 if slow else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,27 +1,16 @@
 import json
-import logging
-import os
 
 import pandas as pd
 
+from src.logger_config import add_logger
 from src.reports import spending_by_category
 from src.services import (cashback_analysis, find_personal_transfer, find_phone_numbers, investment_bank,
                           searching_transactions)
 from src.utils import transaction_parser
 from src.views import main_view
 
-log_dir = "logs"
-os.makedirs(log_dir, exist_ok=True)
-
 # Настройка логирования
-logger = logging.getLogger("main")
-logger.setLevel(logging.DEBUG)
-file_handler = logging.FileHandler("logs/main.log", mode="w", encoding="UTF-8")
-file_formatter = logging.Formatter(
-    "%(asctime)s - %(filename)s - %(levelname)s: %(message)s", datefmt="%d-%m-%Y %H:%M:%S"
-)
-file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
+logger = add_logger("main.log", "main")
 
 
 def main():
@@ -37,7 +26,7 @@ def main():
 
     # Загружаем транзакции
     transactions = transaction_parser("data/operations.xlsx", False)
-    logger.info(f"Загружено {len(transactions)} транзакций.")
+    logger.info("Загружено %s транзакций.", len(transactions))
 
     # 1️Веб-страница
     web_response = main_view("2021-12-20 19:18:12", "data/operations.xlsx")
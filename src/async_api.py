@@ -0,0 +1,116 @@
+import asyncio
+import functools
+import os
+import weakref
+from concurrent.futures import Executor
+from typing import Any, Callable, Optional
+
+from src import reports, services, utils
+from src.logger_config import add_logger
+
+# Настройка логирования
+logger = add_logger("async_api.log", "async_api")
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("ASYNC_MAX_CONCURRENCY", "4"))
+
+
+class AsyncRunner:
+    """
+    Выполняет синхронные функции (разбор XLSX, расчёты на pandas) в исполнителе, не блокируя цикл событий.
+    Одновременно выполняется не больше 'max_concurrency' задач, остальные ждут своей очереди.
+    Отменённая задача, которая ещё ждёт очереди, не запускается. Уже запущенную функцию прервать нельзя:
+    она дорабатывает в исполнителе, но её результат отбрасывается, а ожидающий код сразу получает отмену.
+    """
+
+    def __init__(self, executor: Optional[Executor] = None, max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> None:
+        """
+        :param executor: Исполнитель (ThreadPoolExecutor или ProcessPoolExecutor).
+                         По умолчанию используется пул потоков цикла событий.
+        :param max_concurrency: Максимальное количество одновременно выполняемых задач.
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"Количество одновременных задач должно быть положительным, получено {max_concurrency}.")
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self.running = 0
+        # Семафор привязывается к циклу событий, поэтому для каждого цикла создаётся свой
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def run(self, function: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Выполняет функцию в исполнителе.
+        :param function: Синхронная функция. Для ProcessPoolExecutor функция и аргументы должны сериализоваться pickle.
+        :return: Результат функции.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._semaphore(loop):
+            self.running += 1
+            try:
+                return await loop.run_in_executor(self.executor, functools.partial(function, *args, **kwargs))
+            except asyncio.CancelledError:
+                logger.info("Выполнение '%s' отменено.", getattr(function, "__name__", function))
+                raise
+            finally:
+                self.running -= 1
+
+
+_runner = AsyncRunner()
+
+
+def configure_async(
+    executor: Optional[Executor] = None, max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+) -> AsyncRunner:
+    """
+    Настраивает исполнитель для асинхронных функций проекта.
+    :param executor: Исполнитель (по умолчанию — пул потоков цикла событий).
+    :param max_concurrency: Максимальное количество одновременно выполняемых задач
+                            (по умолчанию — переменная окружения ASYNC_MAX_CONCURRENCY или 4).
+    :return: Новый AsyncRunner, который будет использоваться по умолчанию.
+    """
+    global _runner
+    _runner = AsyncRunner(executor, max_concurrency)
+    logger.info("Асинхронный исполнитель настроен: %s, одновременных задач - %s.", executor, max_concurrency)
+    return _runner
+
+
+def get_runner() -> AsyncRunner:
+    """Возвращает исполнитель, настроенный через 'configure_async'."""
+    return _runner
+
+
+def offload(function: Callable) -> Callable:
+    """
+    Создаёт асинхронный вариант синхронной функции, который выполняет её через 'get_runner()'.
+    :param function: Синхронная функция.
+    :return: Корутинная функция с теми же параметрами.
+    """
+
+    @functools.wraps(function)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await get_runner().run(function, *args, **kwargs)
+
+    wrapper.__name__ = wrapper.__qualname__ = f"{function.__name__}_async"
+    return wrapper
+
+
+# Асинхронные варианты функций загрузки, сервисов и отчётов
+transaction_parser_async = offload(utils.transaction_parser)
+cashback_analysis_async = offload(services.cashback_analysis)
+investment_bank_async = offload(services.investment_bank)
+investment_bank_matrix_async = offload(services.investment_bank_matrix)
+searching_transactions_async = offload(services.searching_transactions)
+fuzzy_searching_transactions_async = offload(services.fuzzy_searching_transactions)
+find_phone_numbers_async = offload(services.find_phone_numbers)
+find_personal_transfer_async = offload(services.find_personal_transfer)
+find_recurring_payments_async = offload(services.find_recurring_payments)
+spending_percentiles_async = offload(services.spending_percentiles)
+spending_by_category_async = offload(reports.spending_by_category)
+monthly_spending_by_category_async = offload(reports.monthly_spending_by_category)
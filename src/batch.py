@@ -0,0 +1,96 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from src.external_api import currency_exchanger, stock_exchanger
+from src.logger_config import add_logger
+from src.views import build_main_view, load_user_settings, path_project
+
+# Настройка логирования
+logger = add_logger("batch.log", "batch")
+
+
+def _unique(values: List[str]) -> List[str]:
+    """Убирает повторы, сохраняя порядок первого появления."""
+    return list(dict.fromkeys(values))
+
+
+def _build_dashboard(
+    current_datetime: str,
+    transactions_path: str,
+    settings_path: str,
+    output_file: str,
+    currency_rates: List[Dict],
+    stock_rates: List[Dict],
+) -> str:
+    """
+    Формирует JSON-ответ главной страницы для одного аккаунта и записывает его в файл.
+    Ошибки не перехватываются: аккаунт, который не удалось обработать, не попадает в результат 'run_batch'.
+    """
+    response = build_main_view(current_datetime, transactions_path, settings_path, currency_rates, stock_rates)
+    with open(output_file, "w", encoding="utf-8") as file:
+        file.write(response)
+    return output_file
+
+
+def run_batch(
+    accounts: List[Tuple[str, str]],
+    current_datetime: str,
+    output_dir: str = "dashboards_data",
+    max_workers: Optional[int] = None,
+) -> Dict[int, str]:
+    """
+    Формирует главную страницу сразу для нескольких аккаунтов.
+    Курсы валют и цены акций запрашиваются один раз для объединённого списка из всех настроек,
+    после чего аккаунты обрабатываются параллельно в пуле процессов.
+    :param accounts: Список пар (путь до файла с транзакциями, путь до файла настроек).
+    :param current_datetime: Строка с датой и временем в формате 'YYYY-MM-DD HH:MM:SS'.
+    :param output_dir: Каталог для результатов (относительно корня проекта, если путь не абсолютный).
+    :param max_workers: Количество процессов (по умолчанию — число ядер).
+    :return: Словарь {номер аккаунта в списке 'accounts': путь до файла с результатом}. Несколько аккаунтов
+    могут ссылаться на один файл транзакций с разными настройками, поэтому ключом служит номер, а не путь.
+    Аккаунты, обработка которых завершилась ошибкой, в словарь не попадают.
+    """
+    logger.info("Вызов функции 'run_batch'. Количество аккаунтов: %s.", len(accounts))
+
+    settings = [load_user_settings(settings_path) for _, settings_path in accounts]
+    currencies = _unique([currency for item in settings for currency in item.get("user_currencies", [])])
+    stocks = _unique([stock for item in settings for stock in item.get("user_stocks", [])])
+
+    # Один набор запросов к API на все аккаунты
+    currency_rates = currency_exchanger(currencies) if currencies else []
+    stock_rates = stock_exchanger(stocks) if stocks else []
+    logger.info("Получено курсов валют: %s, цен акций: %s.", len(currency_rates), len(stock_rates))
+
+    output_dir = os.path.join(path_project, output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for index, (transactions_path, settings_path) in enumerate(accounts):
+            name = os.path.splitext(os.path.basename(transactions_path))[0]
+            output_file = os.path.join(output_dir, f"{index:04d}_{name}.json")
+            future = executor.submit(
+                _build_dashboard,
+                current_datetime,
+                transactions_path,
+                settings_path,
+                output_file,
+                currency_rates,
+                stock_rates,
+            )
+            futures.append(future)
+
+        for index, future in enumerate(futures):
+            transactions_path = accounts[index][0]
+            try:
+                results[index] = future.result()
+                logger.info("Результат для аккаунта %s ('%s') сохранён: %s.", index, transactions_path, results[index])
+            except Exception as e:
+                logger.error(
+                    "Ошибка при обработке аккаунта %s ('%s'): %s.", index, transactions_path, e, exc_info=True
+                )
+
+    logger.info("Пакетная обработка завершена. Успешно: %s из %s.", len(results), len(accounts))
+    return results
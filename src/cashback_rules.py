@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from src.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+
+def _chronological_keys(dates: pd.Series) -> np.ndarray:
+    """
+    Ключи для сортировки операций по времени внутри месяца.
+    Строки формата '%d.%m.%Y %H:%M:%S' не разбираются целиком: внутри одного месяца порядок
+    задаёт строка 'ДД ЧЧ:ММ:СС', которая сравнивается лексикографически.
+    """
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates.to_numpy()
+    text = dates.astype(str)
+    keys: np.ndarray = (text.str.slice(0, 2) + text.str.slice(10, 19)).to_numpy()
+    return keys
+
+
+@dataclass(frozen=True)
+class CashbackRules:
+    """
+    Правила начисления кэшбэка.
+    Ставка определяется по приоритету: исключённая категория (0) → ставка по MCC → ставка по категории → базовая.
+    Месячный лимит ограничивает кэшбэк по каждой карте за календарный месяц; операции учитываются
+    в хронологическом порядке, пока лимит не исчерпан.
+    """
+
+    default_rate: float = 0.01
+    category_rates: Dict[str, float] = field(default_factory=dict)
+    mcc_rates: Dict[int, float] = field(default_factory=dict)
+    excluded_categories: Tuple[str, ...] = ()
+    monthly_cap: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict] = None) -> CashbackRules:
+        """
+        Создаёт правила из словаря настроек (например, ключа "cashback_rules" в 'user_settings.json').
+        :param config: Словарь с ключами "default_rate", "categories", "mcc", "excluded_categories", "monthly_cap".
+                       Отсутствующие ключи заменяются значениями по умолчанию (1% на все траты без лимита).
+        :return: CashbackRules.
+        """
+        config = config or {}
+        return cls(
+            default_rate=float(config.get("default_rate", cls.default_rate)),
+            category_rates={category: float(rate) for category, rate in config.get("categories", {}).items()},
+            mcc_rates={int(mcc): float(rate) for mcc, rate in config.get("mcc", {}).items()},
+            excluded_categories=tuple(config.get("excluded_categories", ())),
+            monthly_cap=None if config.get("monthly_cap") is None else float(config["monthly_cap"]),
+        )
+
+    def _category_rate(self, category: Any) -> float:
+        """Ставка по категории или базовая ставка (без учёта MCC и исключённых категорий)."""
+        return self.category_rates.get(category, self.default_rate)
+
+    def rate(self, category: Any, mcc: Any = None) -> float:
+        """
+        Ставка кэшбэка для одной операции с тем же приоритетом, что и 'rates'.
+        Используется при построчной обработке списка словарей без pandas.
+        :param category: Категория операции.
+        :param mcc: MCC операции (опционально).
+        :return: Ставка кэшбэка.
+        """
+        if category in self.excluded_categories:
+            return 0.0
+        if self.mcc_rates and mcc is not None:
+            try:
+                mcc_rate = self.mcc_rates.get(int(float(mcc)))
+            except (TypeError, ValueError):
+                mcc_rate = None
+            if mcc_rate is not None:
+                return mcc_rate
+        return self._category_rate(category)
+
+    def rates(self, categories: pd.Series, mcc: Optional[pd.Series] = None) -> np.ndarray:
+        """
+        Ставки кэшбэка для каждой строки. Правила компилируются в таблицы по уникальным значениям категорий и MCC,
+        после чего ставки выбираются индексированием массивов.
+        :param categories: Столбец "Категория".
+        :param mcc: Столбец "MCC" (опционально).
+        :return: Массив ставок той же длины.
+        """
+        category_codes, category_values = pd.factorize(categories)
+        category_table = np.array([self._category_rate(value) for value in category_values] + [self.default_rate])
+        # Код -1 (пропуск) указывает на последний элемент — базовую ставку
+        rates: np.ndarray = category_table[category_codes]
+
+        if self.mcc_rates and mcc is not None:
+            mcc_codes, mcc_values = pd.factorize(pd.to_numeric(mcc, errors="coerce"))
+            mcc_table = np.array([self.mcc_rates.get(int(value), np.nan) for value in mcc_values] + [np.nan])
+            mcc_rates = mcc_table[mcc_codes]
+            rates = np.where(np.isnan(mcc_rates), rates, mcc_rates)
+
+        if self.excluded_categories:
+            excluded_table = np.array([category in self.excluded_categories for category in category_values] + [False])
+            rates = np.where(excluded_table[category_codes], 0.0, rates)
+        return rates
+
+    def apply_monthly_cap(
+        self,
+        cashback: np.ndarray,
+        cards: pd.Series,
+        months: pd.Series,
+        dates: pd.Series,
+        earned: Optional[Dict[Tuple, float]] = None,
+    ) -> np.ndarray:
+        """
+        Ограничивает кэшбэк месячным лимитом по каждой карте.
+        :param cashback: Кэшбэк по строкам без учёта лимита.
+        :param cards: Ключ карты для каждой строки.
+        :param months: Месяц каждой строки.
+        :param dates: Дата и время операций (определяют порядок исчерпания лимита).
+        :param earned: Уже начисленный кэшбэк {(карта, месяц): сумма} — для дополнения ранее рассчитанных данных.
+        :return: Кэшбэк по строкам с учётом лимита.
+        """
+        if self.monthly_cap is None:
+            return cashback
+
+        order = np.argsort(_chronological_keys(dates), kind="stable")
+
+        rows = pd.DataFrame(
+            {
+                "card": pd.Series(cards).to_numpy()[order],
+                "month": pd.Series(months).array.take(order),
+                "cashback": cashback[order],
+            }
+        )
+        cumulative = rows.groupby(["card", "month"], sort=False, dropna=False)["cashback"].cumsum().to_numpy()
+        if earned:
+            keys = zip(rows["card"], rows["month"])
+            cumulative = cumulative + np.array([earned.get(key, 0.0) for key in keys])
+
+        capped_after = np.minimum(cumulative, self.monthly_cap)
+        capped_before = np.minimum(cumulative - rows["cashback"].to_numpy(), self.monthly_cap)
+
+        result = np.empty_like(cashback, dtype="float64")
+        result[order] = np.maximum(capped_after - capped_before, 0.0)
+        return result
+
+    def evaluate(
+        self,
+        spent: np.ndarray,
+        categories: pd.Series,
+        mcc: Optional[pd.Series] = None,
+        cards: Optional[pd.Series] = None,
+        months: Optional[pd.Series] = None,
+        dates: Optional[pd.Series] = None,
+        earned: Optional[Dict[Tuple, float]] = None,
+    ) -> np.ndarray:
+        """
+        Рассчитывает кэшбэк по каждой строке сразу для всех месяцев и карт.
+        :param spent: Сумма трат по модулю (0 для поступлений).
+        :param categories: Столбец "Категория".
+        :param mcc: Столбец "MCC" (опционально).
+        :param cards, months, dates: Карта, месяц и дата операции — нужны только при месячном лимите.
+        :param earned: Уже начисленный кэшбэк {(карта, месяц): сумма}.
+        :return: Массив кэшбэка по строкам.
+        """
+        cashback: np.ndarray = np.asarray(spent, dtype="float64") * self.rates(categories, mcc)
+        if self.monthly_cap is not None and cards is not None and months is not None and dates is not None:
+            cashback = self.apply_monthly_cap(cashback, cards, months, dates, earned)
+        return cashback
+
+
+DEFAULT_RULES = CashbackRules()
@@ -0,0 +1,195 @@
+"""
+Командная строка проекта.
+
+Примеры запуска из корня проекта:
+    python -m src.cli dashboard "2021-12-20 19:18:12"
+    python -m src.cli search Ozon.ru
+    python -m src.cli search озон --fuzzy --limit 5
+    python -m src.cli cashback 2021 2
+    python -m src.cli report Переводы --date 2021-12-20
+    python -m src.cli search Ozon.ru --export reports_data/ozon.parquet --columns "Дата операции,Сумма операции"
+    python -m src.cli watch --output dashboards_data
+
+Бюджет памяти задаётся переменной окружения MEMORY_BUDGET_MB: файлы, которые в него не помещаются,
+команды dashboard и report читают по частям. Флаг --memory-report выводит пики памяти этапов.
+
+Тяжёлые модули импортируются внутри обработчиков команд: поиск и анализ кэшбэка читают файл
+без pandas и не загружают requests, поэтому короткие запуски не платят за их импорт.
+"""
+
+import argparse
+import os
+import sys
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from src.export import ExportSource
+
+DEFAULT_TRANSACTIONS = os.path.join("data", "operations.xlsx")
+
+
+def _dashboard(args: argparse.Namespace) -> str:
+    """Формирует JSON-ответ главной страницы."""
+    from src.views import main_view
+
+    return main_view(
+        args.datetime, os.path.abspath(args.transactions), settings_path=args.settings, compact=args.compact
+    )
+
+
+def _columns(args: argparse.Namespace) -> Optional[List[str]]:
+    """Столбцы для выгрузки из параметра --columns (через запятую)."""
+    return [column.strip() for column in args.columns.split(",")] if args.columns else None
+
+
+def _export(data: "ExportSource", args: argparse.Namespace) -> str:
+    """Выгружает результат в файл --export и возвращает сводку в JSON."""
+    from src.export import export_result
+    from src.serialization import dumps
+
+    rows = export_result(data, args.export, columns=_columns(args))
+    return dumps({"file": args.export, "rows": rows}, args.compact)
+
+
+def _search(args: argparse.Namespace) -> str:
+    """Ищет транзакции по строке в описании или категории (точно или нечётко)."""
+    from src.services import (fuzzy_searching_transactions, fuzzy_searching_transactions_result,
+                              searching_transactions, searching_transactions_result)
+    from src.utils import read_transaction_records
+
+    transactions = read_transaction_records(args.transactions)
+    if args.export:
+        if args.fuzzy:
+            return _export(fuzzy_searching_transactions_result(transactions, args.query, args.limit), args)
+        return _export(searching_transactions_result(transactions, args.query), args)
+    if args.fuzzy:
+        return fuzzy_searching_transactions(transactions, args.query, args.limit, compact=args.compact)
+    return searching_transactions(transactions, args.query, compact=args.compact)
+
+
+def _cashback(args: argparse.Namespace) -> str:
+    """Рассчитывает возможный кэшбэк по категориям за месяц."""
+    from src.services import cashback_analysis
+    from src.utils import read_transaction_records
+
+    return cashback_analysis(read_transaction_records(args.transactions), args.year, args.month, compact=args.compact)
+
+
+def _report(args: argparse.Namespace) -> str:
+    """Формирует отчёт о тратах по категории за три месяца."""
+    from src.reports import spending_by_category
+    from src.serialization import dumps, to_records
+    from src.utils import load_transactions
+
+    # При превышении бюджета памяти файл читается по частям, и в памяти остаются только транзакции категории
+    transactions = load_transactions(
+        args.transactions, chunk_filter=lambda chunk: chunk[chunk["Категория"] == args.category]
+    )
+    report = spending_by_category(transactions, args.category, args.date)
+    if args.export:
+        return _export(report, args)
+    return dumps(to_records(report), args.compact)
+
+
+def _watch(args: argparse.Namespace) -> str:
+    """Следит за файлами транзакций и настроек и обновляет готовые результаты после изменений."""
+    from src.watch import STATUS_FILE, DashboardWatcher, read_output
+
+    watcher = DashboardWatcher(
+        args.transactions,
+        settings_path=args.settings,
+        output_dir=args.output,
+        debounce=args.debounce,
+        interval=args.interval,
+        compact=args.compact,
+    )
+    if args.once:
+        watcher.refresh()
+    else:
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
+    return read_output(args.output, STATUS_FILE)
+
+
+COMMANDS: Dict[str, Callable[[argparse.Namespace], str]] = {
+    "dashboard": _dashboard,
+    "search": _search,
+    "cashback": _cashback,
+    "report": _report,
+    "watch": _watch,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Создаёт парсер аргументов с подкомандами dashboard, search, cashback, report и watch."""
+    parser = argparse.ArgumentParser(prog="finance-flow", description="Анализ банковских транзакций.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--transactions", default=DEFAULT_TRANSACTIONS, help="Путь до файла с транзакциями.")
+    common.add_argument("--compact", action="store_true", help="Компактный JSON без отступов.")
+    common.add_argument(
+        "--memory-report", action="store_true", help="Вывести в stderr пиковое потребление памяти этапов."
+    )
+
+    dashboard = subparsers.add_parser("dashboard", parents=[common], help="JSON-ответ главной страницы.")
+    dashboard.add_argument("datetime", help="Дата и время в формате 'YYYY-MM-DD HH:MM:SS'.")
+    dashboard.add_argument("--settings", default=None, help="Путь до файла пользовательских настроек.")
+
+    search = subparsers.add_parser("search", parents=[common], help="Поиск транзакций по описанию или категории.")
+    search.add_argument("query", help="Строка для поиска.")
+    search.add_argument("--fuzzy", action="store_true", help="Нечёткий поиск с учётом опечаток и транслитерации.")
+    search.add_argument("--limit", type=int, default=10, help="Количество результатов нечёткого поиска.")
+
+    cashback = subparsers.add_parser("cashback", parents=[common], help="Анализ выгодных категорий кэшбэка.")
+    cashback.add_argument("year", type=int, help="Год.")
+    cashback.add_argument("month", type=int, help="Месяц.")
+
+    report = subparsers.add_parser("report", parents=[common], help="Траты по категории за три месяца.")
+    report.add_argument("category", help="Категория.")
+    report.add_argument("--date", default=None, help="Дата отчёта в формате 'YYYY-MM-DD' (по умолчанию — сегодня).")
+
+    for command in (search, report):
+        command.add_argument(
+            "--export", default=None, help="Выгрузить результат в файл '.csv', '.jsonl' или '.parquet' вместо JSON."
+        )
+        command.add_argument("--columns", default=None, help="Столбцы для выгрузки через запятую.")
+
+    watch = subparsers.add_parser(
+        "watch", parents=[common], help="Обновление готовой главной страницы и отчётов при изменении данных."
+    )
+    watch.add_argument("--settings", default=None, help="Путь до файла пользовательских настроек.")
+    watch.add_argument("--output", default="dashboards_data", help="Каталог для готовых результатов.")
+    watch.add_argument("--interval", type=float, default=1.0, help="Период проверки файлов в секундах.")
+    watch.add_argument("--debounce", type=float, default=2.0, help="Пауза без изменений перед пересчётом, секунды.")
+    watch.add_argument("--once", action="store_true", help="Сформировать результаты один раз и завершиться.")
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа командной строки.
+    :param argv: Аргументы командной строки (по умолчанию — sys.argv).
+    :return: Код завершения.
+    """
+    args = build_parser().parse_args(argv)
+    if args.memory_report:
+        from src.metrics import set_memory_tracking
+
+        set_memory_tracking(True)
+
+    print(COMMANDS[args.command](args))
+
+    if args.memory_report:
+        from src.memory import memory_report
+        from src.serialization import dumps
+
+        print(dumps(memory_report()), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.cashback_rules import DEFAULT_RULES, CashbackRules
+from src.dates import operation_date
+from src.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+PHONE_PATTERN = re.compile(r"\+7\s\d{3}\s\d{3}[-\s]?\d{2}[-\s]?\d{2}")
+NAME_PATTERN = re.compile(r"\b[А-ЯЁ][а-яё]+\s[А-ЯЁ]\.")
+
+
+def card_last_digits(cards: pd.Series) -> pd.Series:
+    """
+    Последние 4 символа номера карты. Строковое преобразование выполняется только для уникальных значений,
+    результат совпадает с `cards.astype(str).str[-4:]` (пропуски становятся 'nan' или 'None').
+    """
+    codes, uniques = pd.factorize(cards)
+    last_digits = pd.Series([str(card)[-4:] for card in uniques], dtype=object).reindex(codes).to_numpy()
+    missing = codes == -1
+    if missing.any():
+        last_digits[missing] = cards[missing].astype(str).str[-4:].to_numpy()
+    return pd.Series(last_digits, index=cards.index)
+
+
+def failed_mask(status: pd.Series) -> np.ndarray:
+    """
+    Отмечает операции со статусом 'FAILED' без учёта регистра.
+    Регистр приводится только для уникальных значений, а не для всего столбца.
+    """
+    failed = [value for value in status.unique() if isinstance(value, str) and value.upper() == "FAILED"]
+    return status.isin(failed).to_numpy()
+
+
+def add_exact(partials: List[float], value: float) -> None:
+    """
+    Прибавляет число к точной сумме, хранимой как список неперекрывающихся частичных сумм (как в 'math.fsum').
+    'math.fsum' от частичных сумм (или от их объединения для нескольких частей данных) даёт
+    корректно округлённую сумму всех слагаемых, не зависящую от порядка сложения и разбиения на части.
+    """
+    value = float(value)
+    i = 0
+    for partial in partials:
+        if abs(value) < abs(partial):
+            value, partial = partial, value
+        high = value + partial
+        low = partial - (high - value)
+        if low:
+            partials[i] = low
+            i += 1
+        value = high
+    partials[i:] = [value]
+
+
+def cashback_entry(
+    transaction: Dict, year: int, month: int, rules: CashbackRules = DEFAULT_RULES
+) -> Optional[Tuple[str, float]]:
+    """
+    Возвращает категорию и кэшбэк по транзакции или None, если она не подходит под период
+    или её категория исключена правилами. Ставка определяется правилами (по умолчанию — 1%).
+    """
+    operation_datetime: Any = transaction.get("Дата операции")
+    transaction_date = operation_date(operation_datetime)
+    category = transaction.get("Категория", "Неизвестно")
+    amount: Any = transaction.get("Сумма операции")
+    if (
+        transaction_date.year == year
+        and transaction_date.month == month
+        and amount < 0
+        and category not in rules.excluded_categories
+    ):
+        return category, abs(amount) * rules.rate(category, transaction.get("MCC"))
+    return None
+
+
+def investment_saving(transaction: Dict, month: str, limit: int) -> float:
+    """Возвращает сумму, которая была бы отложена в копилку по одной транзакции."""
+    operation_datetime: Any = transaction.get("Дата операции")
+    transaction_date = operation_date(operation_datetime)
+    if transaction_date.strftime("%Y-%m") != month:
+        return 0.0
+
+    amount: Any = transaction.get("Сумма операции")
+    if amount < 0:
+        amount = abs(amount)
+        if amount % limit != 0:
+            return float((amount // limit + 1) * limit - amount)
+    return 0.0
+
+
+def matches_query(transaction: Dict, query: str) -> bool:
+    """Проверяет, содержится ли запрос (в нижнем регистре) в описании или категории."""
+    return (
+        query in str(transaction.get("Описание", "")).lower() or query in str(transaction.get("Категория", "")).lower()
+    )
+
+
+def has_phone_number(transaction: Dict) -> bool:
+    """Проверяет, содержит ли описание транзакции номер телефона."""
+    return bool(PHONE_PATTERN.search(str(transaction.get("Описание", ""))))
+
+
+def is_personal_transfer(transaction: Dict) -> bool:
+    """Проверяет, является ли транзакция переводом физическому лицу."""
+    return transaction.get("Категория", "") == "Переводы" and bool(
+        NAME_PATTERN.search(str(transaction.get("Описание", "")))
+    )
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from src.cashback_rules import DEFAULT_RULES, CashbackRules
+from src.common import card_last_digits
+from src.dates import operation_months
+from src.lazy import lazy_import
+from src.logger_config import add_logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+# Настройка логирования
+logger = add_logger("cube.log", "cube")
+
+DIMENSIONS = ["card", "category", "month", "status", "is_spending"]
+MEASURES = ["amount", "spent", "cashback", "count"]
+
+
+def _aggregate(cells: pd.DataFrame) -> pd.DataFrame:
+    """Сворачивает строки или ячейки по всем измерениям куба, сохраняя порядок первого появления."""
+    aggregated: pd.DataFrame = cells.groupby(DIMENSIONS, sort=False, dropna=False, observed=True)[MEASURES].sum()
+    return aggregated.reset_index()
+
+
+class SpendingCube:
+    """
+    Материализованный агрегат транзакций: карта (последние 4 символа) × категория × месяц × статус.
+    Дополнительное измерение 'is_spending' отделяет траты от поступлений.
+    Меры: 'amount' — сумма операций, 'spent' — сумма трат по модулю, 'cashback' — кэшбэк по правилам
+    из модуля 'cashback_rules', 'count' — количество операций.
+    Куб строится за один проход groupby и дополняется новыми транзакциями через 'update'.
+    """
+
+    def __init__(self, cells: pd.DataFrame, invalid_rows: int = 0, rules: CashbackRules = DEFAULT_RULES) -> None:
+        self.cells = cells
+        self.invalid_rows = invalid_rows
+        self.rules = rules
+
+    def __len__(self) -> int:
+        """Количество учтённых транзакций."""
+        return int(self.cells["count"].sum())
+
+    @classmethod
+    def from_transactions(
+        cls,
+        transactions: pd.DataFrame,
+        rules: Optional[CashbackRules] = None,
+        earned: Optional[Dict[Tuple, float]] = None,
+    ) -> SpendingCube:
+        """
+        Строит куб по DataFrame с транзакциями.
+        :param transactions: DataFrame с данными о транзакциях.
+        :param rules: Правила начисления кэшбэка (по умолчанию — 1% на все траты).
+        :param earned: Уже начисленный кэшбэк {(карта, месяц): сумма} для учёта месячного лимита.
+        :return: SpendingCube.
+        """
+        rules = rules or DEFAULT_RULES
+        logger.info("Построение куба. Количество транзакций: %s.", len(transactions))
+        amounts = pd.to_numeric(transactions["Сумма операции"], errors="coerce")
+        months = operation_months(transactions["Дата операции"])
+        is_spending = amounts < 0
+
+        rows = pd.DataFrame(
+            {
+                "card": card_last_digits(transactions["Номер карты"]) if "Номер карты" in transactions else "nan",
+                "category": transactions["Категория"] if "Категория" in transactions else "Неизвестно",
+                "month": months,
+                "status": transactions["Статус"] if "Статус" in transactions else None,
+                "is_spending": is_spending,
+                "amount": amounts,
+                "spent": amounts.where(is_spending, 0).abs(),
+                "count": 1,
+            },
+            index=transactions.index,
+        )
+        rows["cashback"] = rules.evaluate(
+            rows["spent"].to_numpy(),
+            rows["category"],
+            mcc=transactions["MCC"] if "MCC" in transactions else None,
+            cards=rows["card"],
+            months=rows["month"],
+            dates=transactions["Дата операции"],
+            earned=earned,
+        )
+        cells = _aggregate(rows)
+        invalid_rows = int((months.isna() | amounts.isna()).sum())
+
+        logger.info("Куб построен. Количество ячеек: %s.", len(cells))
+        return cls(cells, invalid_rows, rules)
+
+    def update(self, transactions: pd.DataFrame) -> SpendingCube:
+        """
+        Добавляет новые транзакции в куб без пересчёта уже учтённых.
+        :param transactions: DataFrame с новыми транзакциями.
+        :return: Этот же куб.
+        """
+        earned = None
+        if self.rules.monthly_cap is not None:
+            earned = self.cells.groupby(["card", "month"], sort=False, dropna=False)["cashback"].sum().to_dict()
+        increment = SpendingCube.from_transactions(transactions, self.rules, earned)
+        self.cells = _aggregate(pd.concat([self.cells, increment.cells], ignore_index=True))
+        self.invalid_rows += increment.invalid_rows
+        return self
+
+    def slice(
+        self,
+        card: Optional[str] = None,
+        category: Optional[str] = None,
+        month: Optional[str] = None,
+        status: Optional[str] = None,
+        spending_only: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Возвращает ячейки куба, удовлетворяющие условиям. Не указанные измерения не ограничиваются.
+        :param card: Последние 4 символа номера карты.
+        :param category: Категория.
+        :param month: Месяц в формате 'YYYY-MM'.
+        :param status: Статус операции.
+        :param spending_only: Если True, возвращаются только траты.
+        :return: DataFrame с ячейками куба.
+        """
+        mask = pd.Series(True, index=self.cells.index)
+        for column, value in (("card", card), ("category", category), ("status", status)):
+            if value is not None:
+                mask &= self.cells[column] == value
+        if month is not None:
+            mask &= self.cells["month"] == pd.Period(month, freq="M")
+        if spending_only:
+            mask &= self.cells["is_spending"]
+        cells: pd.DataFrame = self.cells[mask]
+        return cells
+
+    def card_totals(self) -> pd.DataFrame:
+        """
+        Траты и кэшбэк по картам, в формате функции 'cost_analysis'.
+        :return: DataFrame со столбцами last_digits, total_spent, cashback, отсортированный по last_digits.
+        """
+        totals = self.slice(spending_only=True).groupby("card")[["spent", "cashback"]].sum()
+        return pd.DataFrame(
+            {
+                "last_digits": totals.index.astype(object),
+                "total_spent": totals["spent"].to_numpy(),
+                "cashback": totals["cashback"].to_numpy(),
+            }
+        )
+
+    def category_totals(
+        self, year: Optional[int] = None, month: Optional[int] = None, measure: str = "spent"
+    ) -> pd.Series:
+        """
+        Траты (или кэшбэк) по категориям, в порядке первого появления категории.
+        :param year: Год. Вместе с 'month' ограничивает период одним месяцем.
+        :param month: Месяц.
+        :param measure: 'spent' — сумма трат по модулю, 'cashback' — кэшбэк.
+        :return: Series {категория: значение}.
+        """
+        period = f"{year:04d}-{month:02d}" if year is not None and month is not None else None
+        cells = self.slice(month=period, spending_only=True)
+        totals: pd.Series = cells.groupby("category", sort=False, dropna=False)[measure].sum()
+        return totals
+
+    def monthly_totals(self, category: Optional[str] = None) -> pd.DataFrame:
+        """
+        Траты по месяцам.
+        :param category: Категория (по умолчанию — все категории).
+        :return: DataFrame со столбцами month ('YYYY-MM'), spent, count, отсортированный по месяцу.
+        """
+        cells = self.slice(category=category, spending_only=True)
+        totals: pd.DataFrame = cells.groupby("month")[["spent", "count"]].sum().reset_index()
+        totals["month"] = totals["month"].astype(str)
+        return totals
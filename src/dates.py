@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.lazy import lazy_import
+from src.logger_config import add_logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+# Настройка логирования
+logger = add_logger("dates.log", "dates")
+
+DATE_COLUMN = "Дата операции"
+# Граница окна: дата, Timestamp или строка 'YYYY-MM-DD[ HH:MM:SS]'
+DateLike = Union[date, str, "pd.Timestamp"]
+DATETIME_FORMAT = "%d.%m.%Y %H:%M:%S"
+DAY_FORMAT = "%d.%m.%Y"
+# Код месяца для NaT (коды месяцев совпадают с pd.Period(..., freq="M").ordinal)
+NAT_MONTH_CODE = np.iinfo("int64").min
+
+# Ширина строки 'ДД.ММ.ГГГГ ЧЧ:ММ:СС' и позиции разделителей
+_WIDTH = 19
+_DAY_SEPARATORS = {2: ".", 5: "."}
+_TIME_SEPARATORS = {10: " ", 13: ":", 16: ":"}
+_MONTH_DAYS = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+_NAT = np.datetime64("NaT", "ns").astype("int64")
+
+
+def _digit(codes: np.ndarray, position: int) -> np.ndarray:
+    """Цифра в позиции 'position' всех строк; для символов, не являющихся цифрами, — значение больше 9."""
+    digit: np.ndarray = codes[:, position] - np.uint8(ord("0"))
+    return digit
+
+
+def _number(codes: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """Собирает число из цифр в позициях [start, stop) всех строк."""
+    number: np.ndarray = _digit(codes, start).astype("int32")
+    for position in range(start + 1, stop):
+        number = number * 10 + _digit(codes, position)
+    return number
+
+
+def _all_digits(codes: np.ndarray, positions: Sequence[int]) -> np.ndarray:
+    """Отмечает строки, в которых во всех позициях 'positions' стоят цифры."""
+    valid: np.ndarray = _digit(codes, positions[0]) <= 9
+    for position in positions[1:]:
+        valid &= _digit(codes, position) <= 9
+    return valid
+
+
+def _epoch_days(years: np.ndarray, months: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """Количество дней с 01.01.1970 для григорианской даты (алгоритм days_from_civil)."""
+    years = years - (months <= 2)
+    eras = years // 400
+    year_of_era = years - eras * 400
+    day_of_year = (153 * np.where(months > 2, months - 3, months + 9) + 2) // 5 + days - 1
+    epoch_days: np.ndarray = (
+        eras * 146097 + year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year - 719468
+    )
+    return epoch_days
+
+
+def _ascii_bytes(values: np.ndarray, width: int) -> np.ndarray:
+    """
+    Приводит значения к байтовым строкам фиксированной ширины (по байту на символ).
+    Строки с символами вне ASCII не подходят под формат даты и заменяются пустыми.
+    """
+    try:
+        return values.astype(f"S{width}")
+    except UnicodeEncodeError:
+        ascii_values = [value if not isinstance(value, str) or value.isascii() else "" for value in values]
+        return np.asarray(ascii_values, dtype=object).astype(f"S{width}")
+
+
+def _parse_fixed(values: np.ndarray, with_time: bool = True) -> np.ndarray:
+    """
+    Разбирает строки 'ДД.ММ.ГГГГ ЧЧ:ММ:СС' и 'ДД.ММ.ГГГГ' целочисленной арифметикой над кодами символов
+    по фиксированным позициям, без разбора формата для каждой строки. Строки другого вида и несуществующие даты
+    (например, 31.02) становятся NaT.
+    :param values: Массив значений (строки или объекты).
+    :param with_time: Если False, разбирается только день, а время после пробела не проверяется.
+    :return: Массив datetime64[ns].
+    """
+    # Байт на символ; ширина на один символ больше формата: по ненулевому байту в конце
+    # отличаются строки длиннее формата. Столбцы кодов — представление этого массива, без копий.
+    text = _ascii_bytes(np.asarray(values), _WIDTH + 1)
+    codes = text.view("uint8").reshape(len(text), _WIDTH + 1)
+
+    valid = _all_digits(codes, [0, 1, 3, 4, 6, 7, 8, 9])
+    for position, separator in _DAY_SEPARATORS.items():
+        valid &= codes[:, position] == ord(separator)
+    days = _number(codes, 0, 2)
+    months = _number(codes, 3, 5)
+    years = _number(codes, 6, 10)
+    leap = (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+    month_index = np.clip(months, 1, 12) - 1
+    valid &= (months >= 1) & (months <= 12) & (days >= 1)
+    valid &= days <= _MONTH_DAYS[month_index] + (leap & (months == 2))
+
+    date_only = codes[:, 10] == 0
+    day_seconds: Union[np.ndarray, int] = 0
+    if with_time:
+        time_valid = _all_digits(codes, [11, 12, 14, 15, 17, 18]) & (codes[:, _WIDTH] == 0)
+        for position, separator in _TIME_SEPARATORS.items():
+            time_valid &= codes[:, position] == ord(separator)
+        hours, minutes, seconds = _number(codes, 11, 13), _number(codes, 14, 16), _number(codes, 17, 19)
+        time_valid &= (hours < 24) & (minutes < 60) & (seconds < 60)
+        valid &= date_only | time_valid
+        day_seconds = np.where(date_only, 0, hours * 3600 + minutes * 60 + seconds)
+    else:
+        valid &= date_only | (codes[:, 10] == ord(" "))
+
+    nanoseconds = (_epoch_days(years, months, days).astype("int64") * 86400 + day_seconds) * 1_000_000_000
+    return np.where(valid, nanoseconds, _NAT).view("datetime64[ns]")
+
+
+def _parse(dates: pd.Series, with_time: bool, errors: str) -> pd.Series:
+    """
+    Разбирает даты: строки фиксированного формата — векторно, остальные значения — pandas,
+    по одному разу на каждое уникальное значение.
+    """
+    parsed = _parse_fixed(dates.to_numpy(), with_time)
+    retry = np.flatnonzero(np.isnat(parsed) & dates.notna().to_numpy())
+    if len(retry):
+        codes, uniques = pd.factorize(dates.iloc[retry])
+        values = pd.Series(np.asarray(uniques, dtype=object), dtype=object)
+        if errors == "raise":
+            fallback = pd.to_datetime(values, format=DATETIME_FORMAT).to_numpy(dtype="datetime64[ns]")
+        else:
+            fallback = pd.to_datetime(values, format=DATETIME_FORMAT, errors="coerce").to_numpy(dtype="datetime64[ns]")
+            if not with_time:
+                fallback = fallback.astype("datetime64[D]").astype("datetime64[ns]")
+            missing = np.isnat(fallback)
+            if missing.any():
+                first_words = values[missing].astype(str).str.split().str[0]
+                fallback[missing] = pd.to_datetime(first_words, format=DAY_FORMAT, errors="coerce").to_numpy()
+        parsed[retry] = fallback[codes]
+    return pd.Series(parsed, index=dates.index, name=dates.name)
+
+
+def parse_operation_dates(dates: pd.Series, errors: str = "coerce") -> pd.Series:
+    """
+    Разбирает столбец 'Дата операции' в datetime64. Строки формата 'ДД.ММ.ГГГГ ЧЧ:ММ:СС' разбираются векторно
+    по фиксированным позициям символов, остальные значения — pandas, по одному разу на уникальное значение.
+    Разобранный столбец стоит сохранить в DataFrame: остальные функции используют его без повторного разбора.
+    :param dates: Series со строками дат или уже разобранными датами (возвращается без изменений).
+    :param errors: "coerce" — некорректные даты становятся NaT (для строк с некорректным временем берётся день
+                   до пробела), "raise" — значения, которые не разбираются ни как 'ДД.ММ.ГГГГ', ни в формате
+                   '%d.%m.%Y %H:%M:%S', вызывают ValueError.
+    :return: Series с datetime64[ns] и тем же индексом.
+    """
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    return _parse(dates, True, errors)
+
+
+def operation_days(dates: pd.Series) -> pd.Series:
+    """
+    День операции (datetime64 без времени): для строк разбирается только часть до пробела в формате '%d.%m.%Y',
+    некорректные даты становятся NaT.
+    :param dates: Series со строками дат или уже разобранными датами.
+    :return: Series с datetime64[ns].
+    """
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        days: pd.Series = dates.dt.normalize()
+        return days
+    return _parse(dates, False, "coerce")
+
+
+def month_codes(dates: pd.Series) -> np.ndarray:
+    """
+    Коды месяцев операций: количество месяцев с января 1970 года (совпадает с pd.Period(..., freq="M").ordinal).
+    Сравнение и группировка по коду заменяют сравнение дат и объектов Period.
+    :param dates: Series со строками дат или уже разобранными датами.
+    :return: Массив int64; для некорректных дат — NAT_MONTH_CODE.
+    """
+    return operation_days(dates).to_numpy(dtype="datetime64[ns]").astype("datetime64[M]").astype("int64")
+
+
+def month_code(year: int, month: int) -> int:
+    """Код месяца (см. 'month_codes')."""
+    return (year - 1970) * 12 + month - 1
+
+
+def operation_months(dates: pd.Series) -> pd.Series:
+    """Месяц операции (pd.Period); некорректные даты становятся NaT."""
+    months: pd.Series = operation_days(dates).dt.to_period("M")
+    return months
+
+
+@lru_cache(maxsize=4096)
+def _parse_day(day: str) -> date:
+    return datetime.strptime(day, DAY_FORMAT).date()
+
+
+def operation_date(value: str) -> date:
+    """
+    День операции для построчной обработки списка словарей. Разобранные дни запоминаются,
+    поэтому повторяющиеся даты разбираются один раз.
+    :param value: Строка 'ДД.ММ.ГГГГ ЧЧ:ММ:СС' или 'ДД.ММ.ГГГГ'.
+    :return: Дата операции. Для некорректной строки вызывается ValueError.
+    """
+    return _parse_day(value.split()[0])
+
+
+def _timestamps(values: Any) -> np.ndarray:
+    """Приводит дату, строку 'YYYY-MM-DD[ HH:MM:SS]' или их последовательность к datetime64[ns]."""
+    if np.ndim(values) == 0:
+        return np.asarray(pd.Timestamp(values).as_unit("ns").to_datetime64())
+    timestamps: np.ndarray = pd.to_datetime(np.asarray(values), format="ISO8601").to_numpy(dtype="datetime64[ns]")
+    return timestamps
+
+
+class DateIndex:
+    """
+    Индекс транзакций, упорядоченный по дате операции. Окно [start, end] находится двумя бинарными поисками
+    (np.searchsorted) по отсортированным датам, без сравнения всего столбца; поиск окон выполняется за O(log n).
+    Индекс строится один раз (сортировка выгрузки, уже упорядоченной по дате, занимает линейное время)
+    и передаётся функциям вместо DataFrame, когда нужно выбрать много окон.
+    Строки с некорректной датой в индекс не входят.
+    """
+
+    def __init__(self, transactions: pd.DataFrame, errors: str = "coerce") -> None:
+        """
+        :param transactions: DataFrame с данными о транзакциях.
+        :param errors: Обработка некорректных дат при разборе столбца (см. 'parse_operation_dates').
+        """
+        dates = transactions[DATE_COLUMN]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = parse_operation_dates(dates, errors)
+            # Неглубокая копия: исходный DataFrame не меняется, остальные столбцы не копируются
+            transactions = transactions.copy(deep=False)
+            transactions[DATE_COLUMN] = dates
+
+        timestamps = dates.to_numpy(dtype="datetime64[ns]")
+        valid = np.flatnonzero(~np.isnat(timestamps))
+        self.transactions = transactions
+        self.positions = valid[np.argsort(timestamps[valid], kind="stable")]
+        self.timestamps = timestamps[self.positions]
+        self._cumulative: Dict[str, np.ndarray] = {}
+        logger.info("Построен индекс по датам: %s транзакций.", len(self.positions))
+
+    def __len__(self) -> int:
+        """Количество транзакций с корректной датой."""
+        return len(self.positions)
+
+    @classmethod
+    def of(cls, transactions: Union[pd.DataFrame, DateIndex], errors: str = "coerce") -> DateIndex:
+        """Возвращает готовый индекс без изменений или строит его по DataFrame."""
+        return transactions if isinstance(transactions, DateIndex) else cls(transactions, errors)
+
+    def bounds(self, start: DateLike, end: DateLike) -> Tuple[int, int]:
+        """
+        Границы окна в отсортированных датах.
+        :param start: Начало окна включительно (дата, Timestamp или строка 'YYYY-MM-DD[ HH:MM:SS]').
+        :param end: Конец окна включительно.
+        :return: Пара (lo, hi): окну соответствуют позиции [lo, hi).
+        """
+        lo = int(np.searchsorted(self.timestamps, _timestamps(start), side="left"))
+        hi = int(np.searchsorted(self.timestamps, _timestamps(end), side="right"))
+        return lo, max(lo, hi)
+
+    def day_bounds(self, start_day: DateLike, end_day: DateLike) -> Tuple[int, int]:
+        """Границы окна из целых дней: с начала 'start_day' до конца 'end_day' включительно."""
+        start = _timestamps(start_day).astype("datetime64[D]")
+        end = _timestamps(end_day).astype("datetime64[D]") + np.timedelta64(1, "D")
+        lo = int(np.searchsorted(self.timestamps, start.astype("datetime64[ns]"), side="left"))
+        hi = int(np.searchsorted(self.timestamps, end.astype("datetime64[ns]"), side="left"))
+        return lo, max(lo, hi)
+
+    def rows(self, lo: int, hi: int) -> np.ndarray:
+        """Номера строк окна [lo, hi) в исходном порядке транзакций."""
+        return np.sort(self.positions[lo:hi])
+
+    def between(self, start: DateLike, end: DateLike) -> pd.DataFrame:
+        """Транзакции с 'start' по 'end' включительно в исходном порядке."""
+        window: pd.DataFrame = self.transactions.iloc[self.rows(*self.bounds(start, end))]
+        return window
+
+    def between_days(self, start_day: DateLike, end_day: DateLike) -> pd.DataFrame:
+        """Транзакции за дни с 'start_day' по 'end_day' включительно в исходном порядке."""
+        window: pd.DataFrame = self.transactions.iloc[self.rows(*self.day_bounds(start_day, end_day))]
+        return window
+
+    def window_totals(
+        self, starts: Union[Sequence, np.ndarray], ends: Union[Sequence, np.ndarray], column: str = "Сумма операции"
+    ) -> pd.DataFrame:
+        """
+        Количество операций и сумма столбца для множества окон [start, end] сразу: границы окон находятся
+        векторным бинарным поиском, суммы — разностью накопленных сумм. Каждое окно обрабатывается за O(log n).
+        :param starts: Начала окон включительно.
+        :param ends: Концы окон включительно.
+        :param column: Числовой столбец для суммирования (некорректные значения считаются нулём).
+        :return: DataFrame со столбцами start, end, count и 'column'.
+        """
+        start_values, end_values = _timestamps(starts), _timestamps(ends)
+        lo = np.searchsorted(self.timestamps, start_values, side="left")
+        hi = np.maximum(np.searchsorted(self.timestamps, end_values, side="right"), lo)
+        if column not in self._cumulative:
+            values = pd.to_numeric(self.transactions[column], errors="coerce").to_numpy(dtype="float64")
+            self._cumulative[column] = np.concatenate([[0.0], np.cumsum(np.nan_to_num(values[self.positions]))])
+        cumulative = self._cumulative[column]
+        return pd.DataFrame(
+            {"start": start_values, "end": end_values, "count": hi - lo, column: cumulative[hi] - cumulative[lo]}
+        )
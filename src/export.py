@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from src.cube import SpendingCube
+from src.lazy import is_dataframe, lazy_import
+from src.logger_config import add_logger
+from src.memory import DEFAULT_CHUNK_ROWS
+from src.metrics import track_stage
+from src.results import AggregateResult, FilterResult
+from src.serialization import format_timestamps, iter_json_array
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+else:
+    pd = lazy_import("pandas")
+
+# Настройка логирования
+logger = add_logger("export.log", "export")
+
+EXPORT_FORMATS = {".csv": "csv", ".json": "json", ".jsonl": "jsonl", ".parquet": "parquet"}
+
+ExportSource = Union["pd.DataFrame", FilterResult, AggregateResult, SpendingCube, List[Dict], Iterable["pd.DataFrame"]]
+
+
+def export_format(file_path: str, file_format: Optional[str] = None) -> str:
+    """
+    Определяет формат выгрузки: явно заданный или по расширению файла.
+    :param file_path: Путь до файла.
+    :param file_format: 'csv', 'json', 'jsonl' или 'parquet' (необязательно).
+    :return: Название формата.
+    """
+    detected = file_format or EXPORT_FORMATS.get(os.path.splitext(file_path)[1].lower())
+    if detected is None or detected not in EXPORT_FORMATS.values():
+        raise ValueError(f"Неизвестный формат выгрузки для '{file_path}'. Поддерживаются: csv, json, jsonl, parquet.")
+    return detected
+
+
+def _project(data: pd.DataFrame, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    """Оставляет только запрошенные столбцы в заданном порядке."""
+    if columns is None:
+        return data
+    missing = [column for column in columns if column not in data.columns]
+    if missing:
+        raise KeyError(f"Нет столбцов для выгрузки: {missing}.")
+    projected: pd.DataFrame = data[list(columns)]
+    return projected
+
+
+def _batches(length: int, chunk_size: int) -> Iterator[slice]:
+    """Границы частей по 'chunk_size' строк."""
+    for start in range(0, length, chunk_size):
+        yield slice(start, start + chunk_size)
+
+
+def _frame_chunks(data: pd.DataFrame, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Части DataFrame по 'chunk_size' строк; пустой DataFrame возвращается одной частью, чтобы записать заголовок."""
+    for batch in _batches(max(len(data), 1), chunk_size):
+        yield data.iloc[batch]
+
+
+def iter_export_chunks(
+    data: ExportSource, columns: Optional[Sequence[str]] = None, chunk_size: int = DEFAULT_CHUNK_ROWS
+) -> Iterator[pd.DataFrame]:
+    """
+    Разбивает результат на части для выгрузки. Столбцы отбираются до формирования частей,
+    поэтому незапрошенные поля не копируются; даты приводятся к строкам в каждой части.
+    :param data: DataFrame, результат фильтрации (FilterResult), агрегат (AggregateResult), куб трат (SpendingCube),
+                 список словарей или итератор по частям DataFrame (например, 'utils.iter_transaction_chunks').
+    :param columns: Столбцы для выгрузки (по умолчанию — все).
+    :param chunk_size: Количество строк в одной части.
+    :return: Итератор по частям DataFrame.
+    """
+    if isinstance(data, SpendingCube):
+        cells = _project(data.cells, columns)
+        frames = _frame_chunks(
+            cells.assign(month=cells["month"].astype(str)) if "month" in cells else cells, chunk_size
+        )
+    elif isinstance(data, AggregateResult):
+        frames = _frame_chunks(
+            _project(data.to_series().rename_axis("key").reset_index(name="value"), columns), chunk_size
+        )
+    elif isinstance(data, FilterResult) and is_dataframe(data.source):
+        source = _project(data.source, columns)
+        frames = (source.iloc[data.row_ids[batch]] for batch in _batches(max(len(data), 1), chunk_size))
+    elif isinstance(data, FilterResult):
+        frames = (
+            _project(pd.DataFrame([data.source[i] for i in data.row_ids[batch]]), columns)
+            for batch in _batches(len(data), chunk_size)
+        )
+    elif is_dataframe(data):
+        frames = _frame_chunks(_project(data, columns), chunk_size)
+    elif isinstance(data, list):
+        frames = (_project(pd.DataFrame(data[batch]), columns) for batch in _batches(len(data), chunk_size))
+    else:
+        frames = (_project(frame, columns) for frame in data)
+
+    for frame in frames:
+        yield format_timestamps(frame)
+
+
+def _write_csv(chunks: Iterable[pd.DataFrame], file_path: str) -> int:
+    rows = 0
+    with open(file_path, "w", encoding="utf-8", newline="") as file:
+        for number, chunk in enumerate(chunks):
+            chunk.to_csv(file, index=False, header=number == 0)
+            rows += len(chunk)
+    return rows
+
+
+def _write_json(chunks: Iterable[pd.DataFrame], file_path: str) -> int:
+    """Записывает части одним JSON-массивом с отступами, не собирая его целиком в памяти."""
+    rows = 0
+
+    def records() -> Iterator[Dict]:
+        nonlocal rows
+        for chunk in chunks:
+            rows += len(chunk)
+            yield from chunk.to_dict(orient="records")
+
+    with open(file_path, "w", encoding="utf-8") as file:
+        for fragment in iter_json_array(records()):
+            file.write(fragment)
+    return rows
+
+
+def _write_jsonl(chunks: Iterable[pd.DataFrame], file_path: str) -> int:
+    rows = 0
+    with open(file_path, "w", encoding="utf-8") as file:
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            text = chunk.to_json(orient="records", lines=True, force_ascii=False) or ""
+            file.write(text if text.endswith("\n") else text + "\n")
+            rows += len(chunk)
+    return rows
+
+
+def _conform(table: "pa.Table", schema: "pa.Schema") -> "pa.Table":
+    """Приводит таблицу к схеме: недостающие столбцы заполняются пропусками, типы приводятся к типам схемы."""
+    import pyarrow as pa
+
+    columns = [
+        (
+            table.column(field.name).cast(field.type)
+            if field.name in table.column_names
+            else pa.nulls(len(table), field.type)
+        )
+        for field in schema
+    ]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def _write_parquet(
+    chunks: Iterable[pd.DataFrame], file_path: str, dictionary_columns: Optional[Sequence[str]] = None
+) -> int:
+    """
+    Записывает части в один файл Parquet по группам строк. Строковые столбцы (или 'dictionary_columns')
+    кодируются словарём: повторяющиеся категории, описания и номера карт хранятся один раз.
+    Схема файла объединяет схемы всех частей ('pa.unify_schemas'): столбец, пустой в первых частях
+    или сменивший тип (например, целые -> дробные), получает общий тип. Если очередная часть расширяет схему,
+    уже записанные группы строк переписываются по одной в файл с новой схемой.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Для выгрузки в Parquet нужен пакет pyarrow (poetry install -E parquet).") from e
+
+    def open_writer(schema: pa.Schema) -> pq.ParquetWriter:
+        if dictionary_columns is None:
+            encoded = [field.name for field in schema if pa.types.is_string(field.type)]
+        else:
+            encoded = list(dictionary_columns)
+        return pq.ParquetWriter(file_path, schema, use_dictionary=encoded)
+
+    rows = 0
+    schema: Optional[pa.Schema] = None
+    writer: Optional[pq.ParquetWriter] = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None or schema is None:
+                schema = table.schema
+                writer = open_writer(schema)
+            else:
+                unified = pa.unify_schemas([schema, table.schema], promote_options="permissive")
+                if not unified.equals(schema):
+                    # Метаданные pandas первой части не описывают объединённую схему
+                    schema = unified.remove_metadata()
+                    writer.close()
+                    partial_path = f"{file_path}.partial"
+                    os.replace(file_path, partial_path)
+                    writer = open_writer(schema)
+                    written = pq.ParquetFile(partial_path)
+                    for group in range(written.num_row_groups):
+                        writer.write_table(_conform(written.read_row_group(group), schema))
+                    written.close()
+                    os.remove(partial_path)
+                    logger.info("Схема Parquet расширена, переписано групп строк: %s.", written.num_row_groups)
+                table = _conform(table, schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def export_result(
+    data: ExportSource,
+    file_path: str,
+    file_format: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+    chunk_size: int = DEFAULT_CHUNK_ROWS,
+    dictionary_columns: Optional[Sequence[str]] = None,
+) -> int:
+    """
+    Выгружает результат отчёта, поиска или куб трат в CSV, JSON, JSON Lines или Parquet по частям,
+    не формируя весь ответ в памяти.
+    :param data: Результат для выгрузки (см. 'iter_export_chunks').
+    :param file_path: Путь до файла.
+    :param file_format: 'csv', 'json', 'jsonl' или 'parquet' (по умолчанию — по расширению файла).
+    :param columns: Столбцы для выгрузки (по умолчанию — все).
+    :param chunk_size: Количество строк в одной части (для Parquet — в одной группе строк).
+    :param dictionary_columns: Столбцы Parquet, кодируемые словарём (по умолчанию — все строковые).
+    :return: Количество записанных строк.
+    """
+    file_format = export_format(file_path, file_format)
+    os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+    with track_stage(f"export.{file_format}") as stage:
+        chunks = iter_export_chunks(data, columns, chunk_size)
+        if file_format == "csv":
+            rows = _write_csv(chunks, file_path)
+        elif file_format == "json":
+            rows = _write_json(chunks, file_path)
+        elif file_format == "jsonl":
+            rows = _write_jsonl(chunks, file_path)
+        else:
+            rows = _write_parquet(chunks, file_path, dictionary_columns)
+        stage["rows"] = rows
+    logger.info("Выгружено %s строк в '%s' (%s).", rows, file_path, file_format)
+    return rows
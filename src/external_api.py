@@ -1,29 +1,50 @@
+import asyncio
+import importlib.util
 import os
-from typing import Dict, List
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
 
-import requests
 from dotenv import load_dotenv
 
+from src.lazy import lazy_import
 from src.logger_config import add_logger
+from src.metrics import timed
+
+if TYPE_CHECKING:
+    import aiohttp
+    import requests
+else:
+    requests = lazy_import("requests")
+    # Необязательная зависимость для асинхронных запросов (poetry install -E async)
+    aiohttp = lazy_import("aiohttp")
+AIOHTTP_AVAILABLE = importlib.util.find_spec("aiohttp") is not None
 
 # Загрузка переменных окружения
 load_dotenv()
 API_KEY_CURRENCY = os.getenv("API_KEY_CURRENCY")
 URL_CURRENCY = "https://api.apilayer.com/exchangerates_data/convert"
+URL_CURRENCY_TIMESERIES = "https://api.apilayer.com/exchangerates_data/timeseries"
+MAX_TIMESERIES_DAYS = 365
 API_KEY_STOCK = os.getenv("API_KEY_STOCK")
 URL_STOCK = "http://api.marketstack.com/v1/eod/latest"
+# Максимальное количество одновременных соединений в асинхронных функциях
+HTTP_CONCURRENCY = 5
+# Время ожидания ответа API в секундах
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
 
 # Настройка логирования
 logger = add_logger("e_api.log", "e_api")
 
 
+@timed()
 def currency_exchanger(currencies_list: List) -> List[Dict]:
     """
     Функция для получения курса валют к рублю.
     :param currencies_list: Список кодов валют.
     :return: Список словарей с данными о курсе валют.
     """
-    logger.info(f"Вызов функции 'currency_exchanger' с параметром '{currencies_list}'.")
+    logger.info("Вызов функции 'currency_exchanger' с параметром '%s'.", currencies_list)
 
     if not API_KEY_CURRENCY:
         logger.error("API_KEY_CURRENCY не задан.")
@@ -36,38 +57,93 @@ def currency_exchanger(currencies_list: List) -> List[Dict]:
         headers = {"apikey": API_KEY_CURRENCY}
 
         try:
-            response = requests.get(URL_CURRENCY, headers=headers, params=payload)
+            response = requests.get(URL_CURRENCY, headers=headers, params=payload, timeout=HTTP_TIMEOUT)
             response.raise_for_status()
             data = response.json()
 
             if "result" in data:
                 rate = round(data["result"], 2)
                 currencies_rates.append({"currency": currency, "rate": rate})
-                logger.info(f"Курс '{currency}' -> RUB: {rate}.")
+                logger.info("Курс '%s' -> RUB: %s.", currency, rate)
             else:
-                logger.warning(f"Ключ 'result' отсутствует в ответе API для {currency}.")
+                logger.warning("Ключ 'result' отсутствует в ответе API для %s.", currency)
         except requests.exceptions.RequestException as e:
-            logger.error(f"Ошибка при запросе курса {currency}: {e}.", exc_info=True)
+            logger.error("Ошибка при запросе курса %s: %s.", currency, e, exc_info=True)
             return []
         except KeyError as e:
-            logger.error(f"Ошибка обработки ответа API для {currency}: {e}.", exc_info=True)
+            logger.error("Ошибка обработки ответа API для %s: %s.", currency, e, exc_info=True)
             return []
 
     if not currencies_rates:
         logger.warning("Не удалось получить ни одного курса валют.")
         return []
 
-    logger.info(f"Количество валют о которых получена информация: {len(currencies_rates)}.")
+    logger.info("Количество валют о которых получена информация: %s.", len(currencies_rates))
     return currencies_rates
 
 
+@timed()
+def currency_timeseries(currencies_list: List, start_date: date, end_date: date) -> Dict[str, Dict[str, float]]:
+    """
+    Функция для получения исторических курсов валют к рублю за период.
+    Все валюты запрашиваются одним запросом на каждые 365 дней периода (ограничение API).
+    :param currencies_list: Список кодов валют.
+    :param start_date: Первая дата периода.
+    :param end_date: Последняя дата периода (включительно).
+    :return: Словарь {валюта: {дата 'YYYY-MM-DD': курс к рублю}}. При ошибке возвращает пустой словарь.
+    """
+    logger.info(
+        "Вызов функции 'currency_timeseries' с параметрами: %s, %s - %s.", currencies_list, start_date, end_date
+    )
+
+    if not API_KEY_CURRENCY:
+        logger.error("API_KEY_CURRENCY не задан.")
+        return {}
+
+    rates: Dict[str, Dict[str, float]] = {currency: {} for currency in currencies_list}
+    headers = {"apikey": API_KEY_CURRENCY}
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=MAX_TIMESERIES_DAYS - 1), end_date)
+        payload = {
+            "start_date": chunk_start.isoformat(),
+            "end_date": chunk_end.isoformat(),
+            "base": "RUB",
+            "symbols": ",".join(currencies_list),
+        }
+
+        try:
+            response = requests.get(URL_CURRENCY_TIMESERIES, headers=headers, params=payload, timeout=HTTP_TIMEOUT)
+            response.raise_for_status()
+            data = response.json()
+
+            # Курсы приходят в единицах валюты за рубль, поэтому курс к рублю — обратная величина
+            for day, day_rates in data["rates"].items():
+                for currency, rate in day_rates.items():
+                    if currency in rates and rate:
+                        rates[currency][day] = 1 / rate
+            logger.info("Получены курсы за период %s - %s.", chunk_start, chunk_end)
+        except requests.exceptions.RequestException as e:
+            logger.error("Ошибка при запросе курсов за период %s - %s: %s.", chunk_start, chunk_end, e, exc_info=True)
+            return {}
+        except (KeyError, AttributeError, TypeError) as e:
+            logger.error("Ошибка в структуре ответа API за %s - %s: %s.", chunk_start, chunk_end, e, exc_info=True)
+            return {}
+
+        chunk_start = chunk_end + timedelta(days=1)
+
+    logger.info("Количество дней с курсами по валютам: %s.", {currency: len(days) for currency, days in rates.items()})
+    return rates
+
+
+@timed()
 def stock_exchanger(stocks_list: List) -> List[Dict]:
     """
     Функция для получения цен на акции.
     :param stocks_list: Список тикеров акций.
     :return: Список словарей с ценами акций в долларах.
     """
-    logger.info(f"Вызов функции 'stock_exchanger' с параметром '{stocks_list}'.")
+    logger.info("Вызов функции 'stock_exchanger' с параметром '%s'.", stocks_list)
 
     if not API_KEY_STOCK:
         logger.error("API_KEY_STOCK не задан.")
@@ -77,26 +153,155 @@ def stock_exchanger(stocks_list: List) -> List[Dict]:
     for stock in stocks_list:
         params = {"access_key": API_KEY_STOCK, "symbols": stock}
         try:
-            response = requests.get(url=URL_STOCK, params=params)
+            response = requests.get(url=URL_STOCK, params=params, timeout=HTTP_TIMEOUT)
             response.raise_for_status()
             data = response.json()
 
             if "data" not in data or not isinstance(data["data"], list) or not data["data"]:
-                logger.warning(f"Данные по акции '{stock}' не найдены.")
+                logger.warning("Данные по акции '%s' не найдены.", stock)
                 continue
 
             rate = data["data"][0]["close"]
             stocks_rates.append({"stock": stock, "price": rate})
-            logger.info(f"Курс '{stock}' -> USD: {rate}.")
+            logger.info("Курс '%s' -> USD: %s.", stock, rate)
 
         except requests.exceptions.RequestException as e:
-            logger.error(f"Ошибка при запросе API для '{stock}': {e}.", exc_info=True)
+            logger.error("Ошибка при запросе API для '%s': %s.", stock, e, exc_info=True)
         except (KeyError, IndexError) as e:
-            logger.error(f"Ошибка в структуре ответа API для '{stock}': {e}.", exc_info=True)
+            logger.error("Ошибка в структуре ответа API для '%s': %s.", stock, e, exc_info=True)
+
+    if not stocks_rates:
+        logger.warning("Не удалось получить ни одного курса акций.")
+        return []
+
+    logger.info("Количество акций о которых получена информация: %s.", len(stocks_rates))
+    return stocks_rates
+
+
+@asynccontextmanager
+async def _client_session(session: Optional["aiohttp.ClientSession"]) -> AsyncIterator["aiohttp.ClientSession"]:
+    """Использует переданную сессию или открывает новую с ограничением количества соединений."""
+    if session is not None:
+        yield session
+        return
+    connector = aiohttp.TCPConnector(limit=HTTP_CONCURRENCY)
+    timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as new_session:
+        yield new_session
+
+
+async def _get_json(session: "aiohttp.ClientSession", url: str, **kwargs: Any) -> Dict:
+    """Выполняет GET-запрос и возвращает JSON из ответа."""
+    async with session.get(url, **kwargs) as response:
+        response.raise_for_status()
+        data: Dict = await response.json()
+        return data
+
+
+@timed()
+async def currency_exchanger_async(
+    currencies_list: List, session: Optional["aiohttp.ClientSession"] = None
+) -> List[Dict]:
+    """
+    Асинхронный вариант 'currency_exchanger': курсы всех валют запрашиваются одновременно.
+    Если пакет aiohttp не установлен, синхронная функция выполняется в отдельном потоке.
+    :param currencies_list: Список кодов валют.
+    :param session: Открытая сессия aiohttp (по умолчанию создаётся новая).
+    :return: Список словарей с данными о курсе валют.
+    """
+    logger.info("Вызов функции 'currency_exchanger_async' с параметром '%s'.", currencies_list)
+
+    if not AIOHTTP_AVAILABLE:
+        logger.info("Пакет aiohttp не установлен, запросы выполняются в отдельном потоке.")
+        return await asyncio.to_thread(currency_exchanger, currencies_list)
+
+    if not API_KEY_CURRENCY:
+        logger.error("API_KEY_CURRENCY не задан.")
+        return []
+
+    headers = {"apikey": API_KEY_CURRENCY}
+    async with _client_session(session) as client:
+        responses = await asyncio.gather(
+            *(
+                _get_json(client, URL_CURRENCY, headers=headers, params={"to": "RUB", "from": currency, "amount": 1})
+                for currency in currencies_list
+            ),
+            return_exceptions=True,
+        )
+
+    currencies_rates = []
+    for currency, data in zip(currencies_list, responses):
+        if isinstance(data, (aiohttp.ClientError, asyncio.TimeoutError)):
+            logger.error("Ошибка при запросе курса %s: %s.", currency, data)
+            return []
+        if isinstance(data, BaseException):
+            raise data
+
+        if "result" in data:
+            rate = round(data["result"], 2)
+            currencies_rates.append({"currency": currency, "rate": rate})
+            logger.info("Курс '%s' -> RUB: %s.", currency, rate)
+        else:
+            logger.warning("Ключ 'result' отсутствует в ответе API для %s.", currency)
+
+    if not currencies_rates:
+        logger.warning("Не удалось получить ни одного курса валют.")
+        return []
+
+    logger.info("Количество валют о которых получена информация: %s.", len(currencies_rates))
+    return currencies_rates
+
+
+@timed()
+async def stock_exchanger_async(stocks_list: List, session: Optional["aiohttp.ClientSession"] = None) -> List[Dict]:
+    """
+    Асинхронный вариант 'stock_exchanger': цены всех акций запрашиваются одновременно.
+    Если пакет aiohttp не установлен, синхронная функция выполняется в отдельном потоке.
+    :param stocks_list: Список тикеров акций.
+    :param session: Открытая сессия aiohttp (по умолчанию создаётся новая).
+    :return: Список словарей с ценами акций в долларах.
+    """
+    logger.info("Вызов функции 'stock_exchanger_async' с параметром '%s'.", stocks_list)
+
+    if not AIOHTTP_AVAILABLE:
+        logger.info("Пакет aiohttp не установлен, запросы выполняются в отдельном потоке.")
+        return await asyncio.to_thread(stock_exchanger, stocks_list)
+
+    if not API_KEY_STOCK:
+        logger.error("API_KEY_STOCK не задан.")
+        return []
+
+    async with _client_session(session) as client:
+        responses = await asyncio.gather(
+            *(
+                _get_json(client, URL_STOCK, params={"access_key": API_KEY_STOCK, "symbols": stock})
+                for stock in stocks_list
+            ),
+            return_exceptions=True,
+        )
+
+    stocks_rates = []
+    for stock, data in zip(stocks_list, responses):
+        if isinstance(data, (aiohttp.ClientError, asyncio.TimeoutError)):
+            logger.error("Ошибка при запросе API для '%s': %s.", stock, data)
+            continue
+        if isinstance(data, BaseException):
+            raise data
+
+        if "data" not in data or not isinstance(data["data"], list) or not data["data"]:
+            logger.warning("Данные по акции '%s' не найдены.", stock)
+            continue
+        try:
+            rate = data["data"][0]["close"]
+        except (KeyError, IndexError, TypeError) as e:
+            logger.error("Ошибка в структуре ответа API для '%s': %s.", stock, e, exc_info=True)
+            continue
+        stocks_rates.append({"stock": stock, "price": rate})
+        logger.info("Курс '%s' -> USD: %s.", stock, rate)
 
     if not stocks_rates:
         logger.warning("Не удалось получить ни одного курса акций.")
         return []
 
-    logger.info(f"Количество акций о которых получена информация: {len(stocks_rates)}.")
+    logger.info("Количество акций о которых получена информация: %s.", len(stocks_rates))
     return stocks_rates
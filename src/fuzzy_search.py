@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import re
+from collections import Counter, defaultdict
+from typing import TYPE_CHECKING, Dict, List, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from src.lazy import is_dataframe, lazy_import
+from src.logger_config import add_logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+# Настройка логирования
+logger = add_logger("fuzzy_search.log", "fuzzy_search")
+
+SEARCH_FIELDS = ("Описание", "Категория")
+# Кириллица переводится в латиницу, чтобы "озон" и "Ozon.ru" давали одинаковые триграммы
+# fmt: off
+TRANSLITERATION = str.maketrans(
+    {
+        "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh", "з": "z", "и": "i",
+        "й": "i", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t",
+        "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "shch", "ъ": "", "ы": "y", "ь": "",
+        "э": "e", "ю": "yu", "я": "ya", "x": "ks",
+    }
+)
+# fmt: on
+NON_WORD_PATTERN = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    """Приводит строку к нижнему регистру и латинице, знаки препинания заменяет пробелами."""
+    return NON_WORD_PATTERN.sub(" ", str(text).lower().translate(TRANSLITERATION)).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    """Триграммы нормализованной строки; каждое слово дополняется пробелами, как в pg_trgm."""
+    result: Set[str] = set()
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        result.update(map("".join, zip(padded, padded[1:], padded[2:])))
+    return result
+
+
+class TrigramIndex:
+    """
+    Инвертированный индекс триграмм по набору уникальных строк.
+    Поиск просматривает только списки строк, содержащих триграммы запроса, поэтому время ответа
+    зависит от количества уникальных строк, а не от количества транзакций.
+    """
+
+    def __init__(self) -> None:
+        self.strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._sizes: List[int] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def add(self, text: str) -> int:
+        """
+        Добавляет строку в индекс (повторное добавление не создаёт дубликатов).
+        :param text: Строка.
+        :return: Номер строки в индексе.
+        """
+        string_id = self._ids.get(text)
+        if string_id is None:
+            string_id = self._ids[text] = len(self.strings)
+            self.strings.append(text)
+            string_trigrams = trigrams(text)
+            self._sizes.append(len(string_trigrams))
+            for trigram in string_trigrams:
+                self._postings[trigram].append(string_id)
+        return string_id
+
+    def search(self, query: str, threshold: float = 0.4) -> List[Tuple[int, float]]:
+        """
+        Находит строки, похожие на запрос.
+        Сходство — доля триграмм запроса, найденных в строке (как word_similarity в pg_trgm);
+        при равном сходстве выше оказываются строки, ближе к запросу по длине (мера Жаккара).
+        :param query: Строка запроса.
+        :param threshold: Минимальное сходство от 0 до 1.
+        :return: Список (номер строки, сходство), отсортированный по убыванию сходства.
+        """
+        query_trigrams = trigrams(query)
+        if not query_trigrams:
+            return []
+
+        matches: Counter[int] = Counter()
+        for trigram in query_trigrams:
+            matches.update(self._postings.get(trigram, ()))
+
+        ranked = []
+        for string_id, common in matches.items():
+            score = common / len(query_trigrams)
+            if score >= threshold:
+                jaccard = common / (len(query_trigrams) + self._sizes[string_id] - common)
+                ranked.append((score, jaccard, -string_id))
+        ranked.sort(reverse=True)
+        return [(-negative_id, round(score, 4)) for score, _, negative_id in ranked]
+
+
+class TransactionSearchIndex:
+    """
+    Нечёткий поиск транзакций по описанию и категории.
+    В индекс попадают только уникальные значения полей, для каждого значения хранятся номера строк с ним.
+    Индекс строится один раз и переиспользуется для любых запросов к тем же транзакциям.
+    """
+
+    def __init__(self, transactions: Union[List[Dict], pd.DataFrame], fields: Sequence[str] = SEARCH_FIELDS) -> None:
+        """
+        :param transactions: Список словарей или DataFrame с данными о транзакциях.
+        :param fields: Поля, по которым выполняется поиск.
+        """
+        self.index = TrigramIndex()
+        string_parts: List[np.ndarray] = []
+        row_parts: List[np.ndarray] = []
+        for field in fields:
+            if is_dataframe(transactions):
+                if field not in transactions.columns:
+                    continue
+                codes, uniques = pd.factorize(transactions[field])
+                ids = np.array([self.index.add(str(value)) for value in uniques] + [-1])[codes]
+            else:
+                ids = np.array(
+                    [
+                        -1 if transaction.get(field) is None else self.index.add(str(transaction[field]))
+                        for transaction in transactions
+                    ],
+                    dtype=np.int64,
+                )
+            present = np.flatnonzero(ids >= 0)
+            string_parts.append(ids[present])
+            row_parts.append(present)
+
+        # Номера строк транзакций, сгруппированные по номеру строки индекса
+        string_ids = np.concatenate(string_parts) if string_parts else np.array([], dtype=np.int64)
+        row_ids = np.concatenate(row_parts) if row_parts else np.array([], dtype=np.int64)
+        order = np.lexsort((row_ids, string_ids))
+        string_ids, row_ids = string_ids[order], row_ids[order]
+        # Одно и то же значение в разных полях одной транзакции учитывается один раз
+        unique = np.r_[True, (string_ids[1:] != string_ids[:-1]) | (row_ids[1:] != row_ids[:-1])]
+        self._rows = row_ids[unique]
+        self._bounds = np.searchsorted(string_ids[unique], np.arange(len(self.index) + 1))
+        logger.info(
+            "Построен индекс поиска: транзакций - %s, уникальных значений - %s.", len(transactions), len(self.index)
+        )
+
+    def rows(self, string_id: int) -> np.ndarray:
+        """Номера транзакций, в которых встречается строка индекса."""
+        start, end = self._bounds[string_id], self._bounds[string_id + 1]
+        return self._rows[start:end]
+
+    def search(self, query: str, k: int = 10, threshold: float = 0.4) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Находит k транзакций, наиболее похожих на запрос по описанию или категории.
+        :param query: Строка запроса.
+        :param k: Максимальное количество транзакций.
+        :param threshold: Минимальное сходство от 0 до 1.
+        :return: Номера транзакций и их сходство с запросом, по убыванию сходства.
+        """
+        found: Dict[int, float] = {}
+        for string_id, score in self.index.search(query, threshold):
+            # Среди первых k + len(found) строк не больше len(found) уже найденных, поэтому новых хватит на топ
+            for row in self.rows(string_id)[: k + len(found)].tolist():
+                found.setdefault(row, score)
+                if len(found) >= k:
+                    break
+            if len(found) >= k:
+                break
+        return np.array(list(found), dtype=np.int64), np.array(list(found.values()), dtype="float64")
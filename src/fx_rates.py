@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.dates import operation_days
+from src.external_api import currency_timeseries
+from src.lazy import lazy_import
+from src.logger_config import add_logger
+from src.metrics import record_cache, timed
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+# Настройка логирования
+logger = add_logger("fx_rates.log", "fx_rates")
+
+path_project = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+BASE_CURRENCY = "RUB"
+DEFAULT_CACHE_PATH = os.path.join(path_project, "data", "fx_rates.json")
+
+# Функция загрузки курсов: (валюты, первая дата, последняя дата) -> {валюта: {дата 'YYYY-MM-DD': курс к рублю}}
+Fetcher = Callable[[List[str], date, date], Dict[str, Dict[str, float]]]
+
+
+class HistoricalRateStore:
+    """
+    Хранилище исторических курсов валют к рублю.
+    Курсы загружаются временными рядами за весь нужный период (см. 'currency_timeseries') и сохраняются
+    в локальный JSON-кэш. Для каждой валюты хранится непрерывный загруженный период, поэтому повторные
+    запросы догружают только недостающие даты.
+    """
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, fetch: Optional[Fetcher] = None) -> None:
+        """
+        :param cache_path: Путь до файла кэша курсов.
+        :param fetch: Функция загрузки курсов (по умолчанию 'currency_timeseries').
+        """
+        self.cache_path = cache_path
+        self.fetch = fetch or currency_timeseries
+        self._series: Dict[str, Dict] = self._load()
+        self._table: Optional[pd.DataFrame] = None
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.cache_path, encoding="utf-8") as file:
+                series: Dict[str, Dict] = json.load(file)
+            logger.info("Загружен кэш курсов '%s'. Валюты: %s.", self.cache_path, list(series))
+            return series
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning("Не удалось прочитать кэш курсов '%s': %s.", self.cache_path, e)
+            return {}
+
+    def _save(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            with open(self.cache_path, "w", encoding="utf-8") as file:
+                json.dump(self._series, file, ensure_ascii=False)
+        except OSError as e:
+            logger.error("Не удалось сохранить кэш курсов '%s': %s.", self.cache_path, e, exc_info=True)
+
+    def coverage(self, currency: str) -> Optional[Tuple[date, date]]:
+        """
+        :param currency: Код валюты.
+        :return: Загруженный период (первая и последняя дата) или None, если курсов валюты нет в кэше.
+        """
+        entry = self._series.get(currency)
+        if entry is None:
+            return None
+        return date.fromisoformat(entry["start"]), date.fromisoformat(entry["end"])
+
+    def _gaps(self, currency: str, start: date, end: date) -> List[Tuple[date, date]]:
+        """Недостающие периоды; загруженный период остаётся непрерывным."""
+        covered = self.coverage(currency)
+        if covered is None:
+            return [(start, end)]
+        gaps = []
+        if start < covered[0]:
+            gaps.append((start, covered[0] - timedelta(days=1)))
+        if end > covered[1]:
+            gaps.append((covered[1] + timedelta(days=1), end))
+        return gaps
+
+    def prefetch(self, currencies: Iterable[str], start: date, end: date) -> int:
+        """
+        Загружает курсы за период для валют, которых ещё нет в кэше.
+        Валюты с одинаковым недостающим периодом загружаются одним вызовом.
+        :param currencies: Коды валют (рубль пропускается).
+        :param start: Первая дата периода.
+        :param end: Последняя дата периода (не позже сегодняшнего дня).
+        :return: Количество вызовов функции загрузки.
+        """
+        end = min(end, date.today())
+        missing: Dict[Tuple[date, date], List[str]] = {}
+        for currency in sorted(set(currencies) - {BASE_CURRENCY}):
+            gaps = self._gaps(currency, start, end) if start <= end else []
+            record_cache("fx_rates", not gaps)
+            for gap in gaps:
+                missing.setdefault(gap, []).append(currency)
+
+        for (gap_start, gap_end), group in missing.items():
+            fetched = self.fetch(group, gap_start, gap_end)
+            if not fetched:
+                logger.warning("Не удалось загрузить курсы %s за период %s - %s.", group, gap_start, gap_end)
+                continue
+            for currency in group:
+                entry = self._series.setdefault(
+                    currency, {"start": gap_start.isoformat(), "end": gap_end.isoformat(), "rates": {}}
+                )
+                entry["rates"].update(fetched.get(currency, {}))
+                # Даты в формате ISO сравниваются как строки
+                entry["start"] = min(entry["start"], gap_start.isoformat())
+                entry["end"] = max(entry["end"], gap_end.isoformat())
+
+        if missing:
+            self._table = None
+            self._save()
+        logger.info("Загрузка курсов за %s - %s: выполнено запросов - %s.", start, end, len(missing))
+        return len(missing)
+
+    def table(self) -> pd.DataFrame:
+        """
+        :return: DataFrame со столбцами currency, date, rate, отсортированный по дате.
+        """
+        if self._table is None:
+            frames = [
+                pd.DataFrame(
+                    {"currency": currency, "date": list(entry["rates"]), "rate": list(entry["rates"].values())}
+                )
+                for currency, entry in self._series.items()
+            ]
+            table = (
+                pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["currency", "date", "rate"])
+            )
+            table["date"] = pd.to_datetime(table["date"], format="%Y-%m-%d")
+            table["rate"] = table["rate"].astype("float64")
+            self._table = table.sort_values("date", kind="stable", ignore_index=True)
+        return self._table
+
+    def rates(self, currencies: pd.Series, days: pd.Series) -> np.ndarray:
+        """
+        Курсы к рублю для каждой строки одним as-of соединением по (валюта, дата):
+        берётся последний известный курс не позже даты операции.
+        :param currencies: Валюта операции.
+        :param days: Дата операции (datetime64).
+        :return: Массив курсов; для рубля — 1, при отсутствии курса — NaN.
+        """
+        currencies = pd.Series(currencies).reset_index(drop=True)
+        days = pd.Series(days).reset_index(drop=True)
+        result = np.ones(len(currencies))
+
+        foreign = (currencies != BASE_CURRENCY).to_numpy()
+        result[foreign] = np.nan
+        foreign &= days.notna().to_numpy()
+        if foreign.any():
+            left = pd.DataFrame(
+                {
+                    "currency": currencies[foreign].to_numpy(),
+                    "date": days[foreign].to_numpy(),
+                    "position": np.flatnonzero(foreign),
+                }
+            ).sort_values("date", kind="stable")
+            joined = pd.merge_asof(left, self.table(), on="date", by="currency", direction="backward")
+            result[joined["position"].to_numpy()] = joined["rate"].to_numpy()
+        return result
+
+
+@timed()
+def to_rub(
+    transactions: pd.DataFrame,
+    store: Optional[HistoricalRateStore] = None,
+    amount_columns: Sequence[str] = ("Сумма операции",),
+    currency_column: str = "Валюта операции",
+) -> pd.DataFrame:
+    """
+    Пересчитывает суммы транзакций в рубли по курсу на дату операции.
+    Курсы всех валют за весь период данных загружаются заранее несколькими запросами, пересчёт выполняется векторно.
+    :param transactions: DataFrame с данными о транзакциях.
+    :param store: Хранилище курсов (по умолчанию — с кэшем в 'data/fx_rates.json').
+    :param amount_columns: Столбцы с суммами в валюте операции.
+    :param currency_column: Столбец с валютой операции.
+    :return: Копия DataFrame с суммами в рублях и валютой 'RUB'. Суммы без известного курса становятся NaN.
+             В случае ошибки возвращает пустой DataFrame.
+    """
+    logger.info("Вызов функции 'to_rub'. Количество полученных транзакций: %s.", len(transactions))
+    try:
+        store = store or HistoricalRateStore()
+        result = transactions.copy()
+        if currency_column not in result.columns:
+            logger.info("Столбец '%s' отсутствует, суммы считаются рублёвыми.", currency_column)
+            return result
+
+        currencies = result[currency_column].fillna(BASE_CURRENCY)
+        days = operation_days(result["Дата операции"])
+        foreign = (currencies != BASE_CURRENCY) & days.notna()
+        if foreign.any():
+            foreign_days = days[foreign]
+            store.prefetch(currencies[foreign].unique(), foreign_days.min().date(), foreign_days.max().date())
+
+        rates = store.rates(currencies, days)
+        for column in amount_columns:
+            result[column] = pd.to_numeric(result[column], errors="coerce").to_numpy() * rates
+        result[currency_column] = BASE_CURRENCY
+
+        missing = int(np.isnan(rates).sum())
+        if missing:
+            logger.warning("Не найден курс для %s транзакций.", missing)
+        logger.info("Пересчитано в рубли транзакций в валюте: %s.", int(foreign.sum()))
+        return result
+
+    except Exception as e:
+        logger.error("Ошибка при пересчёте транзакций в рубли: %s.", e, exc_info=True)
+        return pd.DataFrame()
@@ -0,0 +1,42 @@
+import importlib
+import sys
+import types
+from typing import TYPE_CHECKING, Any, TypeGuard
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class LazyModule(types.ModuleType):
+    """
+    Модуль, который импортируется только при первом обращении к его атрибутам.
+    Позволяет не загружать pandas, numpy и requests при импорте проекта, если они не понадобятся.
+    """
+
+    def __getattr__(self, attribute: str) -> Any:
+        # Загруженный модуль запоминается, чтобы не обращаться к importlib при каждом обращении к атрибуту
+        module = self.__dict__.get("_module")
+        if module is None:
+            module = self.__dict__["_module"] = importlib.import_module(self.__name__)
+        return getattr(module, attribute)
+
+    def __repr__(self) -> str:
+        return f"<lazy module '{self.__name__}'>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Возвращает модуль, если он уже загружен, иначе — заглушку, импортирующую его при первом обращении.
+    :param name: Полное имя модуля, например 'pandas'.
+    :return: Модуль или LazyModule.
+    """
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def is_dataframe(obj: Any) -> "TypeGuard[pd.DataFrame]":
+    """
+    Проверяет, является ли объект DataFrame, не импортируя pandas.
+    Если pandas ещё не загружен, объект не может быть DataFrame.
+    """
+    pandas = sys.modules.get("pandas")
+    return pandas is not None and isinstance(obj, pandas.DataFrame)
@@ -1,32 +1,175 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+from io import TextIOWrapper
+from typing import Any, Dict, Optional, Set, TypedDict
+
+LOGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs")
+LOG_FORMAT = "%(asctime)s - %(filename)s - %(levelname)s: %(message)s"
+LOG_DATE_FORMAT = "%d-%m-%Y %H:%M:%S"
+
+
+class _LogSettings(TypedDict):
+    """Текущий режим логирования (см. 'configure_logging')."""
+
+    use_queue: bool
+    default_level: str
+    levels: Dict[str, str]
+    row_events_limit: int
+
+
+# Режим логирования задаётся переменными окружения или функцией 'configure_logging':
+# LOG_QUEUE=1 — запись в файлы в фоновом потоке через QueueHandler/QueueListener;
+# LOG_LEVEL=INFO — уровень по умолчанию; LOG_LEVELS="services=WARNING,utils=INFO" — уровни отдельных модулей;
+# LOG_ROW_EVENTS_LIMIT=10 — сколько построчных событий одного вызова записывать до перехода к сводке.
+_settings: _LogSettings = {
+    "use_queue": os.getenv("LOG_QUEUE", "").lower() in ("1", "true", "yes"),
+    "default_level": os.getenv("LOG_LEVEL", "DEBUG").upper(),
+    "levels": {
+        name.strip(): level.strip().upper()
+        for name, _, level in (item.partition("=") for item in os.getenv("LOG_LEVELS", "").split(","))
+        if name.strip() and level.strip()
+    },
+    "row_events_limit": int(os.getenv("LOG_ROW_EVENTS_LIMIT", "10")),
+}
+
+_logger_names: Set[str] = set()
+_file_handlers: Dict[str, logging.Handler] = {}
+_queue: Optional[queue.Queue] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _DeferredFileHandler(logging.FileHandler):
+    """Файловый обработчик, который создаёт папку и открывает файл только при записи первого сообщения."""
+
+    def __init__(self, filename: str) -> None:
+        super().__init__(filename, mode="w", encoding="UTF-8", delay=True)
+
+    def _open(self) -> TextIOWrapper:
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class _RoutingHandler(logging.Handler):
+    """Передаёт запись из очереди в файловый обработчик того модуля, которым она создана."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        handler = _file_handlers.get(record.name)
+        if handler is not None and record.levelno >= handler.level:
+            handler.handle(record)
+
+
+def _get_queue() -> queue.Queue:
+    """Возвращает общую очередь логов, запуская фоновый поток записи при первом обращении."""
+    global _queue, _listener
+    if _queue is None:
+        _queue = queue.Queue(-1)
+        _listener = logging.handlers.QueueListener(_queue, _RoutingHandler())
+        _listener.start()
+        atexit.register(shutdown_logging)
+    return _queue
+
+
+def _level_for(logger_name: str) -> str:
+    return _settings["levels"].get(logger_name, _settings["default_level"])
+
+
+def _attach_handler(logger: logging.Logger, file_handler: logging.Handler) -> None:
+    """Подключает к логгеру файловый обработчик напрямую или через очередь."""
+    for handler in list(logger.handlers):
+        if handler is file_handler or isinstance(handler, logging.handlers.QueueHandler):
+            logger.removeHandler(handler)
+
+    if _settings["use_queue"]:
+        logger.addHandler(logging.handlers.QueueHandler(_get_queue()))
+    else:
+        logger.addHandler(file_handler)
 
 
 def add_logger(log_filename: str, logger_name: str) -> logging.Logger:
     """
     Создаёт и настраивает логгер с записью в папке 'logs' в корне проекта.
+    Папка и файл создаются только при первой записи в лог, поэтому импорт модулей не обращается к диску.
     :param log_filename: Имя файла логов.
     :param logger_name: Название логгера.
     :return: Настроенный объект логгера.
     """
-    path_module = os.path.abspath(os.path.dirname(__file__))
-    path_project = os.path.dirname(path_module)
-
-    logs_dir = os.path.join(path_project, "logs")
-    os.makedirs(logs_dir, exist_ok=True)
-
-    log_file_path = os.path.join(logs_dir, log_filename)
-
     logger = logging.getLogger(logger_name)
-    logger.setLevel(logging.DEBUG)
+    logger.setLevel(_level_for(logger_name))
+    _logger_names.add(logger_name)
 
-    file_handler = logging.FileHandler(log_file_path, mode="w", encoding="UTF-8")
-    file_formatter = logging.Formatter(
-        "%(asctime)s - %(filename)s - %(levelname)s: %(message)s", datefmt="%d-%m-%Y %H:%M:%S"
-    )
+    file_handler = _DeferredFileHandler(os.path.join(LOGS_DIR, log_filename))
+    file_formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
     file_handler.setFormatter(file_formatter)
 
     if not logger.hasHandlers():
-        logger.addHandler(file_handler)
+        _file_handlers[logger_name] = file_handler
+        _attach_handler(logger, file_handler)
 
     return logger
+
+
+def configure_logging(
+    use_queue: Optional[bool] = None,
+    default_level: Optional[str] = None,
+    levels: Optional[Dict[str, str]] = None,
+    row_events_limit: Optional[int] = None,
+) -> None:
+    """
+    Меняет режим логирования для уже созданных и будущих логгеров проекта.
+    :param use_queue: True — запись в файлы в фоновом потоке, False — синхронная запись.
+    :param default_level: Уровень логирования по умолчанию (например, 'INFO').
+    :param levels: Уровни отдельных модулей, например {"services": "WARNING"}.
+    :param row_events_limit: Сколько построчных событий одного вызова записывать до перехода к сводке.
+    """
+    if default_level is not None:
+        _settings["default_level"] = default_level.upper()
+    if levels is not None:
+        _settings["levels"].update({name: level.upper() for name, level in levels.items()})
+    if row_events_limit is not None:
+        _settings["row_events_limit"] = row_events_limit
+
+    if use_queue is not None and use_queue != _settings["use_queue"]:
+        _settings["use_queue"] = use_queue
+        if not use_queue:
+            shutdown_logging()
+        for logger_name, file_handler in _file_handlers.items():
+            _attach_handler(logging.getLogger(logger_name), file_handler)
+
+    for logger_name in _logger_names:
+        logging.getLogger(logger_name).setLevel(_level_for(logger_name))
+
+
+def shutdown_logging() -> None:
+    """Останавливает фоновый поток записи, предварительно записав все накопленные сообщения."""
+    global _queue, _listener
+    if _listener is not None:
+        _listener.stop()
+    _queue, _listener = None, None
+
+
+class RowEventLog:
+    """
+    Построчный лог с ограничением: первые 'limit' событий записываются как обычно,
+    остальные только подсчитываются и попадают в итоговую сводку.
+    """
+
+    def __init__(self, logger: logging.Logger, level: int, limit: Optional[int] = None) -> None:
+        self.logger = logger
+        self.level = level
+        self.limit = _settings["row_events_limit"] if limit is None else limit
+        self.count = 0
+
+    def log(self, message: str, *args: Any, **kwargs: Any) -> None:
+        """Записывает событие, если лимит ещё не исчерпан."""
+        self.count += 1
+        if self.count <= self.limit and self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, message, *args, **kwargs)
+
+    def summary(self, message: str) -> None:
+        """Записывает сводку о пропущенных событиях. Сообщение получает их количество через '%s'."""
+        skipped = self.count - self.limit
+        if skipped > 0:
+            self.logger.log(self.level, message, skipped)
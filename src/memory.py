@@ -0,0 +1,82 @@
+import os
+from typing import Dict, Optional
+
+from src.logger_config import add_logger
+from src.metrics import metrics_summary
+
+# Настройка логирования
+logger = add_logger("memory.log", "memory")
+
+MEMORY_BUDGET_ENV = "MEMORY_BUDGET_MB"
+DEFAULT_CHUNK_ROWS = 50_000
+# Во сколько раз пик памяти при загрузке файла в DataFrame больше размера файла (замерено на data/operations.xlsx)
+EXPANSION_FACTORS = {".xlsx": 15, ".csv": 8}
+DEFAULT_EXPANSION_FACTOR = 15
+
+
+def memory_budget(user_settings: Optional[Dict] = None) -> Optional[int]:
+    """
+    Возвращает бюджет памяти на обработку одного файла транзакций.
+    :param user_settings: Пользовательские настройки с ключом "memory_budget_mb" (необязательно).
+    :return: Бюджет в байтах: из настроек, иначе из переменной окружения MEMORY_BUDGET_MB.
+             None, если бюджет не задан.
+    """
+    budget_mb = (user_settings or {}).get("memory_budget_mb") or os.getenv(MEMORY_BUDGET_ENV)
+    if not budget_mb:
+        return None
+    try:
+        return int(float(budget_mb) * 1024 * 1024)
+    except (TypeError, ValueError):
+        logger.error("Некорректный бюджет памяти '%s'. Бюджет не применяется.", budget_mb)
+        return None
+
+
+def estimate_memory(file_path: str) -> int:
+    """
+    Оценивает пик памяти при загрузке файла транзакций целиком по размеру файла.
+    :param file_path: Путь до файла 'XLSX' или 'CSV'.
+    :return: Оценка в байтах (0, если файл недоступен).
+    """
+    try:
+        size = os.path.getsize(file_path)
+    except OSError:
+        return 0
+    factor = EXPANSION_FACTORS.get(os.path.splitext(file_path)[1].lower(), DEFAULT_EXPANSION_FACTOR)
+    return size * factor
+
+
+def exceeds_budget(file_path: str, budget: Optional[int]) -> bool:
+    """
+    Проверяет, превышает ли оценка памяти на загрузку файла бюджет.
+    :param file_path: Путь до файла с транзакциями.
+    :param budget: Бюджет в байтах (None — без ограничения).
+    :return: True, если файл нужно обрабатывать по частям.
+    """
+    if budget is None:
+        return False
+    estimate = estimate_memory(file_path)
+    if estimate <= budget:
+        return False
+    logger.warning(
+        "Оценка памяти на загрузку '%s' (%.1f МБ) превышает бюджет (%.1f МБ).",
+        file_path,
+        estimate / 2**20,
+        budget / 2**20,
+    )
+    return True
+
+
+def memory_report(budget: Optional[int] = None) -> Dict:
+    """
+    Отчёт о потреблении памяти за время работы процесса.
+    Пики этапов собираются, только если включён замер памяти ('metrics.set_memory_tracking').
+    :param budget: Бюджет памяти в байтах (по умолчанию — из переменной окружения MEMORY_BUDGET_MB).
+    :return: Словарь с бюджетом, пиковым RSS процесса и пиками памяти этапов, отсортированными по убыванию.
+    """
+    summary = metrics_summary()
+    stages = sorted(summary["memory"].items(), key=lambda item: item[1]["peak_bytes"], reverse=True)
+    return {
+        "budget_bytes": budget if budget is not None else memory_budget(),
+        "peak_rss_bytes": summary["process"]["peak_rss_bytes"],
+        "stages": {name: values["peak_bytes"] for name, values in stages},
+    }
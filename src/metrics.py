@@ -0,0 +1,275 @@
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar, cast
+
+from src.lazy import is_dataframe
+
+PROMETHEUS_PREFIX = "finance_flow"
+# Декорируемая функция: декоратор 'timed' сохраняет её сигнатуру
+F = TypeVar("F", bound=Callable[..., Any])
+
+_lock = threading.Lock()
+_stages: Dict[str, Dict[str, float]] = {}
+_caches: Dict[str, Dict[str, int]] = {}
+_memory: Dict[str, Dict[str, int]] = {}
+# Замер памяти через tracemalloc замедляет выделение памяти, поэтому включается явно
+_memory_tracking = os.getenv("MEMORY_TRACKING", "") not in ("", "0")
+_local = threading.local()
+
+
+def _empty_stage() -> Dict[str, float]:
+    return {"calls": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0, "last_seconds": 0.0, "rows": 0}
+
+
+def record_stage(name: str, seconds: float, rows: Optional[int] = None, error: bool = False) -> None:
+    """
+    Регистрирует одно выполнение этапа.
+    :param name: Название этапа (например, 'main_view.cost_analysis').
+    :param seconds: Длительность выполнения в секундах.
+    :param rows: Количество обработанных строк (если известно).
+    :param error: True, если этап завершился исключением.
+    """
+    with _lock:
+        stage = _stages.setdefault(name, _empty_stage())
+        stage["calls"] += 1
+        stage["errors"] += int(error)
+        stage["total_seconds"] += seconds
+        stage["max_seconds"] = max(stage["max_seconds"], seconds)
+        stage["last_seconds"] = seconds
+        if rows is not None:
+            stage["rows"] += rows
+
+
+def record_cache(name: str, hit: bool) -> None:
+    """
+    Регистрирует обращение к кэшу.
+    :param name: Название кэша.
+    :param hit: True при попадании в кэш, False при промахе.
+    """
+    with _lock:
+        cache = _caches.setdefault(name, {"hits": 0, "misses": 0})
+        cache["hits" if hit else "misses"] += 1
+
+
+def set_memory_tracking(enabled: bool) -> None:
+    """
+    Включает или выключает замер пикового потребления памяти этапов через tracemalloc
+    (по умолчанию — переменная окружения MEMORY_TRACKING).
+    Замер общий для процесса: в пик этапа попадают и выделения других потоков.
+    """
+    global _memory_tracking
+    _memory_tracking = enabled
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def rss_bytes() -> Optional[int]:
+    """Текущий размер резидентной памяти процесса (RSS) в байтах или None, если его нельзя определить."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Пиковый размер резидентной памяти процесса (RSS) в байтах или None, если его нельзя определить."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # В Linux значение в килобайтах, в macOS — в байтах
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def record_memory(name: str, peak_bytes: int, rss: Optional[int] = None) -> None:
+    """
+    Регистрирует пиковое потребление памяти одного выполнения этапа.
+    :param name: Название этапа.
+    :param peak_bytes: Пик памяти, выделенной этапом сверх уже занятой до его начала, в байтах.
+    :param rss: Размер резидентной памяти процесса по окончании этапа в байтах (если известен).
+    """
+    with _lock:
+        memory = _memory.setdefault(name, {"calls": 0, "peak_bytes": 0, "last_peak_bytes": 0, "rss_bytes": 0})
+        memory["calls"] += 1
+        memory["peak_bytes"] = max(memory["peak_bytes"], peak_bytes)
+        memory["last_peak_bytes"] = peak_bytes
+        if rss is not None:
+            memory["rss_bytes"] = max(memory["rss_bytes"], rss)
+
+
+def _start_memory() -> Dict[str, int]:
+    """Начинает замер памяти этапа. Пик внешнего этапа сохраняется до сброса пика для вложенного."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    stack = _local.__dict__.setdefault("memory_stack", [])
+    current, peak = tracemalloc.get_traced_memory()
+    if stack:
+        stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+    tracemalloc.reset_peak()
+    frame = {"start": current, "peak": current}
+    stack.append(frame)
+    return frame
+
+
+def _finish_memory(name: str, frame: Dict[str, int]) -> None:
+    """Завершает замер памяти этапа и передаёт его пик внешнему этапу."""
+    stack = _local.memory_stack
+    peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+    stack.remove(frame)
+    if stack:
+        stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+    record_memory(name, max(peak - frame["start"], 0), rss_bytes())
+
+
+def _count_rows(value: Any) -> Optional[int]:
+    """Возвращает количество строк, если объект — набор данных (список, кортеж или DataFrame), иначе None."""
+    if isinstance(value, (list, tuple)) or is_dataframe(value):
+        return len(value)
+    return None
+
+
+@contextmanager
+def track_stage(name: str, rows: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Контекстный менеджер для замера этапа. Количество строк можно передать сразу
+    или указать внутри блока: `with track_stage("stage") as stage: stage["rows"] = len(data)`.
+    Если включён замер памяти ('set_memory_tracking'), также регистрируется пик памяти этапа.
+    :param name: Название этапа.
+    :param rows: Количество обработанных строк (если известно заранее).
+    """
+    info = {"rows": rows}
+    memory = _start_memory() if _memory_tracking else None
+    started = time.perf_counter()
+    try:
+        yield info
+    except BaseException:
+        record_stage(name, time.perf_counter() - started, info["rows"], error=True)
+        raise
+    else:
+        record_stage(name, time.perf_counter() - started, info["rows"])
+    finally:
+        if memory is not None:
+            _finish_memory(name, memory)
+
+
+def timed(name: Optional[str] = None) -> Callable[[F], F]:
+    """
+    Декоратор, замеряющий длительность вызовов функции.
+    Количеством строк считается длина первого аргумента, если это список транзакций или DataFrame,
+    иначе — длина результата (например, для функций, принимающих путь до файла или дату).
+    Для асинхронных функций замеряется время до завершения корутины.
+    :param name: Название этапа (по умолчанию — имя функции).
+    """
+
+    def decorator(function: F) -> F:
+        stage_name = name or function.__name__
+
+        if inspect.iscoroutinefunction(function):
+
+            @wraps(function)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with track_stage(stage_name, _count_rows(args[0]) if args else None) as stage:
+                    result = await function(*args, **kwargs)
+                    if stage["rows"] is None:
+                        stage["rows"] = _count_rows(result)
+                    return result
+
+            return cast(F, async_wrapper)
+
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with track_stage(stage_name, _count_rows(args[0]) if args else None) as stage:
+                result = function(*args, **kwargs)
+                if stage["rows"] is None:
+                    stage["rows"] = _count_rows(result)
+                return result
+
+        return cast(F, wrapper)
+
+    return decorator
+
+
+def metrics_summary() -> Dict[str, Dict]:
+    """
+    Возвращает снимок собранных метрик.
+    :return: Словарь {"stages": {...}, "caches": {...}, "memory": {...}, "process": {...}} со средним временем
+             этапов, долей попаданий в кэш, пиками памяти этапов и пиковым RSS процесса.
+    """
+    with _lock:
+        stages = {name: dict(values) for name, values in _stages.items()}
+        caches: Dict[str, Dict[str, float]] = {name: dict(values) for name, values in _caches.items()}
+        memory = {name: dict(values) for name, values in _memory.items()}
+
+    for values in stages.values():
+        values["avg_seconds"] = values["total_seconds"] / values["calls"] if values["calls"] else 0.0
+    for counters in caches.values():
+        requests_count = counters["hits"] + counters["misses"]
+        counters["hit_ratio"] = counters["hits"] / requests_count if requests_count else 0.0
+    return {"stages": stages, "caches": caches, "memory": memory, "process": {"peak_rss_bytes": peak_rss_bytes()}}
+
+
+def metrics_json(indent: Optional[int] = 4) -> str:
+    """Возвращает снимок метрик в формате JSON."""
+    return json.dumps(metrics_summary(), indent=indent, ensure_ascii=False)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def metrics_prometheus() -> str:
+    """Возвращает снимок метрик в текстовом формате Prometheus."""
+    summary = metrics_summary()
+    stage_metrics = [
+        ("stage_calls_total", "calls", "Количество выполнений этапа."),
+        ("stage_errors_total", "errors", "Количество выполнений этапа, завершившихся ошибкой."),
+        ("stage_seconds_total", "total_seconds", "Суммарная длительность этапа в секундах."),
+        ("stage_seconds_max", "max_seconds", "Максимальная длительность этапа в секундах."),
+        ("stage_rows_total", "rows", "Количество строк, обработанных этапом."),
+    ]
+    cache_metrics = [
+        ("cache_hits_total", "hits", "Количество попаданий в кэш."),
+        ("cache_misses_total", "misses", "Количество промахов кэша."),
+    ]
+    memory_metrics = [
+        ("stage_memory_peak_bytes", "peak_bytes", "Пик памяти, выделенной этапом, в байтах."),
+        ("stage_rss_bytes", "rss_bytes", "Максимальный RSS процесса по окончании этапа в байтах."),
+    ]
+
+    lines = []
+    sections = (
+        ("stages", "stage", stage_metrics),
+        ("caches", "cache", cache_metrics),
+        ("memory", "stage", memory_metrics),
+    )
+    for section, label, metrics in sections:
+        for metric, key, description in metrics:
+            metric_type = "gauge" if metric.endswith(("_max", "_bytes")) else "counter"
+            lines.append(f"# HELP {PROMETHEUS_PREFIX}_{metric} {description}")
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{metric} {metric_type}")
+            for name, values in sorted(summary[section].items()):
+                lines.append(f'{PROMETHEUS_PREFIX}_{metric}{{{label}="{_escape_label(name)}"}} {values[key]}')
+    if summary["process"]["peak_rss_bytes"] is not None:
+        lines.append(f"# HELP {PROMETHEUS_PREFIX}_process_peak_rss_bytes Пиковый RSS процесса в байтах.")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_process_peak_rss_bytes gauge")
+        lines.append(f"{PROMETHEUS_PREFIX}_process_peak_rss_bytes {summary['process']['peak_rss_bytes']}")
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    """Очищает все собранные метрики."""
+    with _lock:
+        _stages.clear()
+        _caches.clear()
+        _memory.clear()
@@ -0,0 +1,242 @@
+import logging
+import math
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.common import (add_exact, cashback_entry, has_phone_number, investment_saving, is_personal_transfer,
+                        matches_query)
+from src.logger_config import RowEventLog, add_logger
+from src.serialization import dumps
+from src.services import (cashback_analysis, find_personal_transfer, find_phone_numbers, investment_bank,
+                          searching_transactions)
+
+# Настройка логирования
+logger = add_logger("parallel.log", "parallel")
+
+# Ниже этого количества транзакций накладные расходы на пул процессов не окупаются
+MIN_PARALLEL_SIZE = 10_000
+
+FILTERS: Dict[str, Tuple[Callable[..., bool], Tuple]] = {
+    "search": (matches_query, (TypeError, KeyError, ValueError)),
+    "phone": (has_phone_number, (Exception,)),
+    "personal_transfer": (is_personal_transfer, (Exception,)),
+}
+
+
+def _filter_chunk(chunk: List[Dict], offset: int, kind: str, args: Tuple) -> Tuple[List[int], List[Tuple[int, str]]]:
+    """Возвращает глобальные номера подходящих транзакций чанка и список ошибок."""
+    predicate, handled_errors = FILTERS[kind]
+    matched, errors = [], []
+    for i, transaction in enumerate(chunk, start=offset):
+        try:
+            if predicate(transaction, *args):
+                matched.append(i)
+        except handled_errors as e:
+            errors.append((i, str(e)))
+    return matched, errors
+
+
+def _cashback_chunk(
+    chunk: List[Dict], offset: int, year: int, month: int
+) -> Tuple[Dict[str, List[float]], List[Tuple[int, str]]]:
+    """Возвращает точные суммы кэшбэка по категориям для чанка (частичные суммы 'add_exact') и список ошибок."""
+    totals: Dict[str, List[float]] = defaultdict(list)
+    errors = []
+    for i, transaction in enumerate(chunk, start=offset):
+        try:
+            entry = cashback_entry(transaction, year, month)
+            if entry is not None:
+                category, cashback = entry
+                add_exact(totals[category], cashback)
+        except (TypeError, KeyError, ValueError) as e:
+            errors.append((i, str(e)))
+    return dict(totals), errors
+
+
+def _investment_chunk(
+    chunk: List[Dict], offset: int, month: str, limit: int
+) -> Tuple[List[float], List[Tuple[int, str]]]:
+    """Возвращает точную сумму для копилки по чанку (частичные суммы 'add_exact') и список ошибок."""
+    total_saved: List[float] = []
+    errors = []
+    for i, transaction in enumerate(chunk, start=offset):
+        try:
+            saving = investment_saving(transaction, month, limit)
+            if saving:
+                add_exact(total_saved, saving)
+        except (TypeError, KeyError, ValueError) as e:
+            errors.append((i, str(e)))
+    return total_saved, errors
+
+
+def _map_chunks(
+    worker: Callable, transaction_list: List[Dict], args: Tuple, max_workers: Optional[int], chunk_size: Optional[int]
+) -> List[Any]:
+    """
+    Делит список транзакций на чанки и обрабатывает их в пуле процессов.
+    Результаты возвращаются в порядке чанков, поэтому итог не зависит от порядка завершения процессов.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, math.ceil(len(transaction_list) / (max_workers * 4)))
+    offsets = range(0, len(transaction_list), chunk_size)
+    bounds = [*offsets, len(transaction_list)]
+    chunks = [transaction_list[start:end] for start, end in zip(bounds, bounds[1:])]
+
+    logger.info("Обработка %s транзакций: %s чанков, процессов - %s.", len(transaction_list), len(chunks), max_workers)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(worker, chunks, offsets, *[[arg] * len(chunks) for arg in args]))
+
+    errors_log = RowEventLog(logger, logging.WARNING)
+    for _, errors in results:
+        for i, error in errors:
+            errors_log.log("Произошла ошибка при обработке транзакции (ID=%s): %s.", i, error)
+    errors_log.summary("Ошибки при обработке ещё %s транзакций не записаны в лог по отдельности.")
+    return results
+
+
+def _use_serial(transaction_list: List[Dict], max_workers: Optional[int]) -> bool:
+    """Определяет, стоит ли выполнять обработку в одном процессе."""
+    return len(transaction_list) < MIN_PARALLEL_SIZE or max_workers == 1
+
+
+def _parallel_filter(
+    kind: str, transaction_list: List[Dict], args: Tuple, max_workers: Optional[int], chunk_size: Optional[int]
+) -> List[Dict]:
+    """Запускает фильтр по чанкам и склеивает номера найденных транзакций в исходном порядке."""
+    results = _map_chunks(_filter_chunk, transaction_list, (kind, args), max_workers, chunk_size)
+    return [transaction_list[i] for matched, _ in results for i in matched]
+
+
+def parallel_cashback_analysis(
+    transaction_list: List[Dict],
+    year: int,
+    month: int,
+    max_workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    compact: bool = False,
+) -> str:
+    """
+    Параллельный вариант 'cashback_analysis'. Процессы возвращают точные суммы по категориям для своих чанков
+    в виде частичных сумм, которые объединяются без потери точности ('math.fsum'), поэтому результат
+    совпадает с последовательным независимо от числа процессов и размера чанков.
+    :param transaction_list: Список словарей с данными о транзакциях.
+    :param year: Год, за который проводится анализ.
+    :param month: Месяц за который проводится анализ.
+    :param max_workers: Количество процессов (по умолчанию — число ядер).
+    :param chunk_size: Размер чанка (по умолчанию — четыре чанка на процесс).
+    :param compact: Если True, возвращает компактный JSON без отступов.
+    :return: JSON с анализом возможного заработка кэшбэка по категориям.
+    """
+    if _use_serial(transaction_list, max_workers):
+        return cashback_analysis(transaction_list, year, month, compact)
+
+    logger.info("Вызов функции 'parallel_cashback_analysis' с параметрами: год - %s, месяц - %s.", year, month)
+    partials: Dict[str, List[float]] = defaultdict(list)
+    for chunk_totals, _ in _map_chunks(_cashback_chunk, transaction_list, (year, month), max_workers, chunk_size):
+        for category, chunk_partials in chunk_totals.items():
+            partials[category].extend(chunk_partials)
+
+    cashback_categories = {category: round(math.fsum(values), 2) for category, values in partials.items()}
+    logger.info("Кэшбэк по категориям сформирован. Количество категорий: %s", len(cashback_categories))
+    return dumps(cashback_categories, compact)
+
+
+def parallel_investment_bank(
+    transaction_list: List[Dict],
+    month: str,
+    limit: int,
+    max_workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> float:
+    """
+    Параллельный вариант 'investment_bank'. Процессы возвращают точные суммы по своим чанкам
+    в виде частичных сумм, которые объединяются без потери точности, поэтому результат совпадает с последовательным.
+    :param transaction_list: Список словарей с данными о транзакциях.
+    :param month: Строка в формате 'YYYY-MM'.
+    :param limit: Лимит для округления.
+    :param max_workers: Количество процессов (по умолчанию — число ядер).
+    :param chunk_size: Размер чанка (по умолчанию — четыре чанка на процесс).
+    :return: Возможная отложенная сумма.
+    """
+    if _use_serial(transaction_list, max_workers):
+        return investment_bank(transaction_list, month, limit)
+
+    logger.info("Вызов функции 'parallel_investment_bank' с параметрами: месяц - %s, лимит - %s.", month, limit)
+    partials: List[float] = []
+    for chunk_saved, _ in _map_chunks(_investment_chunk, transaction_list, (month, limit), max_workers, chunk_size):
+        partials.extend(chunk_saved)
+    total_saved = math.fsum(partials)
+
+    logger.info("Общая сумма, накопленная в 'Инвесткопилке' за %s: %s ₽.", month, total_saved)
+    return round(total_saved, 2)
+
+
+def parallel_searching_transactions(
+    transaction_list: List[Dict],
+    query: str,
+    max_workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    compact: bool = False,
+) -> str:
+    """
+    Параллельный вариант 'searching_transactions'.
+    :param transaction_list: Список словарей с данными о транзакциях.
+    :param query: Строка для запроса пользователем.
+    :param max_workers: Количество процессов (по умолчанию — число ядер).
+    :param chunk_size: Размер чанка (по умолчанию — четыре чанка на процесс).
+    :param compact: Если True, возвращает компактный JSON без отступов.
+    :return: JSON-ответ со всеми транзакциями, содержащими запрос в описании или категории.
+    """
+    if _use_serial(transaction_list, max_workers):
+        return searching_transactions(transaction_list, query, compact)
+
+    query = query.lower()
+    found_transactions = _parallel_filter("search", transaction_list, (query,), max_workers, chunk_size)
+    logger.info("Найдено %s транзакций по запросу '%s'.", len(found_transactions), query)
+    return dumps(found_transactions, compact)
+
+
+def parallel_find_phone_numbers(
+    transaction_list: List[Dict],
+    max_workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    compact: bool = False,
+) -> str:
+    """
+    Параллельный вариант 'find_phone_numbers'.
+    :param transaction_list: Список словарей с данными о транзакциях.
+    :param max_workers: Количество процессов (по умолчанию — число ядер).
+    :param chunk_size: Размер чанка (по умолчанию — четыре чанка на процесс).
+    :param compact: Если True, возвращает компактный JSON без отступов.
+    :return: JSON-ответ со всеми транзакциями, содержащими номер телефона в описании.
+    """
+    if _use_serial(transaction_list, max_workers):
+        return find_phone_numbers(transaction_list, compact)
+
+    found_transactions = _parallel_filter("phone", transaction_list, (), max_workers, chunk_size)
+    logger.info("Найдено %s транзакций с номерами телефонов.", len(found_transactions))
+    return dumps(found_transactions, compact)
+
+
+def parallel_find_personal_transfer(
+    transaction_list: List[Dict],
+    max_workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    compact: bool = False,
+) -> str:
+    """
+    Параллельный вариант 'find_personal_transfer'.
+    :param transaction_list: Список словарей с данными о транзакциях.
+    :param max_workers: Количество процессов (по умолчанию — число ядер).
+    :param chunk_size: Размер чанка (по умолчанию — четыре чанка на процесс).
+    :param compact: Если True, возвращает компактный JSON без отступов.
+    :return: JSON-ответ со всеми транзакциями, являющимися переводам физическим лицам.
+    """
+    if _use_serial(transaction_list, max_workers):
+        return find_personal_transfer(transaction_list, compact)
+
+    found_transactions = _parallel_filter("personal_transfer", transaction_list, (), max_workers, chunk_size)
+    logger.info("Найдено %s переводов физическим лицам.", len(found_transactions))
+    return dumps(found_transactions, compact)
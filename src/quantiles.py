@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import json
+import math
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from src.common import card_last_digits
+from src.lazy import lazy_import
+from src.logger_config import add_logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+# Настройка логирования
+logger = add_logger("quantiles.log", "quantiles")
+
+DEFAULT_PERCENTILES = (0.5, 0.9, 0.99)
+DEFAULT_K = 200
+GROUP_DIMENSIONS = ("card", "category")
+# Во сколько раз уменьшается ёмкость уровня при удалении от верхнего уровня
+CAPACITY_DECAY = 2 / 3
+
+
+def percentile_label(q: float) -> str:
+    """Название столбца процентиля: 0.5 -> 'p50', 0.999 -> 'p99.9'."""
+    return f"p{q * 100:g}"
+
+
+def _inverted_cdf(items: np.ndarray, weights: np.ndarray, qs: Sequence[float]) -> List[float]:
+    """Квантили взвешенной выборки: наименьшее значение, накопленный вес которого не меньше q от общего."""
+    order = np.argsort(items, kind="stable")
+    items, cumulative = items[order], np.cumsum(weights[order])
+    ranks = np.asarray(qs, dtype="float64") * cumulative[-1]
+    positions = np.minimum(np.searchsorted(cumulative, ranks, side="left"), len(items) - 1)
+    values: List[float] = items[positions].tolist()
+    return values
+
+
+class KLLSketch:
+    """
+    Скетч квантилей KLL (Karnin, Lang, Liberty): значения хранятся по уровням, элемент уровня h имеет вес 2^h.
+    Переполненный уровень сортируется, и каждый второй его элемент переходит на уровень выше, поэтому память
+    O(k) при любом количестве значений, а ошибка ранга — порядка 1/k (около 1% при k=200).
+    Скетчи, построенные по разным частям данных, объединяются через 'merge' без потери точности.
+    Смещение при сжатии уровня чередуется, поэтому результат воспроизводим.
+    """
+
+    def __init__(self, k: int = DEFAULT_K) -> None:
+        """:param k: Ёмкость верхнего уровня; чем больше, тем точнее скетч и тем больше памяти он занимает."""
+        if k < 8:
+            raise ValueError(f"Параметр k должен быть не меньше 8, получено {k}.")
+        self.k = k
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._offsets: List[int] = [0]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, math.ceil(self.k * CAPACITY_DECAY**depth))
+
+    def _compress(self) -> None:
+        """
+        Пока скетч превышает суммарную ёмкость уровней, сжимает нижний переполненный уровень.
+        Уровни сжимаются лениво, поэтому скетч хранит около 3k значений, а не k.
+        """
+        while sum(map(len, self.levels)) > sum(map(self._capacity, range(len(self.levels)))):
+            level = next(level for level, items in enumerate(self.levels) if len(items) > self._capacity(level))
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+                self._offsets.append(0)
+            items = np.sort(self.levels[level])
+            # При нечётном количестве наименьший элемент остаётся на уровне
+            odd = len(items) % 2
+            offset = self._offsets[level]
+            self._offsets[level] = 1 - offset
+            start = odd + offset
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[start::2]])
+            self.levels[level] = items[:odd]
+
+    def update(self, values: Union[Sequence[float], np.ndarray, pd.Series]) -> KLLSketch:
+        """
+        Добавляет значения в скетч. Пропуски (NaN) не учитываются.
+        :param values: Массив чисел.
+        :return: Этот же скетч.
+        """
+        array = np.asarray(values, dtype="float64").ravel()
+        array = array[~np.isnan(array)]
+        if len(array):
+            self.count += len(array)
+            self.min = min(self.min, float(array.min()))
+            self.max = max(self.max, float(array.max()))
+            self.levels[0] = np.concatenate([self.levels[0], array])
+            self._compress()
+        return self
+
+    def merge(self, other: KLLSketch) -> KLLSketch:
+        """
+        Добавляет в скетч значения другого скетча.
+        :param other: Скетч KLL, построенный по другой части данных.
+        :return: Этот же скетч.
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+            self._offsets.append(0)
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def quantiles(self, qs: Sequence[float] = DEFAULT_PERCENTILES) -> List[float]:
+        """
+        Оценивает квантили.
+        :param qs: Уровни квантилей от 0 до 1.
+        :return: Список значений (NaN, если скетч пуст). Уровень 0 даёт минимум, уровень 1 — максимум.
+        """
+        if not self.count:
+            return [math.nan] * len(qs)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(len(level_items), 2.0**level) for level, level_items in enumerate(self.levels)]
+        )
+        values = _inverted_cdf(items, weights, qs)
+        return [self.min if q <= 0 else self.max if q >= 1 else value for q, value in zip(qs, values)]
+
+    def to_dict(self) -> Dict:
+        """Представление скетча для сохранения в JSON."""
+        return {
+            "type": "kll",
+            "k": self.k,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "levels": [items.tolist() for items in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> KLLSketch:
+        """Восстанавливает скетч из 'to_dict'."""
+        sketch = cls(data["k"])
+        sketch.count = data["count"]
+        if sketch.count:
+            sketch.min, sketch.max = data["min"], data["max"]
+        sketch.levels = [np.asarray(items, dtype="float64") for items in data["levels"]]
+        sketch._offsets = [0] * len(sketch.levels)
+        return sketch
+
+
+class ExactQuantiles:
+    """
+    Точные квантили с тем же интерфейсом, что у KLLSketch. Хранит все значения,
+    поэтому подходит для проверки скетчей и небольших данных.
+    """
+
+    def __init__(self) -> None:
+        self._parts: List[np.ndarray] = []
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def update(self, values: Union[Sequence[float], np.ndarray, pd.Series]) -> ExactQuantiles:
+        """Добавляет значения. Пропуски (NaN) не учитываются."""
+        array = np.asarray(values, dtype="float64").ravel()
+        array = array[~np.isnan(array)]
+        self._parts.append(array)
+        self.count += len(array)
+        return self
+
+    def merge(self, other: ExactQuantiles) -> ExactQuantiles:
+        """Добавляет значения другого объекта."""
+        self._parts.extend(other._parts)
+        self.count += other.count
+        return self
+
+    def values(self) -> np.ndarray:
+        """Все добавленные значения."""
+        self._parts = [np.concatenate(self._parts)] if self._parts else []
+        return self._parts[0] if self._parts else np.empty(0)
+
+    def quantiles(self, qs: Sequence[float] = DEFAULT_PERCENTILES) -> List[float]:
+        """Точные квантили с тем же определением, что у KLLSketch ('inverted_cdf')."""
+        if not self.count:
+            return [math.nan] * len(qs)
+        values: List[float] = np.quantile(self.values(), qs, method="inverted_cdf").tolist()
+        return values
+
+    def to_dict(self) -> Dict:
+        """Представление для сохранения в JSON."""
+        return {"type": "exact", "values": self.values().tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> ExactQuantiles:
+        """Восстанавливает объект из 'to_dict'."""
+        return cls().update(data["values"])
+
+
+Sketch = Union[KLLSketch, ExactQuantiles]
+
+
+def _sketch_from_dict(data: Dict) -> Sketch:
+    return ExactQuantiles.from_dict(data) if data["type"] == "exact" else KLLSketch.from_dict(data)
+
+
+class SpendingDistribution:
+    """
+    Распределение сумм трат (размера чека) по картам и категориям на скетчах квантилей.
+    Строится по частям через 'update', объединяется с распределениями других частей через 'merge'
+    и сохраняется в JSON рядом с агрегатами ('save' и 'load'), поэтому процентили не требуют сортировки
+    всех транзакций группы. В точном режиме ('exact=True') хранятся все суммы — для проверки скетчей.
+    """
+
+    def __init__(self, exact: bool = False, k: int = DEFAULT_K) -> None:
+        """
+        :param exact: Если True, квантили считаются точно.
+        :param k: Параметр точности скетча KLL.
+        """
+        self.exact = exact
+        self.k = k
+        self.sketches: Dict[str, Dict[object, Sketch]] = {dimension: {} for dimension in GROUP_DIMENSIONS}
+
+    def _new_sketch(self) -> Sketch:
+        return ExactQuantiles() if self.exact else KLLSketch(self.k)
+
+    @classmethod
+    def from_transactions(
+        cls, transactions: pd.DataFrame, exact: bool = False, k: int = DEFAULT_K
+    ) -> SpendingDistribution:
+        """Строит распределение по DataFrame с транзакциями."""
+        return cls(exact, k).update(transactions)
+
+    def update(self, transactions: pd.DataFrame) -> SpendingDistribution:
+        """
+        Учитывает траты очередной порции транзакций.
+        Суммы один раз сортируются по группе и передаются в скетч каждой группы одним массивом.
+        :param transactions: DataFrame с транзакциями.
+        :return: Этот же объект.
+        """
+        amounts = pd.to_numeric(transactions["Сумма операции"], errors="coerce").to_numpy(dtype="float64")
+        spending = amounts < 0
+        if not spending.any():
+            return self
+        keys = {
+            "card": card_last_digits(transactions["Номер карты"]) if "Номер карты" in transactions else None,
+            "category": transactions["Категория"] if "Категория" in transactions else None,
+        }
+        values = -amounts[spending]
+        for dimension, column in keys.items():
+            if column is None:
+                column = pd.Series(["Неизвестно"] * len(transactions), index=transactions.index)
+            codes, uniques = pd.factorize(column[spending], use_na_sentinel=False)
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            sketches = self.sketches[dimension]
+            for code, key in enumerate(uniques):
+                key = None if pd.isna(key) else key
+                start, end = bounds[code], bounds[code + 1]
+                sketch = sketches.get(key)
+                if sketch is None:
+                    sketch = sketches[key] = self._new_sketch()
+                sketch.update(values[order[start:end]])
+        return self
+
+    def merge(self, other: SpendingDistribution) -> SpendingDistribution:
+        """
+        Объединяет распределение с распределением другой части данных.
+        :param other: Распределение в том же режиме (скетч или точный).
+        :return: Этот же объект.
+        """
+        if other.exact != self.exact:
+            raise ValueError("Нельзя объединить точное распределение со скетчем.")
+        for dimension, sketches in other.sketches.items():
+            own = self.sketches[dimension]
+            for key, sketch in sketches.items():
+                own_sketch = own.get(key)
+                # Режимы распределений совпадают, поэтому скетчи одного типа
+                if isinstance(own_sketch, KLLSketch) and isinstance(sketch, KLLSketch):
+                    own_sketch.merge(sketch)
+                elif isinstance(own_sketch, ExactQuantiles) and isinstance(sketch, ExactQuantiles):
+                    own_sketch.merge(sketch)
+                else:
+                    own[key] = _sketch_from_dict(sketch.to_dict())
+        return self
+
+    def percentiles(self, by: str = "category", qs: Sequence[float] = DEFAULT_PERCENTILES) -> pd.DataFrame:
+        """
+        Процентили сумм трат по группам.
+        :param by: 'card' (последние 4 символа номера карты) или 'category'.
+        :param qs: Уровни квантилей от 0 до 1.
+        :return: DataFrame со столбцами группы, count и процентилями ('p50', 'p90', 'p99'), отсортированный по группе.
+        """
+        if by not in self.sketches:
+            raise ValueError(f"Неизвестное измерение '{by}', ожидается одно из {GROUP_DIMENSIONS}.")
+        groups = sorted(self.sketches[by].items(), key=lambda item: (item[0] is None, str(item[0])))
+        labels = [percentile_label(q) for q in qs]
+        rows = [[key, len(sketch), *sketch.quantiles(qs)] for key, sketch in groups]
+        return pd.DataFrame(rows, columns=[by, "count", *labels])
+
+    def to_dict(self) -> Dict:
+        """Представление распределения для сохранения в JSON."""
+        return {
+            "exact": self.exact,
+            "k": self.k,
+            "sketches": {
+                dimension: [[key, sketch.to_dict()] for key, sketch in sketches.items()]
+                for dimension, sketches in self.sketches.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> SpendingDistribution:
+        """Восстанавливает распределение из 'to_dict'."""
+        distribution = cls(data["exact"], data["k"])
+        for dimension, items in data["sketches"].items():
+            distribution.sketches[dimension] = {key: _sketch_from_dict(sketch) for key, sketch in items}
+        return distribution
+
+    def save(self, path: str) -> None:
+        """Сохраняет распределение в JSON-файл."""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False)
+        logger.info("Распределение трат сохранено в '%s'.", path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional[SpendingDistribution]:
+        """
+        Загружает распределение из JSON-файла.
+        :return: SpendingDistribution или None, если файл отсутствует или повреждён.
+        """
+        try:
+            with open(path, encoding="utf-8") as file:
+                return cls.from_dict(json.load(file))
+        except (OSError, ValueError, KeyError) as e:
+            logger.error("Не удалось загрузить распределение трат из '%s': %s.", path, e, exc_info=True)
+            return None
@@ -1,66 +1,98 @@
-import json
+from __future__ import annotations
+
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from functools import wraps
-from typing import Optional
-
-import pandas as pd
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, TypeVar, Union, cast
 
+from src.cube import SpendingCube
+from src.dates import DateIndex, parse_operation_dates
+from src.export import export_result
+from src.lazy import is_dataframe, lazy_import
 from src.logger_config import add_logger
+from src.metrics import timed
+from src.serialization import dumps
+from src.timeseries import ROLLING_WINDOWS, daily_spending
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
 
 # Настройка логирования
 logger = add_logger("reports.log", "reports")
 
+REPORT_FORMAT_ENV = "REPORT_FORMAT"
+# Декорируемая функция: декоратор 'save_to_file' сохраняет её сигнатуру
+F = TypeVar("F", bound=Callable[..., Any])
 
-def save_to_file(filename: str = None):
+
+def save_to_file(
+    filename: Optional[str] = None, file_format: Optional[str] = None, columns: Optional[List[str]] = None
+) -> Callable[[F], F]:
     """Декоратор, сохраняющий результат выполнения функции в JSON файл.
-    Если имя файла не передано, используется имя по умолчанию."""
+    Если имя файла не передано, используется имя по умолчанию.
+    DataFrame записывается по частям через модуль 'export' (JSON-массив формируется потоково),
+    только со столбцами 'columns', если они заданы. Формат 'csv', 'jsonl' или 'parquet' задаётся параметром
+    'file_format' или переменной окружения REPORT_FORMAT."""
 
-    def decorator(function):
+    def decorator(function: F) -> F:
         @wraps(function)
-        def wrapper(*args, **kwargs):
-            logger.info(f"Запуск функции '{function.__name__}'.")
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            logger.info("Запуск функции '%s'.", function.__name__)
             result = function(*args, **kwargs)
 
-            if isinstance(result, pd.DataFrame):
-                result_to_save = result.to_dict(orient="records")
-
             path_project = os.path.dirname(os.path.dirname(__file__))
             path_reports = os.path.join(path_project, "reports_data")
             os.makedirs(path_reports, exist_ok=True)
 
+            report_format = file_format or os.getenv(REPORT_FORMAT_ENV) or "json"
             if filename:
                 report_file = os.path.join(path_reports, filename)
             else:
-                default_name = f"report_{function.__name__}_{datetime.now().strftime('%Y-%m-%d_%H%M%S')}.json"
+                timestamp = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+                default_name = f"report_{function.__name__}_{timestamp}.{report_format}"
                 report_file = os.path.join(path_reports, default_name)
 
+            if isinstance(result, pd.DataFrame):
+                try:
+                    export_result(result, report_file, report_format, columns)
+                    logger.info("Файл успешно сохранён: %s", report_file)
+                except (OSError, ImportError, KeyError, ValueError) as e:
+                    logger.error("Ошибка при сохранении отчета в %s: %s.", report_file, e, exc_info=True)
+                return result
+
             try:
                 with open(report_file, "w", encoding="utf-8") as file:
-                    json.dump(result_to_save, file, indent=4, ensure_ascii=False)
-                logger.info(f"Файл успешно сохранён: {report_file}")
-            except (OSError, json.JSONDecodeError, TypeError) as e:
-                logger.error(f"Ошибка при сохранении отчета в {report_file}: {e}.", exc_info=True)
+                    file.write(dumps(result))
+                logger.info("Файл успешно сохранён: %s", report_file)
+            except (OSError, TypeError, ValueError) as e:
+                logger.error("Ошибка при сохранении отчета в %s: %s.", report_file, e, exc_info=True)
 
             return result
 
-        return wrapper
+        return cast(F, wrapper)
 
     return decorator
 
 
-@save_to_file()
-def spending_by_category(transactions: pd.DataFrame, category: str, date: Optional[str] = None) -> pd.DataFrame:
+def category_spending(
+    transactions: Union[pd.DataFrame, DateIndex], category: str, date: Optional[str] = None
+) -> pd.DataFrame:
     """
-    Вычисляет траты по указанной категории за последние три месяца от указанной даты.
-    :param transactions: Датафрейм с данными о транзакциях.
+    Вычисляет траты по указанной категории за последние три месяца от указанной даты, не сохраняя отчёт в файл.
+    Период выбирается бинарным поиском по индексу дат, категория сравнивается только внутри периода.
+    :param transactions: Датафрейм с данными о транзакциях или индекс по датам (DateIndex).
     :param category: Строка с необходимой категорией.
     :param date: Дата отсчёта (опционально).
     :return: Отфильтрованный датафрейм с тратами.
     """
     logger.info(
-        f"""Вызов функции 'spending_by_category' с параметрами: category - {category}, date - {date}."
-Количество полученных транзакций: {len(transactions)}"""
+        "Вызов функции 'spending_by_category' с параметрами: category - %s, date - %s. "
+        "Количество полученных транзакций: %s",
+        category,
+        date,
+        len(transactions),
     )
     try:
         if date:
@@ -70,24 +102,105 @@ def spending_by_category(transactions: pd.DataFrame, category: str, date: Option
 
         end_date = start_date - pd.DateOffset(months=3)
 
-        transactions["Дата операции"] = pd.to_datetime(transactions["Дата операции"], format="%d.%m.%Y %H:%M:%S")
-
-        filtered_transactions = transactions[
-            (transactions["Дата операции"] >= end_date)
-            & (transactions["Дата операции"] <= start_date)
-            & (transactions["Категория"] == category)
-        ]
+        if is_dataframe(transactions):
+            transactions["Дата операции"] = parse_operation_dates(transactions["Дата операции"], errors="raise")
+        period_transactions = DateIndex.of(transactions).between(end_date, start_date)
+        filtered_transactions: pd.DataFrame = period_transactions[period_transactions["Категория"] == category].copy()
 
         logger.info(
-            f"Найдено {len(filtered_transactions)} транзакций в категории '{category}' с {end_date} по {start_date}."
+            "Найдено %s транзакций в категории '%s' с %s по %s.",
+            len(filtered_transactions),
+            category,
+            end_date,
+            start_date,
         )
 
         if filtered_transactions.empty:
-            logger.warning(f"Нет данных по категории '{category}' за указанный период")
+            logger.warning("Нет данных по категории '%s' за указанный период", category)
 
         filtered_transactions["Дата операции"] = filtered_transactions["Дата операции"].astype(str)
 
         return filtered_transactions
     except Exception as e:
-        logger.error(f"Ошибка при обработке транзакций: {e}.", exc_info=True)
+        logger.error("Ошибка при обработке транзакций: %s.", e, exc_info=True)
+        raise
+
+
+@save_to_file()
+@timed()
+def spending_by_category(
+    transactions: Union[pd.DataFrame, DateIndex], category: str, date: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Вычисляет траты по указанной категории за последние три месяца от указанной даты
+    и сохраняет отчёт в файл (см. 'save_to_file' и 'category_spending').
+    :param transactions: Датафрейм с данными о транзакциях или индекс по датам (DateIndex).
+    :param category: Строка с необходимой категорией.
+    :param date: Дата отсчёта (опционально).
+    :return: Отфильтрованный датафрейм с тратами.
+    """
+    return category_spending(transactions, category, date)
+
+
+@save_to_file()
+@timed()
+def monthly_spending_by_category(
+    transactions: Union[pd.DataFrame, SpendingCube], category: str, date: Optional[str] = None, months: int = 3
+) -> pd.DataFrame:
+    """
+    Вычисляет траты по указанной категории помесячно за последние несколько месяцев, включая месяц указанной даты.
+    Ответ строится по кубу трат, поэтому повторные отчёты по уже построенному кубу не просматривают транзакции.
+    :param transactions: Датафрейм с данными о транзакциях или уже построенный куб трат (SpendingCube).
+    :param category: Строка с необходимой категорией.
+    :param date: Дата отсчёта в формате 'YYYY-MM-DD' (опционально).
+    :param months: Количество месяцев в отчёте.
+    :return: Датафрейм со столбцами month ('YYYY-MM'), spent и count.
+    """
+    logger.info(
+        "Вызов функции 'monthly_spending_by_category' с параметрами: category - %s, date - %s, months - %s.",
+        category,
+        date,
+        months,
+    )
+    try:
+        last_month = pd.Period(datetime.strptime(date, "%Y-%m-%d") if date else datetime.today(), freq="M")
+        period = [str(month) for month in pd.period_range(end=last_month, periods=months, freq="M")]
+
+        cube = transactions if isinstance(transactions, SpendingCube) else SpendingCube.from_transactions(transactions)
+        totals = cube.monthly_totals(category)
+        report = pd.DataFrame({"month": period}).merge(totals, on="month", how="left").fillna({"spent": 0, "count": 0})
+        report["count"] = report["count"].astype("int64")
+
+        logger.info("Траты по категории '%s' за %s - %s: %s.", category, period[0], period[-1], report["spent"].sum())
+        return report
+    except Exception as e:
+        logger.error("Ошибка при обработке транзакций: %s.", e, exc_info=True)
+        raise
+
+
+@save_to_file()
+@timed()
+def daily_spending_report(
+    transactions: Union[pd.DataFrame, DateIndex], date: Optional[str] = None, days: int = 90
+) -> pd.DataFrame:
+    """
+    Вычисляет траты по дням за последние несколько дней, включая указанную дату,
+    со скользящими средними за 7 и 30 дней. Транзакции периода (с историей для скользящих средних)
+    выбираются бинарным поиском по индексу дат.
+    :param transactions: Датафрейм с данными о транзакциях или индекс по датам (DateIndex).
+    :param date: Дата отсчёта в формате 'YYYY-MM-DD' (опционально).
+    :param days: Количество дней в отчёте.
+    :return: Датафрейм со столбцами date ('YYYY-MM-DD'), spent, count, ma_7 и ma_30.
+    """
+    logger.info("Вызов функции 'daily_spending_report' с параметрами: date - %s, days - %s.", date, days)
+    try:
+        end_date = datetime.strptime(date, "%Y-%m-%d") if date else datetime.today()
+        start_date = end_date - timedelta(days=days - 1)
+        history_date = start_date - timedelta(days=max(ROLLING_WINDOWS) - 1)
+        period_transactions = DateIndex.of(transactions).between_days(history_date, end_date)
+        report = daily_spending(period_transactions, start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
+        logger.info("Траты по дням за %s - %s: %s.", start_date.date(), end_date.date(), report["spent"].sum())
+        return report
+    except Exception as e:
+        logger.error("Ошибка при обработке транзакций: %s.", e, exc_info=True)
         raise
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from src.lazy import is_dataframe, lazy_import
+from src.serialization import dumps, to_records
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+Transactions = Union[List[Dict], "pd.DataFrame"]
+
+
+@dataclass(frozen=True)
+class FilterResult:
+    """
+    Результат фильтрации: номера подходящих строк в исходных транзакциях без копирования самих данных.
+    Данные извлекаются и сериализуются только при обращении к 'to_records' или 'to_json'.
+    """
+
+    source: Transactions = field(repr=False)
+    row_ids: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Возвращает найденные транзакции в виде DataFrame."""
+        if is_dataframe(self.source):
+            rows: pd.DataFrame = self.source.iloc[self.row_ids]
+            return rows
+        return pd.DataFrame([self.source[i] for i in self.row_ids])
+
+    def to_records(self) -> List[Dict]:
+        """Возвращает найденные транзакции в виде списка словарей."""
+        if is_dataframe(self.source):
+            return to_records(self.source.iloc[self.row_ids])
+        return [self.source[i] for i in self.row_ids]
+
+    def to_json(self, compact: bool = False) -> str:
+        """Сериализует найденные транзакции в JSON."""
+        return dumps(self.to_records(), compact)
+
+    def export(
+        self, file_path: str, file_format: Optional[str] = None, columns: Optional[Sequence[str]] = None
+    ) -> int:
+        """Выгружает найденные транзакции в CSV, JSON Lines или Parquet по частям (см. 'export.export_result')."""
+        from src.export import export_result
+
+        return export_result(self, file_path, file_format, columns)
+
+
+@dataclass(frozen=True)
+class AggregateResult:
+    """Результат агрегации: значения по ключам (например, кэшбэк по категориям)."""
+
+    values: Dict[str, float]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def to_series(self) -> pd.Series:
+        """Возвращает значения в виде Series."""
+        return pd.Series(self.values, dtype="float64")
+
+    def to_json(self, compact: bool = False) -> str:
+        """Сериализует значения в JSON."""
+        return dumps(self.values, compact)
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import json
+import math
+import sys
+from datetime import date, time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List
+
+from src.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - зависит от окружения
+    orjson = None  # type: ignore[assignment]
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _json_default(value: Any) -> Any:
+    """
+    Преобразует значения, которые не сериализуются напрямую, так же, как это делает 'orjson':
+    даты и время — в строки ISO 8601, pd.NaT — в null, скаляры и массивы numpy — в числа и списки.
+    """
+    pandas = sys.modules.get("pandas")
+    if pandas is not None and value is pandas.NaT:
+        return None
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if hasattr(value, "tolist"):
+        return _finite(value.tolist())
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _finite(obj: Any) -> Any:
+    """
+    Рекурсивно заменяет NaN и бесконечности на None, а ключи-даты — на строки ISO 8601,
+    чтобы модуль json давал тот же результат, что и 'orjson'.
+    """
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key.isoformat() if isinstance(key, (date, time)) else key: _finite(item) for key, item in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(item) for item in obj]
+    return obj
+
+
+def format_timestamps(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводит все столбцы с датами к строкам формата 'YYYY-MM-DD HH:MM:SS' одной векторной операцией на столбец.
+    :param data: DataFrame с данными.
+    :return: Копия DataFrame, в которой даты заменены строками.
+    """
+    datetime_columns = [column for column in data.columns if pd.api.types.is_datetime64_any_dtype(data[column])]
+    if not datetime_columns:
+        return data
+
+    data = data.copy()
+    for column in datetime_columns:
+        data[column] = data[column].dt.strftime(TIMESTAMP_FORMAT)
+    return data
+
+
+def to_records(data: pd.DataFrame) -> List[Dict]:
+    """
+    Преобразует DataFrame в список словарей, предварительно форматируя даты на уровне столбцов.
+    :param data: DataFrame с данными.
+    :return: Список словарей, готовый к сериализации в JSON.
+    """
+    return format_timestamps(data).to_dict(orient="records")
+
+
+def dumps(obj: Any, compact: bool = False) -> str:
+    """
+    Сериализует объект в JSON.
+    В обычном режиме вывод совпадает с 'json.dumps(obj, indent=4, ensure_ascii=False)', а даты и значения numpy,
+    которые модуль json не сериализует, записываются так же, как в компактном режиме.
+    В компактном режиме отступы не используются, а при наличии 'orjson' сериализация выполняется им.
+    Без 'orjson' компактный вывод совпадает с ним: NaN и бесконечности записываются как null,
+    даты — строками ISO 8601, значения numpy — числами.
+    :param obj: Объект для сериализации.
+    :param compact: Если True, формирует компактный JSON без отступов.
+    :return: Строка с JSON.
+    """
+    if not compact:
+        return json.dumps(obj, indent=4, ensure_ascii=False, default=_json_default)
+    if orjson is not None:
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        return orjson.dumps(obj, default=_json_default, option=options).decode("utf-8")
+    return json.dumps(_finite(obj), ensure_ascii=False, separators=(",", ":"), allow_nan=False, default=_json_default)
+
+
+def iter_json_array(records: Iterable[Any], compact: bool = False, chunk_size: int = 1000) -> Iterator[str]:
+    """
+    Потоково сериализует последовательность объектов в JSON-массив, не собирая его целиком в памяти.
+    :param records: Итерируемый объект с элементами массива.
+    :param compact: Если True, элементы записываются без отступов.
+    :param chunk_size: Количество элементов, объединяемых в один фрагмент вывода.
+    :return: Итератор по фрагментам JSON, конкатенация которых образует корректный массив.
+    """
+    separator = "," if compact else ",\n"
+    opening, closing = ("[", "]") if compact else ("[\n", "\n]")
+
+    buffer = []
+    started = False
+    for record in records:
+        item = dumps(record, compact)
+        buffer.append(item if compact else "    " + item.replace("\n", "\n    "))
+        if len(buffer) >= chunk_size:
+            yield (separator if started else opening) + separator.join(buffer)
+            buffer, started = [], True
+
+    if buffer:
+        yield (separator if started else opening) + separator.join(buffer)
+        started = True
+
+    yield closing if started else "[]"
@@ -1,53 +1,167 @@
-import json
+from __future__ import annotations
+
+import calendar
+import logging
+import math
+import numbers
 import re
 from collections import defaultdict
-from datetime import datetime
-from typing import Dict, List
+from datetime import date
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple, Union, cast
+
+import numpy as np
 
-from src.logger_config import add_logger
+from src.cashback_rules import DEFAULT_RULES, CashbackRules
+from src.common import (NAME_PATTERN, PHONE_PATTERN, add_exact, card_last_digits, cashback_entry, failed_mask,
+                        has_phone_number, investment_saving, is_personal_transfer, matches_query)
+from src.cube import SpendingCube
+from src.dates import DateIndex, month_codes, operation_days
+from src.fuzzy_search import TransactionSearchIndex
+from src.lazy import is_dataframe, lazy_import
+from src.logger_config import RowEventLog, add_logger
+from src.metrics import timed
+from src.quantiles import DEFAULT_PERCENTILES, SpendingDistribution, percentile_label
+from src.results import AggregateResult, FilterResult, Transactions
+from src.serialization import dumps, to_records
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
 
 # Настройка логирования
 logger = add_logger("services.log", "services")
 
-PHONE_PATTERN = re.compile(r"\+7\s\d{3}\s\d{3}[-\s]?\d{2}[-\s]?\d{2}")
-NAME_PATTERN = re.compile(r"\b[А-ЯЁ][а-яё]+\s[А-ЯЁ]\.")
+MERCHANT_NOISE_PATTERN = re.compile(r"[\d\W_]+")
+MONTHLY_PERIOD_DAYS = (27, 32)
+
+
+def _descriptions(transactions: pd.DataFrame) -> pd.Series:
+    """Возвращает столбец "Описание" в виде строк (или пустые строки, если столбца нет)."""
+    if "Описание" not in transactions.columns:
+        return pd.Series("", index=transactions.index)
+    descriptions: pd.Series = transactions["Описание"].astype(str)
+    return descriptions
+
+
+def _categories(transactions: pd.DataFrame) -> pd.Series:
+    """Возвращает столбец "Категория" в виде строк (или пустые строки, если столбца нет)."""
+    if "Категория" not in transactions.columns:
+        return pd.Series("", index=transactions.index)
+    categories: pd.Series = transactions["Категория"].astype(str)
+    return categories
+
 
+def _filter_list(
+    transaction_list: List[Dict], predicate: Callable[..., bool], handled_errors: Tuple, *args: Any
+) -> np.ndarray:
+    """Построчно применяет проверку к списку транзакций и возвращает номера подходящих строк."""
+    row_ids = []
+    errors = RowEventLog(logger, logging.WARNING)
+    for i, transaction in enumerate(transaction_list):
+        try:
+            if predicate(transaction, *args):
+                row_ids.append(i)
+        except handled_errors as e:
+            errors.log("Произошла ошибка при обработке транзакции (ID=%s): %s.", i, e, exc_info=True)
+    errors.summary("Ошибки при обработке ещё %s транзакций не записаны в лог по отдельности.")
+    return np.array(row_ids, dtype=np.int64)
 
-def cashback_analysis(transaction_list: List[Dict], year: int, month: int) -> str:
+
+@timed()
+def cashback_analysis_result(
+    transactions: Union[Transactions, SpendingCube, DateIndex],
+    year: int,
+    month: int,
+    rules: Optional[CashbackRules] = None,
+) -> AggregateResult:
     """
-    Анализирует список транзакций на наиболее подходящие категории кэшбэка.
-    :param transaction_list: Список словарей с данными о транзакциях.
+    Рассчитывает возможный кэшбэк по категориям без сериализации в JSON.
+    Ставки берутся из правил модуля 'cashback_rules' (по умолчанию — 'DEFAULT_RULES', 1% от каждой траты).
+    Для DataFrame расчёт выполняется по кубу трат, для списка словарей — построчно без pandas
+    (при месячном лимите список преобразуется в DataFrame: лимит учитывает порядок операций по картам).
+    Для индекса по датам куб строится только по транзакциям месяца, выбранным бинарным поиском.
+    :param transactions: Список словарей, DataFrame с данными о транзакциях, индекс по датам (DateIndex)
+                         или уже построенный куб трат.
     :param year: Год, за который проводится анализ.
     :param month: Месяц за который проводится анализ.
-    :return: JSON с анализом возможного заработка кэшбэка по категориям.
+    :param rules: Правила начисления кэшбэка. Для готового куба используются правила, с которыми он построен.
+    :return: AggregateResult с кэшбэком по категориям.
     """
     logger.info(
-        f"""Вызов функции 'cashback_analysis' с параметрами: год - {year}, месяц - {month}.
-Количество полученных транзакций: {len(transaction_list)}."""
+        "Вызов функции 'cashback_analysis_result' с параметрами: год - %s, месяц - %s. "
+        "Количество полученных транзакций: %s.",
+        year,
+        month,
+        len(transactions),
     )
 
-    cashback_categories = defaultdict(float)
-    for i, transaction in enumerate(transaction_list):
-        try:
-            transaction_date = datetime.strptime(transaction.get("Дата операции").split()[0], "%d.%m.%Y")
-            if (
-                transaction_date.year == year
-                and transaction_date.month == month
-                and transaction.get("Сумма операции") < 0
-            ):
-                category = transaction.get("Категория", "Неизвестно")
-                amount = abs(transaction.get("Сумма операции"))
-                cashback_categories[category] += amount * 0.01
+    if isinstance(transactions, DateIndex):
+        last_day = calendar.monthrange(year, month)[1]
+        transactions = transactions.between_days(date(year, month, 1), date(year, month, last_day))
+    elif (
+        rules is not None
+        and rules.monthly_cap is not None
+        and not is_dataframe(transactions)
+        and not isinstance(transactions, SpendingCube)
+    ):
+        transactions = pd.DataFrame(transactions)
 
-        except (TypeError, KeyError, ValueError) as e:
-            logger.warning(f"Произошла ошибка при обработке транзакции (ID={i}): {e}.", exc_info=True)
-            continue
+    if is_dataframe(transactions) or isinstance(transactions, SpendingCube):
+        if isinstance(transactions, SpendingCube):
+            cube = transactions
+        else:
+            cube = SpendingCube.from_transactions(transactions, rules)
+        if cube.invalid_rows:
+            logger.warning(
+                "Произошла ошибка при обработке транзакций: пропущено некорректных строк - %s.", cube.invalid_rows
+            )
+        cashback_categories: Dict[Any, float] = {
+            category: cashback
+            for category, cashback in cube.category_totals(year, month, "cashback").items()
+            if category not in cube.rules.excluded_categories
+        }
+    else:
+        # Точные суммы не зависят от порядка сложения, поэтому совпадают с параллельным вариантом
+        partials: Dict[str, List[float]] = defaultdict(list)
+        errors = RowEventLog(logger, logging.WARNING)
+        for i, transaction in enumerate(transactions):
+            try:
+                entry = cashback_entry(transaction, year, month, rules or DEFAULT_RULES)
+                if entry is not None:
+                    category, cashback = entry
+                    add_exact(partials[category], cashback)
+
+            except (TypeError, KeyError, ValueError) as e:
+                errors.log("Произошла ошибка при обработке транзакции (ID=%s): %s.", i, e, exc_info=True)
+                continue
+
+        errors.summary("Ошибки при обработке ещё %s транзакций не записаны в лог по отдельности.")
+        cashback_categories = {category: math.fsum(values) for category, values in partials.items()}
 
     cashback_categories = {category: round(total, 2) for category, total in cashback_categories.items()}
-    logger.info(f"Кэшбэк по категориям сформирован. Количество категорий: {len(cashback_categories)}")
-    return json.dumps(cashback_categories, indent=4, ensure_ascii=False)
+    logger.info("Кэшбэк по категориям сформирован. Количество категорий: %s", len(cashback_categories))
+    return AggregateResult(cashback_categories)
 
 
+@timed()
+def cashback_analysis(
+    transaction_list: List[Dict], year: int, month: int, compact: bool = False, rules: Optional[CashbackRules] = None
+) -> str:
+    """
+    Анализирует список транзакций на наиболее подходящие категории кэшбэка.
+    :param transaction_list: Список словарей с данными о транзакциях.
+    :param year: Год, за который проводится анализ.
+    :param month: Месяц за который проводится анализ.
+    :param compact: Если True, возвращает компактный JSON без отступов.
+    :param rules: Правила начисления кэшбэка (по умолчанию — 1% на все траты).
+    :return: JSON с анализом возможного заработка кэшбэка по категориям.
+    """
+    logger.info("Вызов функции 'cashback_analysis' с параметрами: год - %s, месяц - %s.", year, month)
+    return cashback_analysis_result(transaction_list, year, month, rules).to_json(compact)
+
+
+@timed()
 def investment_bank(transaction_list: List[Dict], month: str, limit: int) -> float:
     """
     Рассчитывает сумму, которая могла бы быть отложена в «Инвесткопилку» за указанный месяц.
@@ -57,98 +171,426 @@ def investment_bank(transaction_list: List[Dict], month: str, limit: int) -> flo
     :return: Возможная отложенная сумма.
     """
     logger.info(
-        f"""Вызов функции 'investment_bank' с параметрами: месяц - {month}, лимит - {limit}.
-Количество полученных транзакций: {len(transaction_list)}."""
+        "Вызов функции 'investment_bank' с параметрами: месяц - %s, лимит - %s. "
+        "Количество полученных транзакций: %s.",
+        month,
+        limit,
+        len(transaction_list),
     )
-    total_saved = 0.0
+    partials: List[float] = []
+    savings = RowEventLog(logger, logging.INFO)
+    errors = RowEventLog(logger, logging.WARNING)
     for i, transaction in enumerate(transaction_list):
         try:
-            transaction_date = datetime.strptime(transaction.get("Дата операции").split()[0], "%d.%m.%Y")
-            if transaction_date.strftime("%Y-%m") != month:
-                continue
-
-            if transaction.get("Сумма операции") < 0:
-                amount = abs(transaction.get("Сумма операции"))
-                if amount % limit != 0:
-                    amount_rounded = (amount // limit + 1) * limit
-                    total_saved += amount_rounded - amount
-                    logger.info(f"По транзакции '{i}' отложено в копилку: {amount_rounded - amount}")
+            saving = investment_saving(transaction, month, limit)
+            if saving:
+                add_exact(partials, saving)
+                savings.log("По транзакции '%s' отложено в копилку: %s", i, saving)
 
         except (TypeError, KeyError, ValueError) as e:
-            logger.warning(f"Произошла ошибка при обработке транзакции (ID={i}): {e}.", exc_info=True)
+            errors.log("Произошла ошибка при обработке транзакции (ID=%s): %s.", i, e, exc_info=True)
             continue
 
-    logger.info(f"Общая сумма, накопленная в 'Инвесткопилке' за {month}: {total_saved} ₽.")
+    savings.summary("Отложено в копилку ещё по %s транзакциям (не записаны в лог по отдельности).")
+    errors.summary("Ошибки при обработке ещё %s транзакций не записаны в лог по отдельности.")
+
+    total_saved = math.fsum(partials)
+    logger.info("Общая сумма, накопленная в 'Инвесткопилке' за %s: %s ₽.", month, total_saved)
     return round(total_saved, 2)
 
 
-def searching_transactions(transaction_list: List[Dict], query: str) -> str:
+def _numeric_amounts(transactions: Transactions) -> np.ndarray:
+    """
+    Суммы операций в виде массива float64. Значения, которые не являются числами, становятся NaN
+    (построчные функции пропускают такие транзакции).
+    """
+    if is_dataframe(transactions):
+        amounts: np.ndarray = pd.to_numeric(transactions["Сумма операции"], errors="coerce").to_numpy(dtype="float64")
+        return amounts
+    return np.array(
+        [
+            amount if isinstance(amount, numbers.Real) else np.nan
+            for amount in (transaction.get("Сумма операции") for transaction in transactions)
+        ],
+        dtype="float64",
+    )
+
+
+@timed()
+def investment_bank_matrix(
+    transactions: Union[Transactions, DateIndex], limits: List[int], start_month: str, end_month: str
+) -> pd.DataFrame:
+    """
+    Рассчитывает суммы «Инвесткопилки» сразу для нескольких лимитов округления и месяцев.
+    Даты и суммы разбираются один раз, расчёт векторный. Каждая ячейка совпадает с результатом
+    'investment_bank(transactions, month, limit)': суммы внутри месяца складываются в исходном порядке транзакций.
+    :param transactions: Список словарей, DataFrame с данными о транзакциях или индекс по датам (DateIndex).
+    :param limits: Лимиты для округления, например [10, 50, 100].
+    :param start_month: Первый месяц периода в формате 'YYYY-MM'.
+    :param end_month: Последний месяц периода в формате 'YYYY-MM'.
+    :return: DataFrame: строки — месяцы ('YYYY-MM'), столбцы — лимиты, значения — возможные накопления.
+    """
+    logger.info(
+        "Вызов функции 'investment_bank_matrix' с параметрами: лимиты - %s, период - %s - %s. "
+        "Количество полученных транзакций: %s.",
+        limits,
+        start_month,
+        end_month,
+        len(transactions),
+    )
+    months = pd.period_range(start_month, end_month, freq="M")
+
+    if isinstance(transactions, DateIndex):
+        # Транзакции периода в исходном порядке, выбранные бинарным поиском по датам
+        transactions = transactions.between(months[0].start_time, months[-1].end_time)
+    if is_dataframe(transactions):
+        dates = transactions["Дата операции"]
+    else:
+        dates = pd.Series([transaction.get("Дата операции") for transaction in transactions], dtype=object)
+    # Номер месяца в периоде по кодам месяцев, без объектов Period; вне периода и для некорректных дат — -1
+    codes = month_codes(dates)
+    first = months[0].ordinal
+    month_index = np.where((codes >= first) & (codes < first + len(months)), codes - first, -1)
+    amounts = _numeric_amounts(transactions)
+
+    # Траты за период, упорядоченные по месяцу; внутри месяца сохраняется исходный порядок строк
+    rows = np.flatnonzero((month_index >= 0) & (amounts < 0))
+    rows = rows[np.argsort(month_index[rows], kind="stable")]
+    spent = -amounts[rows]
+    bounds = np.searchsorted(month_index[rows], np.arange(len(months) + 1))
+
+    matrix = {}
+    for limit in limits:
+        savings = np.where(np.mod(spent, limit) != 0, (np.floor_divide(spent, limit) + 1) * limit - spent, 0.0)
+        # cumsum складывает последовательно, как цикл в 'investment_bank' (np.sum использует попарное сложение)
+        matrix[limit] = [
+            round(float(np.cumsum(savings[start:end])[-1]), 2) if end > start else 0.0
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+
+    result = pd.DataFrame(matrix, index=months.astype(str), columns=limits)
+    logger.info("Матрица накоплений сформирована: %s месяцев × %s лимитов.", len(months), len(limits))
+    return result
+
+
+@timed()
+def searching_transactions_result(transactions: Transactions, query: str) -> FilterResult:
+    """
+    Находит транзакции, которые содержат запрос в описании или категории, без сериализации в JSON.
+    :param transactions: Список словарей или DataFrame с данными о транзакциях.
+    :param query: Строка для запроса пользователем.
+    :return: FilterResult с номерами найденных транзакций.
+    """
+    logger.info(
+        "Вызов функции 'searching_transactions_result' с параметром: %s. Количество полученных транзакций: %s.",
+        query,
+        len(transactions),
+    )
+    query = query.lower()
+
+    if is_dataframe(transactions):
+        mask = _descriptions(transactions).str.lower().str.contains(query, regex=False) | _categories(
+            transactions
+        ).str.lower().str.contains(query, regex=False)
+        row_ids = np.flatnonzero(mask.to_numpy())
+    else:
+        row_ids = _filter_list(cast(List[Dict], transactions), matches_query, (TypeError, KeyError, ValueError), query)
+
+    logger.info("Найдено %s транзакций по запросу '%s'.", len(row_ids), query)
+    return FilterResult(transactions, row_ids)
+
+
+@timed()
+def searching_transactions(transaction_list: List[Dict], query: str, compact: bool = False) -> str:
     """
     Осуществляет поиск транзакций, которые содержат запрос в описании или категории.
     :param transaction_list: Список словарей с данными о транзакциях.
     :param query: Строка для запроса пользователем.
+    :param compact: Если True, возвращает компактный JSON без отступов.
     :return: JSON-ответ со всеми транзакциями, содержащими запрос в описании или категории.
     """
+    logger.info("Вызов функции 'searching_transactions' с параметром: %s.", query)
+    return searching_transactions_result(transaction_list, query).to_json(compact)
+
+
+@timed()
+def fuzzy_searching_transactions_result(
+    transactions: Transactions,
+    query: str,
+    k: int = 10,
+    threshold: float = 0.4,
+    index: Optional[TransactionSearchIndex] = None,
+) -> FilterResult:
+    """
+    Нечёткий поиск транзакций по описанию или категории с учётом опечаток и транслитерации ("озон" — "Ozon.ru").
+    Сравниваются только уникальные значения полей по индексу триграмм, поэтому время поиска
+    почти не зависит от длины истории.
+    :param transactions: Список словарей или DataFrame с данными о транзакциях.
+    :param query: Строка для запроса пользователем.
+    :param k: Максимальное количество найденных транзакций.
+    :param threshold: Минимальное сходство от 0 до 1.
+    :param index: Готовый индекс по этим же транзакциям (если не передан, строится заново).
+    :return: FilterResult с номерами найденных транзакций в порядке убывания сходства.
+    """
     logger.info(
-        f"""Вызов функции 'searching_transactions' с параметром: {query}.
-Количество полученных транзакций: {len(transaction_list)}."""
+        "Вызов функции 'fuzzy_searching_transactions_result' с параметром: %s. Количество полученных транзакций: %s.",
+        query,
+        len(transactions),
     )
-    query = query.lower()
+    index = index or TransactionSearchIndex(transactions)
+    row_ids, _ = index.search(query, k, threshold)
 
-    found_transactions = []
-    for i, transaction in enumerate(transaction_list):
-        try:
-            if (
-                query in str(transaction.get("Описание", "")).lower()
-                or query in str(transaction.get("Категория", "")).lower()
-            ):
-                found_transactions.append(transaction)
-        except (TypeError, KeyError, ValueError) as e:
-            logger.warning(f"Произошла ошибка при обработке транзакции (ID={i}): {e}.", exc_info=True)
-            continue
+    logger.info("Найдено %s транзакций по нечёткому запросу '%s'.", len(row_ids), query)
+    return FilterResult(transactions, row_ids)
 
-    logger.info(f"Найдено {len(found_transactions)} транзакций по запросу '{query}'.")
-    return json.dumps(found_transactions, indent=4, ensure_ascii=False)
+
+@timed()
+def fuzzy_searching_transactions(transaction_list: List[Dict], query: str, k: int = 10, compact: bool = False) -> str:
+    """
+    Осуществляет нечёткий поиск транзакций по описанию или категории.
+    :param transaction_list: Список словарей с данными о транзакциях.
+    :param query: Строка для запроса пользователем.
+    :param k: Максимальное количество найденных транзакций.
+    :param compact: Если True, возвращает компактный JSON без отступов.
+    :return: JSON-ответ с найденными транзакциями в порядке убывания сходства.
+    """
+    logger.info("Вызов функции 'fuzzy_searching_transactions' с параметром: %s.", query)
+    return fuzzy_searching_transactions_result(transaction_list, query, k).to_json(compact)
 
 
-def find_phone_numbers(transaction_list: List[Dict]) -> str:
+@timed()
+def find_phone_numbers_result(transactions: Transactions) -> FilterResult:
+    """
+    Находит транзакции, которые содержат номер телефона в описании, без сериализации в JSON.
+    :param transactions: Список словарей или DataFrame с данными о транзакциях.
+    :return: FilterResult с номерами найденных транзакций.
+    """
+    logger.info("Вызов функции 'find_phone_numbers_result'. Количество полученных транзакций: %s.", len(transactions))
+
+    if is_dataframe(transactions):
+        row_ids = np.flatnonzero(_descriptions(transactions).str.contains(PHONE_PATTERN).to_numpy())
+    else:
+        row_ids = _filter_list(cast(List[Dict], transactions), has_phone_number, (Exception,))
+
+    logger.info("Найдено %s транзакций с номерами телефонов.", len(row_ids))
+    return FilterResult(transactions, row_ids)
+
+
+@timed()
+def find_phone_numbers(transaction_list: List[Dict], compact: bool = False) -> str:
     """
     Осуществляет поиск транзакций, которые содержат номер телефона в описании.
     :param transaction_list: Список словарей с данными о транзакциях.
+    :param compact: Если True, возвращает компактный JSON без отступов.
     :return: JSON-ответ со всеми транзакциями, содержащими номер телефона в описании.
     """
-    logger.info(f"Вызов функции 'find_phone_numbers'. Количество полученных транзакций: {len(transaction_list)}.")
+    logger.info("Вызов функции 'find_phone_numbers'. Количество полученных транзакций: %s.", len(transaction_list))
+    return find_phone_numbers_result(transaction_list).to_json(compact)
 
-    found_transactions = []
-    for i, transaction in enumerate(transaction_list):
-        try:
-            if PHONE_PATTERN.search(str(transaction.get("Описание", ""))):
-                found_transactions.append(transaction)
-        except Exception as e:
-            logger.warning(f"Ошибка при обработке транзакции (ID={i}): {e}.", exc_info=True)
 
-    logger.info(f"Найдено {len(found_transactions)} транзакций с номерами телефонов.")
-    return json.dumps(found_transactions, indent=4, ensure_ascii=False)
+@timed()
+def find_personal_transfer_result(transactions: Transactions) -> FilterResult:
+    """
+    Находит переводы физическим лицам без сериализации в JSON.
+    :param transactions: Список словарей или DataFrame с данными о транзакциях.
+    :return: FilterResult с номерами найденных транзакций.
+    """
+    logger.info(
+        "Вызов функции 'find_personal_transfer_result'. Количество полученных транзакций: %s.", len(transactions)
+    )
+
+    if is_dataframe(transactions):
+        mask = (_categories(transactions) == "Переводы") & _descriptions(transactions).str.contains(NAME_PATTERN)
+        row_ids = np.flatnonzero(mask.to_numpy())
+    else:
+        row_ids = _filter_list(cast(List[Dict], transactions), is_personal_transfer, (Exception,))
 
+    logger.info("Найдено %s транзакций с номерами телефонов.", len(row_ids))
+    return FilterResult(transactions, row_ids)
 
-def find_personal_transfer(transaction_list: List[Dict]) -> str:
+
+@timed()
+def find_personal_transfer(transaction_list: List[Dict], compact: bool = False) -> str:
     """
     Осуществляет поиск транзакций, которые относятся к переводам физическим лицам.
     :param transaction_list: Список словарей с данными о транзакциях.
+    :param compact: Если True, возвращает компактный JSON без отступов.
     :return: JSON-ответ со всеми транзакциями, являющимися переводам физическим лицам.
     """
-    logger.info(f"Вызов функции 'find_personal_transfer'. Количество полученных транзакций: {len(transaction_list)}.")
+    logger.info("Вызов функции 'find_personal_transfer'. Количество полученных транзакций: %s.", len(transaction_list))
+    return find_personal_transfer_result(transaction_list).to_json(compact)
 
-    found_transactions = []
-    for i, transaction in enumerate(transaction_list):
-        try:
-            if transaction.get("Категория", "") == "Переводы" and NAME_PATTERN.search(
-                str(transaction.get("Описание", ""))
-            ):
-                found_transactions.append(transaction)
-        except Exception as e:
-            logger.warning(f"Ошибка при обработке транзакции (ID={i}): {e}.", exc_info=True)
-            continue
 
-    logger.info(f"Найдено {len(found_transactions)} транзакций с номерами телефонов.")
-    return json.dumps(found_transactions, indent=4, ensure_ascii=False)
+def _merchant_keys(descriptions: pd.Series) -> np.ndarray:
+    """
+    Коды продавцов: описание в нижнем регистре без цифр и знаков препинания (номера заказов, даты и т.п.).
+    Нормализация выполняется только для уникальных описаний.
+    """
+    codes, uniques = pd.factorize(descriptions)
+    normalized = [MERCHANT_NOISE_PATTERN.sub(" ", str(description).lower()).strip() for description in uniques]
+    merchant_codes, _ = pd.factorize(pd.Series(normalized + [""], dtype=object))
+    keys: np.ndarray = merchant_codes[codes]
+    return keys  # Код -1 (пропуск) указывает на последний элемент — пустое описание
+
+
+@timed()
+def find_recurring_payments_result(
+    transactions: Transactions,
+    min_occurrences: int = 3,
+    interval_tolerance: float = 0.2,
+    amount_tolerance: float = 0.1,
+    min_period_days: int = 7,
+) -> pd.DataFrame:
+    """
+    Находит регулярные платежи (подписки): траты по одной карте у одного продавца с похожей суммой
+    и равномерным интервалом. Транзакции группируются по карте и нормализованному описанию и один раз
+    сортируются по дате, интервалы и отклонения сумм считаются векторно — O(n log n).
+    :param transactions: Список словарей или DataFrame с данными о транзакциях.
+    :param min_occurrences: Минимальное количество платежей в серии.
+    :param interval_tolerance: Допустимое отклонение интервала от медианного (доля).
+    :param amount_tolerance: Допустимое отклонение суммы от медианной (доля).
+    :param min_period_days: Минимальный медианный интервал в днях.
+    :return: DataFrame с сериями: card, description, category, occurrences, period_days, amount,
+             first_date, last_date, next_date (ожидаемая дата следующего платежа), отсортированный по next_date.
+    """
+    logger.info(
+        "Вызов функции 'find_recurring_payments_result'. Количество полученных транзакций: %s.", len(transactions)
+    )
+    columns = [
+        "card",
+        "description",
+        "category",
+        "occurrences",
+        "period_days",
+        "amount",
+        "first_date",
+        "last_date",
+        "next_date",
+    ]
+    frame = transactions if is_dataframe(transactions) else pd.DataFrame(transactions)
+    if frame.empty:
+        logger.warning("Не найдено ни одной транзакции.")
+        return pd.DataFrame(columns=columns)
+
+    amounts = _numeric_amounts(frame)
+    days = operation_days(frame["Дата операции"]).to_numpy(dtype="datetime64[D]")
+    mask = (amounts < 0) & ~np.isnat(days)
+    if "Статус" in frame.columns:
+        mask &= ~failed_mask(frame["Статус"])
+
+    cards = frame["Номер карты"] if "Номер карты" in frame.columns else pd.Series("nan", index=frame.index)
+    cards = card_last_digits(cards).to_numpy()
+    card_codes, _ = pd.factorize(cards)
+    group_codes, _ = pd.factorize(card_codes * (len(frame) + 1) + _merchant_keys(_descriptions(frame)))
+
+    # Группы с недостаточным количеством платежей отбрасываются до сортировки
+    mask &= np.bincount(group_codes, weights=mask)[group_codes] >= min_occurrences
+    rows = np.flatnonzero(mask)
+    rows = rows[np.lexsort((days[rows], group_codes[rows]))]
+
+    groups = group_codes[rows]
+    day_numbers = days[rows].astype("int64")
+    intervals = np.diff(day_numbers, prepend=0).astype("float64")
+    intervals[np.r_[True, groups[1:] != groups[:-1]]] = np.nan  # Первый платёж серии не имеет интервала
+
+    series = pd.DataFrame({"row": rows, "interval": intervals, "spent": -amounts[rows], "day": day_numbers})
+    stats = series.groupby(groups, sort=False).agg(
+        occurrences=("day", "size"),
+        first_day=("day", "first"),
+        last_day=("day", "last"),
+        last_row=("row", "last"),
+        period=("interval", "median"),
+        amount=("spent", "median"),
+    )
+    interval_deviation = (series["interval"] - stats["period"].reindex(groups).to_numpy()).abs()
+    amount_deviation = (series["spent"] - stats["amount"].reindex(groups).to_numpy()).abs()
+    recurring = stats[
+        (stats["period"] >= min_period_days)
+        & (interval_deviation.groupby(groups, sort=False).max() <= stats["period"] * interval_tolerance)
+        & (amount_deviation.groupby(groups, sort=False).max() <= stats["amount"] * amount_tolerance)
+    ]
+
+    # Описание и категория берутся из последнего платежа серии
+    last_rows = frame.iloc[recurring["last_row"].to_numpy()]
+    period_days = recurring["period"].round().astype("int64")
+    last_dates = pd.to_datetime(recurring["last_day"], unit="D")
+    # Для ежемесячных платежей следующая дата — тот же день следующего месяца
+    next_dates = last_dates + pd.to_timedelta(period_days, unit="D")
+    monthly = period_days.between(*MONTHLY_PERIOD_DAYS)
+    next_dates[monthly] = last_dates[monthly] + pd.DateOffset(months=1)
+    result = pd.DataFrame(
+        {
+            "card": cards[recurring["last_row"].to_numpy()],
+            "description": _descriptions(last_rows).to_numpy(),
+            "category": _categories(last_rows).to_numpy(),
+            "occurrences": recurring["occurrences"].to_numpy(),
+            "period_days": period_days.to_numpy(),
+            "amount": recurring["amount"].round(2).to_numpy(),
+            "first_date": pd.to_datetime(recurring["first_day"], unit="D").to_numpy(),
+            "last_date": last_dates.to_numpy(),
+            "next_date": next_dates.to_numpy(),
+        },
+        columns=columns,
+    )
+    for column in ("first_date", "last_date", "next_date"):
+        result[column] = result[column].dt.strftime("%Y-%m-%d")
+    result = result.sort_values(["next_date", "description"], ignore_index=True)
+
+    logger.info("Найдено регулярных платежей: %s.", len(result))
+    return result
+
+
+@timed()
+def find_recurring_payments(transaction_list: List[Dict], compact: bool = False) -> str:
+    """
+    Осуществляет поиск регулярных платежей (подписок).
+    :param transaction_list: Список словарей с данными о транзакциях.
+    :param compact: Если True, возвращает компактный JSON без отступов.
+    :return: JSON-ответ с сериями регулярных платежей, их периодом и ожидаемой датой следующего платежа.
+    """
+    logger.info(
+        "Вызов функции 'find_recurring_payments'. Количество полученных транзакций: %s.", len(transaction_list)
+    )
+    return dumps(to_records(find_recurring_payments_result(transaction_list)), compact)
+
+
+@timed()
+def spending_percentiles_result(
+    transactions: Union[Transactions, SpendingDistribution],
+    by: str = "category",
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    exact: bool = False,
+) -> pd.DataFrame:
+    """
+    Процентили суммы траты (размера чека) по категориям или картам.
+    По умолчанию считаются по скетчам квантилей (ошибка ранга около 1%), которые можно строить по частям
+    данных и объединять (см. 'quantiles.SpendingDistribution'); 'exact=True' включает точный расчёт для проверки.
+    :param transactions: Список словарей, DataFrame или готовое распределение трат.
+    :param by: 'category' или 'card' (последние 4 символа номера карты).
+    :param percentiles: Уровни процентилей от 0 до 1.
+    :param exact: Если True, процентили считаются точно. Для готового распределения не используется.
+    :return: DataFrame со столбцами группы, count и процентилями ('p50', 'p90', 'p99').
+    """
+    logger.info("Вызов функции 'spending_percentiles_result' с параметрами: by - %s, exact - %s.", by, exact)
+    if isinstance(transactions, SpendingDistribution):
+        distribution = transactions
+    else:
+        frame = transactions if is_dataframe(transactions) else pd.DataFrame(transactions)
+        if frame.empty or "Сумма операции" not in frame:
+            logger.warning("Нет транзакций для расчёта процентилей.")
+            return pd.DataFrame(columns=[by, "count", *(percentile_label(q) for q in percentiles)])
+        distribution = SpendingDistribution.from_transactions(frame, exact)
+    return distribution.percentiles(by, percentiles)
+
+
+@timed()
+def spending_percentiles(transaction_list: List[Dict], by: str = "category", compact: bool = False) -> str:
+    """
+    Рассчитывает медиану, 90-й и 99-й процентили суммы траты по категориям или картам.
+    :param transaction_list: Список словарей с данными о транзакциях.
+    :param by: 'category' или 'card'.
+    :param compact: Если True, возвращает компактный JSON без отступов.
+    :return: JSON-ответ с количеством трат и процентилями по группам.
+    """
+    logger.info("Вызов функции 'spending_percentiles'. Количество полученных транзакций: %s.", len(transaction_list))
+    return dumps(to_records(spending_percentiles_result(transaction_list, by)), compact)
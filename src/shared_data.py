@@ -0,0 +1,115 @@
+import json
+import os
+from typing import Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+from src.dates import DATE_COLUMN, DATETIME_FORMAT, parse_operation_dates
+from src.logger_config import add_logger
+
+# Настройка логирования
+logger = add_logger("shared_data.log", "shared_data")
+
+MANIFEST_NAME = "manifest.json"
+
+
+def _column_file(index: int) -> str:
+    """Имя файла для столбца с указанным порядковым номером."""
+    return f"column_{index:03d}.npy"
+
+
+def publish_transactions(transactions: pd.DataFrame, target_dir: str) -> str:
+    """
+    Публикует нормализованные столбцы транзакций в набор memory-mapped файлов NumPy.
+    Числовые столбцы и "Дата операции" (datetime64) сохраняются как есть, строковые — в виде словаря значений
+    и массива кодов. Если 'target_dir' расположен в '/dev/shm', данные фактически лежат в разделяемой памяти.
+    :param transactions: DataFrame с данными о транзакциях.
+    :param target_dir: Каталог, в который будут записаны столбцы и файл-манифест.
+    :return: Путь до каталога с опубликованными данными. В случае ошибки возвращает пустую строку.
+    """
+    logger.info(
+        "Вызов функции 'publish_transactions' с параметром '%s'. Количество полученных транзакций: %s.",
+        target_dir,
+        len(transactions),
+    )
+    try:
+        os.makedirs(target_dir, exist_ok=True)
+        columns: List[Dict] = []
+        manifest = {"rows": len(transactions), "columns": columns}
+
+        for index, column in enumerate(transactions.columns):
+            series = transactions[column]
+            entry = {"name": column, "file": _column_file(index)}
+
+            if column == DATE_COLUMN and not pd.api.types.is_datetime64_any_dtype(series):
+                series = parse_operation_dates(series)
+
+            if pd.api.types.is_datetime64_any_dtype(series):
+                entry["kind"] = "datetime"
+                values = series.to_numpy(dtype="datetime64[ns]")
+            elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                entry["kind"] = "numeric"
+                values = series.to_numpy()
+            else:
+                entry["kind"] = "category"
+                categorical = pd.Categorical(series)
+                entry["categories"] = categorical.categories.tolist()
+                # Коды категорий уже имеют минимальный целочисленный тип (int8 при числе значений до 127)
+                values = categorical.codes
+
+            np.save(os.path.join(target_dir, entry["file"]), values, allow_pickle=False)
+            columns.append(entry)
+
+        # Манифест записывается последним: его наличие означает, что публикация завершена
+        with open(os.path.join(target_dir, MANIFEST_NAME), "w", encoding="utf-8") as file:
+            json.dump(manifest, file, ensure_ascii=False, indent=4)
+
+        logger.info("Опубликовано %s столбцов в '%s'.", len(columns), target_dir)
+        return target_dir
+
+    except Exception as e:
+        logger.error("Ошибка при публикации транзакций в '%s': %s.", target_dir, e, exc_info=True)
+        return ""
+
+
+def attach_transactions(source_dir: str, as_dataframe: bool = True) -> Union[List[Dict], pd.DataFrame]:
+    """
+    Подключается к опубликованным транзакциям без копирования данных.
+    Столбцы открываются только для чтения через memory-map, поэтому память расходуется один раз
+    на все рабочие процессы, а подключение не требует повторного разбора XLSX.
+    :param source_dir: Каталог, созданный функцией 'publish_transactions'.
+    :param as_dataframe: Если True, возвращает DataFrame, иначе список словарей (даты приводятся к строкам).
+    :return: DataFrame или List[Dict] с транзакциями. В случае ошибки возвращает пустой список.
+    """
+    logger.info("Вызов функции 'attach_transactions' с параметром '%s'.", source_dir)
+    try:
+        with open(os.path.join(source_dir, MANIFEST_NAME), encoding="utf-8") as file:
+            manifest = json.load(file)
+
+        columns = {}
+        for entry in manifest["columns"]:
+            values = np.load(os.path.join(source_dir, entry["file"]), mmap_mode="r", allow_pickle=False)
+            if entry["kind"] == "category":
+                columns[entry["name"]] = pd.Categorical.from_codes(values, entry["categories"], validate=False)
+            else:
+                columns[entry["name"]] = values
+
+        transactions = pd.DataFrame(columns, copy=False)
+        logger.info("Подключено %s транзакций из '%s'.", len(transactions), source_dir)
+
+        if as_dataframe:
+            return transactions
+
+        records = transactions.astype(object).where(transactions.notna(), None)
+        if DATE_COLUMN in records.columns:
+            dates = transactions[DATE_COLUMN]
+            records[DATE_COLUMN] = dates.dt.strftime(DATETIME_FORMAT).astype(object).where(dates.notna(), None)
+        return records.to_dict(orient="records")
+
+    except FileNotFoundError:
+        logger.error("Опубликованные данные по пути '%s' не найдены", source_dir, exc_info=True)
+        return []
+    except Exception as e:
+        logger.error("Произошла ошибка при подключении к данным '%s': %s", source_dir, e, exc_info=True)
+        return []
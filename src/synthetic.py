@@ -0,0 +1,168 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from src.logger_config import add_logger
+from src.shared_data import publish_transactions
+
+# Настройка логирования
+logger = add_logger("synthetic.log", "synthetic")
+
+# Excel не позволяет записать больше строк на один лист
+XLSX_MAX_ROWS = 1_048_575
+
+CARDS = ["*7197", "*4556", "*5091", "*5441", "*1112", None]
+CARD_WEIGHTS = [0.72, 0.17, 0.01, 0.005, 0.005, 0.09]
+
+# (категория, MCC, варианты описаний, медианная сумма, доля доходных операций, доля в общем числе операций)
+MERCHANTS = [
+    ("Супермаркеты", 5411, ["Колхоз", "Магнит", "SPAR", "Пятёрочка", "Перекрёсток"], 350, 0.0, 0.3),
+    ("Фастфуд", 5814, ["Mouse Tail", "Теремок", "Kfc", "Бургер Кинг"], 250, 0.0, 0.12),
+    ("Рестораны", 5812, ['OOO "Nord-S"', "Kebab 24 Mm", "Fethiye Restoran"], 1200, 0.0, 0.04),
+    ("Такси", 4121, ["Яндекс Такси", "Ситимобил"], 300, 0.0, 0.06),
+    ("Каршеринг", 7512, ["Ситидрайв", "Делимобиль"], 450, 0.0, 0.03),
+    ("Аптеки", 5912, ["Apteka 7", "Аптека Вита", "Apteka2965 Antares"], 500, 0.0, 0.04),
+    ("Местный транспорт", 4111, ["Метро Санкт-Петербург", "Северо-Западная пригородная"], 60, 0.0, 0.08),
+    ("Одежда и обувь", 5651, ["WILDBERRIES", "Ozon.ru", "Детки"], 2500, 0.02, 0.04),
+    ("Дом и ремонт", 5200, ["Строитель", "МаксидоМ", "Леруа Мерлен"], 1500, 0.0, 0.02),
+    ("Топливо", 5541, ["Circle K", "AZS 78", "ЛУКОЙЛ"], 1800, 0.0, 0.03),
+    ("Связь", 4814, ["МТС", "REG.RU"], 400, 0.0, 0.02),
+    (
+        "Мобильная связь",
+        4814,
+        ["Тинькофф Мобайл +7 995 555-55-55", "Я МТС +7 921 11-22-33", "МТС +7 981 976-14-20"],
+        300,
+        0.0,
+        0.04,
+    ),
+    (
+        "Переводы",
+        None,
+        ["Константин Л.", "Валерий А.", "Светлана Т.", "Иван С.", "Перевод Кредитная карта"],
+        2000,
+        0.1,
+        0.06,
+    ),
+    ("Пополнения", None, ["Перевод с карты", "Внесение наличных через банкомат Тинькофф"], 5000, 1.0, 0.04),
+    ("Онлайн-кинотеатры", 4899, ["Иви", "Okko", "Кинопоиск"], 299, 0.0, 0.02),
+    ("Наличные", 6011, ["Снятие в банкомате Сбербанк", "Снятие в банкомате Тинькофф"], 3000, 0.0, 0.01),
+    ("Зарплата", None, ['Пополнение. ООО "ФОРТУНА". Зарплата'], 80000, 1.0, 0.05),
+]
+
+FOREIGN_CURRENCIES = ["TRY", "EUR", "CNY", "USD"]
+
+
+@lru_cache(maxsize=1)
+def _time_of_day_strings() -> np.ndarray:
+    """Справочник строк ' HH:MM:SS' для каждой секунды суток."""
+    times = pd.Timestamp(0) + pd.to_timedelta(np.arange(86400), unit="s")
+    strings: np.ndarray = times.strftime(" %H:%M:%S").to_numpy(object)
+    return strings
+
+
+def generate_transactions(
+    rows: int, seed: int = 42, start_date: str = "2018-01-01", end_date: str = "2021-12-31"
+) -> pd.DataFrame:
+    """
+    Генерирует синтетическую выгрузку транзакций с той же схемой столбцов, что и 'data/operations.xlsx'.
+    Генерация векторная и детерминированная: одинаковый 'seed' даёт одинаковые данные.
+    :param rows: Количество строк.
+    :param seed: Начальное значение генератора случайных чисел.
+    :param start_date: Дата начала периода в формате 'YYYY-MM-DD'.
+    :param end_date: Дата окончания периода в формате 'YYYY-MM-DD'.
+    :return: DataFrame с транзакциями, отсортированными по убыванию даты.
+    """
+    logger.info("Вызов функции 'generate_transactions' с параметрами: rows - %s, seed - %s.", rows, seed)
+    rng = np.random.default_rng(seed)
+
+    start = pd.Timestamp(start_date).value // 10**9
+    end = pd.Timestamp(end_date).value // 10**9 + 86399
+    seconds = np.sort(rng.integers(start, end, rows))[::-1]
+
+    merchant_ids = rng.choice(len(MERCHANTS), size=rows, p=[merchant[5] for merchant in MERCHANTS])
+    variants = rng.integers(0, 1_000, rows)
+
+    categories = np.array([merchant[0] for merchant in MERCHANTS], dtype=object)[merchant_ids]
+    mcc = np.array([merchant[1] or np.nan for merchant in MERCHANTS], dtype="float64")[merchant_ids]
+    medians = np.array([merchant[3] for merchant in MERCHANTS], dtype="float64")[merchant_ids]
+    income_share = np.array([merchant[4] for merchant in MERCHANTS])[merchant_ids]
+
+    descriptions = np.empty(rows, dtype=object)
+    for index, merchant in enumerate(MERCHANTS):
+        selected = merchant_ids == index
+        options = np.array(merchant[2], dtype=object)
+        descriptions[selected] = options[variants[selected] % len(options)]
+
+    # Логнормальное распределение сумм вокруг медианы категории, с копейками
+    amounts = np.round(medians * rng.lognormal(0.0, 0.8, rows), 2)
+    is_income = rng.random(rows) < income_share
+    amounts = np.where(is_income, amounts, -amounts)
+
+    currencies = np.where(
+        rng.random(rows) < 0.02, rng.choice(FOREIGN_CURRENCIES, size=rows), np.array("RUB", dtype=object)
+    )
+    statuses = np.where(rng.random(rows) < 0.006, "FAILED", "OK")
+    cards = np.array(CARDS, dtype=object)[rng.choice(len(CARDS), size=rows, p=CARD_WEIGHTS)]
+
+    cashback = np.where((rng.random(rows) < 0.09) & (amounts < 0), np.floor(-amounts * 0.01), np.nan)
+    bonuses = np.where(amounts < 0, np.floor(-amounts * 0.01), 0).astype("int64")
+
+    # Строки дат собираются из справочников дней и времени суток: strftime по миллионам строк слишком медленный
+    days, day_seconds = np.divmod(seconds, 86400)
+    first_day = days.min() if rows else 0
+    day_table = pd.date_range(pd.Timestamp(first_day, unit="D"), periods=days.max() - first_day + 1 if rows else 0)
+    day_strings = day_table.strftime("%d.%m.%Y").to_numpy(dtype=object)[days - first_day]
+    time_strings = _time_of_day_strings()[day_seconds]
+
+    transactions = pd.DataFrame(
+        {
+            "Дата операции": day_strings + time_strings,
+            "Дата платежа": day_strings,
+            "Номер карты": cards,
+            "Статус": statuses,
+            "Сумма операции": amounts,
+            "Валюта операции": currencies,
+            "Сумма платежа": amounts,
+            "Валюта платежа": "RUB",
+            "Кэшбэк": cashback,
+            "Категория": categories,
+            "MCC": mcc,
+            "Описание": descriptions,
+            "Бонусы (включая кэшбэк)": bonuses,
+            "Округление на инвесткопилку": 0,
+            "Сумма операции с округлением": np.abs(amounts),
+        }
+    )
+
+    logger.info("Сгенерировано %s транзакций.", len(transactions))
+    return transactions
+
+
+def write_transactions(transactions: pd.DataFrame, file_path: str) -> str:
+    """
+    Сохраняет транзакции в файл. Формат определяется по расширению: '.xlsx', '.csv' или '.parquet'.
+    Путь без расширения считается каталогом для столбцового формата из модуля 'shared_data'.
+    :param transactions: DataFrame с транзакциями.
+    :param file_path: Путь до файла или каталога.
+    :return: Путь до записанного файла или каталога.
+    """
+    logger.info("Вызов функции 'write_transactions' с параметром '%s'.", file_path)
+    parent = os.path.dirname(file_path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+
+    if file_path.endswith(".xlsx"):
+        if len(transactions) > XLSX_MAX_ROWS:
+            raise ValueError(f"Формат XLSX поддерживает не более {XLSX_MAX_ROWS} строк, получено {len(transactions)}.")
+        transactions.to_excel(file_path, index=False)
+    elif file_path.endswith(".csv"):
+        transactions.to_csv(file_path, index=False)
+    elif file_path.endswith(".parquet"):
+        transactions.to_parquet(file_path, index=False)
+    else:
+        publish_transactions(transactions, file_path)
+
+    logger.info("Транзакции записаны в '%s'.", file_path)
+    return file_path
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.dates import operation_days
+from src.lazy import lazy_import
+from src.logger_config import add_logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+# Настройка логирования
+logger = add_logger("timeseries.log", "timeseries")
+
+ROLLING_WINDOWS = (7, 30)
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Скользящее среднее по окну из 'window' значений через накопленные суммы — O(n) при любом окне.
+    В начале ряда, пока значений меньше окна, среднее считается по имеющимся.
+    :param values: Массив значений.
+    :param window: Размер окна.
+    :return: Массив средних той же длины.
+    """
+    cumulative = np.concatenate([[0.0], np.cumsum(values, dtype="float64")])
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    means: np.ndarray = (cumulative[ends] - cumulative[starts]) / (ends - starts)
+    return means
+
+
+def _spending_days(transactions: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Дни трат (datetime64[D]) и суммы трат по модулю. Поступления и строки с некорректной датой
+    или суммой не учитываются. Даты разбираются один раз для всех рядов.
+    """
+    if transactions.empty or "Дата операции" not in transactions:
+        return np.array([], dtype="datetime64[D]"), np.array([])
+    days = operation_days(transactions["Дата операции"]).to_numpy().astype("datetime64[D]")
+    amounts = pd.to_numeric(transactions["Сумма операции"], errors="coerce").to_numpy(dtype="float64")
+    spending = ~np.isnat(days) & (amounts < 0)
+    return days[spending], -amounts[spending]
+
+
+def _daily_totals(days: np.ndarray, spent: np.ndarray, start: date, end: date) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Суммы и количество трат по дням периода [start, end].
+    Дни нумеруются от начала периода и суммируются через np.bincount за один проход.
+    """
+    length = (end - start).days + 1
+    offsets = (days - np.datetime64(start, "D")).astype("int64")
+    valid = (offsets >= 0) & (offsets < length)
+    return (
+        np.bincount(offsets[valid], weights=spent[valid], minlength=length).astype("float64"),
+        np.bincount(offsets[valid], minlength=length),
+    )
+
+
+def daily_spending(
+    transactions: pd.DataFrame,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    windows: Sequence[int] = ROLLING_WINDOWS,
+) -> pd.DataFrame:
+    """
+    Траты по дням со скользящими средними. Дни без трат входят в ряд с нулём.
+    Средние в начале периода учитывают траты до него, все окна считаются по одним накопленным суммам.
+    :param transactions: DataFrame с данными о транзакциях.
+    :param start_date: Первый день ряда в формате 'YYYY-MM-DD' (по умолчанию — день первой операции).
+    :param end_date: Последний день ряда в формате 'YYYY-MM-DD' (по умолчанию — день последней операции).
+    :param windows: Размеры окон скользящего среднего в днях.
+    :return: DataFrame со столбцами date ('YYYY-MM-DD'), spent, count и 'ma_7', 'ma_30' для каждого окна.
+    """
+    columns = ["date", "spent", "count", *(f"ma_{window}" for window in windows)]
+    days, amounts = _spending_days(transactions)
+    if not len(days) and not (start_date and end_date):
+        return pd.DataFrame(columns=columns)
+    start = date.fromisoformat(start_date) if start_date else days.min().astype(object)
+    end = date.fromisoformat(end_date) if end_date else days.max().astype(object)
+    if start > end:
+        return pd.DataFrame(columns=columns)
+
+    # История до начала ряда нужна, чтобы первые средние считались по полному окну
+    history = max(windows, default=1) - 1
+    spent, count = _daily_totals(days, amounts, start - timedelta(days=history), end)
+    series = pd.DataFrame(
+        {
+            "date": pd.date_range(start, end).strftime("%Y-%m-%d"),
+            "spent": spent[history:].round(2),
+            "count": count[history:],
+        }
+    )
+    for window in windows:
+        series[f"ma_{window}"] = rolling_mean(spent, window)[history:].round(2)
+    logger.info("Построен ряд трат по дням с %s по %s.", start, end)
+    result: pd.DataFrame = series[columns]
+    return result
+
+
+def monthly_deltas(transactions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Траты по месяцам и их изменение относительно предыдущего месяца.
+    :param transactions: DataFrame с данными о транзакциях.
+    :return: DataFrame со столбцами month ('YYYY-MM'), spent, delta, delta_pct (NaN для первого месяца
+             и при нулевых тратах в предыдущем месяце).
+    """
+    series = daily_spending(transactions, windows=())
+    if series.empty:
+        return pd.DataFrame(columns=["month", "spent", "delta", "delta_pct"])
+    months = series.groupby(series["date"].str.slice(0, 7), sort=True)["spent"].sum()
+    # Пропущенные месяцы без операций входят в ряд с нулём
+    months = months.reindex(pd.period_range(months.index[0], months.index[-1], freq="M").astype(str), fill_value=0)
+    previous = months.shift(1)
+    return pd.DataFrame(
+        {
+            "month": months.index,
+            "spent": months.to_numpy().round(2),
+            "delta": (months - previous).round(2).to_numpy(),
+            "delta_pct": ((months - previous) / previous.where(previous != 0) * 100).round(2).to_numpy(),
+        }
+    )
+
+
+def _previous_month_start(month_start: date) -> date:
+    return (month_start - timedelta(days=1)).replace(day=1)
+
+
+def history_start(current_datetime: str, windows: Sequence[int] = ROLLING_WINDOWS) -> date:
+    """
+    Первый день, операции с которого нужны разделу 'spending_trend': начало предыдущего месяца
+    или начало окна скользящего среднего для первого дня текущего месяца.
+    """
+    month_start = date.fromisoformat(current_datetime[:10]).replace(day=1)
+    return min(_previous_month_start(month_start), month_start - timedelta(days=max(windows, default=1) - 1))
+
+
+def history_filter(current_datetime: str) -> Callable[[pd.DataFrame], pd.DataFrame]:
+    """
+    Построчный фильтр операций, нужных разделу 'spending_trend' (для чтения файла по частям).
+    :param current_datetime: Строка с датой и временем в формате 'YYYY-MM-DD HH:MM:SS'.
+    :return: Функция, оставляющая операции с 'history_start' по текущую дату.
+    """
+    start = np.datetime64(history_start(current_datetime), "D")
+    end = np.datetime64(current_datetime[:10], "D")
+
+    def keep(transactions: pd.DataFrame) -> pd.DataFrame:
+        days = operation_days(transactions["Дата операции"]).to_numpy().astype("datetime64[D]")
+        kept: pd.DataFrame = transactions[(days >= start) & (days <= end)]
+        return kept
+
+    return keep
+
+
+def spending_trend(transactions: pd.DataFrame, current_datetime: str) -> Dict:
+    """
+    Раздел главной страницы: траты по дням текущего месяца со скользящими средними за 7 и 30 дней
+    и сравнение трат с начала месяца с тем же периодом предыдущего месяца.
+    :param transactions: DataFrame с данными о транзакциях (не только за текущий месяц).
+    :param current_datetime: Строка с датой и временем в формате 'YYYY-MM-DD HH:MM:SS'.
+    :return: Словарь {"daily": [...], "month_to_date": {"current", "previous", "delta", "delta_pct"}}.
+    """
+    current = date.fromisoformat(current_datetime[:10])
+    month_start = current.replace(day=1)
+    previous_start = _previous_month_start(month_start)
+    # Тот же день предыдущего месяца, если он в нём есть, иначе его последний день
+    previous_end = min(previous_start + timedelta(days=current.day - 1), month_start - timedelta(days=1))
+
+    start = history_start(current_datetime)
+    spent, _ = _daily_totals(*_spending_days(transactions), start, current)
+    cumulative = np.concatenate([[0.0], np.cumsum(spent)])
+
+    def period_total(first: date, last: date) -> float:
+        return round(float(cumulative[(last - start).days + 1] - cumulative[(first - start).days]), 2)
+
+    current_total = period_total(month_start, current)
+    previous_total = period_total(previous_start, previous_end)
+    delta = round(current_total - previous_total, 2)
+
+    offset = (month_start - start).days
+    daily = pd.DataFrame(
+        {"date": pd.date_range(month_start, current).strftime("%Y-%m-%d"), "spent": spent[offset:].round(2)}
+    )
+    for window in ROLLING_WINDOWS:
+        daily[f"ma_{window}"] = rolling_mean(spent, window)[offset:].round(2)
+    return {
+        "daily": daily.to_dict(orient="records"),
+        "month_to_date": {
+            "current": current_total,
+            "previous": previous_total,
+            "delta": delta,
+            "delta_pct": round(delta / previous_total * 100, 2) if previous_total else None,
+        },
+    }
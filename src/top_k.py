@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import heapq
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.common import failed_mask
+from src.dates import parse_operation_dates
+from src.lazy import lazy_import
+from src.logger_config import add_logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+# Настройка логирования
+logger = add_logger("top_k.log", "top_k")
+
+RESULT_COLUMNS = {
+    "Дата операции": "date",
+    "Сумма операции": "amount",
+    "Категория": "category",
+    "Описание": "description",
+}
+FILL_VALUES = {"date": "N/A", "amount": 0, "category": "Неизвестно", "description": "Без описания"}
+
+# Элемент кучи: (сумма траты, -порядковый номер строки, строка результата).
+# Номер строки уникален, поэтому при равных суммах выше оказывается более ранняя транзакция, как в 'nsmallest'.
+Entry = Tuple[float, int, tuple]
+
+
+def _group_key(value: object) -> object:
+    """Приводит пропуски (None, NaN) к одному ключу None."""
+    return None if pd.isna(value) else value
+
+
+class StreamingTopK:
+    """
+    Потоковый поиск N самых затратных транзакций.
+    Данные подаются частями через 'update'; в памяти хранится только куча из N строк на каждую группу.
+    За один проход можно получить общий топ и топ по нескольким столбцам (например, по картам и категориям).
+    """
+
+    def __init__(self, n: int = 5, group_by: Sequence[str] = ()) -> None:
+        """
+        :param n: Количество транзакций в топе.
+        :param group_by: Столбцы, для значений которых нужен отдельный топ (например, "Номер карты").
+        """
+        if n < 1:
+            raise ValueError(f"Размер топа должен быть положительным, получено {n}.")
+        self.n = n
+        self.group_by = tuple(group_by)
+        self.rows_seen = 0
+        self._heap: List[Entry] = []
+        self._groups: Dict[str, Dict[object, List[Entry]]] = {column: {} for column in self.group_by}
+
+    def _push(self, heap: List[Entry], entry: Entry) -> None:
+        if len(heap) < self.n:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    def update(self, chunk: pd.DataFrame) -> StreamingTopK:
+        """
+        Учитывает очередную порцию транзакций.
+        Кандидаты в топ отбираются векторно, в кучу попадают не более N строк порции на каждую группу.
+        :param chunk: DataFrame с транзакциями.
+        :return: Этот же объект, чтобы вызовы можно было объединять в цепочку.
+        """
+        offset = self.rows_seen
+        self.rows_seen += len(chunk)
+        if chunk.empty:
+            return self
+
+        amounts = pd.to_numeric(chunk["Сумма операции"], errors="coerce").fillna(0).to_numpy()
+        mask = amounts < 0
+        if "Статус" in chunk.columns:
+            mask &= ~failed_mask(chunk["Статус"])
+
+        positions = np.flatnonzero(mask)
+        if not len(positions):
+            return self
+
+        # Позиции уже возрастают, поэтому устойчивая сортировка сохраняет порядок строк при равных суммах
+        positions = positions[np.argsort(amounts[positions], kind="stable")]
+        columns = [chunk[column].to_numpy() if column in chunk.columns else None for column in RESULT_COLUMNS]
+
+        def entry(position: int) -> Entry:
+            row = tuple(
+                amounts[position] if name == "Сумма операции" else (None if values is None else values[position])
+                for name, values in zip(RESULT_COLUMNS, columns)
+            )
+            return -amounts[position], -(offset + position), row
+
+        for position in positions[: self.n]:
+            self._push(self._heap, entry(position))
+
+        for column in self.group_by:
+            keys = chunk[column].to_numpy()[positions]
+            first_n = pd.Series(keys).groupby(keys, sort=False, dropna=False).cumcount().to_numpy() < self.n
+            groups = self._groups[column]
+            for key, position in zip(keys[first_n], positions[first_n]):
+                self._push(groups.setdefault(_group_key(key), []), entry(position))
+
+        return self
+
+    @staticmethod
+    def _to_frame(heap: List[Entry]) -> pd.DataFrame:
+        if not heap:
+            return pd.DataFrame()
+        rows = [row for _, _, row in sorted(heap, reverse=True)]
+        return pd.DataFrame(rows, columns=list(RESULT_COLUMNS.values())).fillna(FILL_VALUES)
+
+    def top(self) -> pd.DataFrame:
+        """
+        :return: DataFrame со столбцами date, amount, category, description, отсортированный по убыванию трат.
+                 Если подходящих операций нет, возвращает пустой DataFrame.
+        """
+        return self._to_frame(self._heap)
+
+    def top_by(self, column: str) -> Dict[object, pd.DataFrame]:
+        """
+        :param column: Один из столбцов, переданных в 'group_by'.
+        :return: Словарь {значение столбца: DataFrame с топом}. Пропуски в столбце собираются под ключом None.
+        """
+        return {key: self._to_frame(heap) for key, heap in self._groups[column].items()}
+
+
+class MonthToDateTopK:
+    """
+    Топ трат с начала месяца, который обновляется по мере поступления новых транзакций.
+    В 'update' передаются только новые транзакции; при смене месяца топ начинается заново.
+    """
+
+    def __init__(self, n: int = 5, group_by: Sequence[str] = ()) -> None:
+        self.n = n
+        self.group_by = tuple(group_by)
+        self.month: Optional[Tuple[int, int]] = None
+        self.top_k = StreamingTopK(n, self.group_by)
+
+    def update(self, transactions: pd.DataFrame, current_date: str) -> StreamingTopK:
+        """
+        Добавляет новые транзакции, совершённые с начала месяца по текущую дату включительно.
+        :param transactions: DataFrame с новыми транзакциями.
+        :param current_date: Текущая дата в формате ISO-8601.
+        :return: Актуальный StreamingTopK за текущий месяц.
+        """
+        today = pd.Timestamp(current_date)
+        if not isinstance(today, pd.Timestamp):
+            raise ValueError(f"Некорректная текущая дата: '{current_date}'.")
+        today = today.normalize()
+        if (today.year, today.month) != self.month:
+            logger.info("Начат новый месяц %s-%02d: топ транзакций сброшен.", today.year, today.month)
+            self.month = (today.year, today.month)
+            self.top_k = StreamingTopK(self.n, self.group_by)
+
+        dates = parse_operation_dates(transactions["Дата операции"])
+        mask = (dates >= today.replace(day=1)) & (dates < today + pd.Timedelta(days=1))
+
+        self.top_k.update(transactions[mask.to_numpy()])
+        logger.info("Добавлено %s транзакций за текущий месяц.", int(mask.sum()))
+        return self.top_k
+
+    def top(self) -> pd.DataFrame:
+        """Возвращает текущий топ трат с начала месяца."""
+        return self.top_k.top()
@@ -1,14 +1,32 @@
+from __future__ import annotations
+
+import csv
 from datetime import datetime
-from typing import Dict, List, Union
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Sequence, Union
 
-import pandas as pd
+import numpy as np
 
+from src.cashback_rules import CashbackRules
+from src.cube import SpendingCube
+from src.dates import DateIndex, parse_operation_dates
+from src.lazy import is_dataframe, lazy_import
 from src.logger_config import add_logger
+from src.memory import DEFAULT_CHUNK_ROWS, exceeds_budget, memory_budget
+from src.metrics import timed, track_stage
+from src.quantiles import SpendingDistribution
+from src.top_k import StreamingTopK
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
 
 # Настройка логирования
 logger = add_logger("utils.log", "utils")
 
 
+@timed()
 def transaction_parser(file_path: str, as_dataframe: bool = True) -> Union[List[Dict], pd.DataFrame]:
     """
     Функция для загрузки списка транзакций из файла 'XLSX' формата. При возникновении ошибки возвращает пустой список.
@@ -17,14 +35,16 @@ def transaction_parser(file_path: str, as_dataframe: bool = True) -> Union[List[
     :return: DataFrame или List[Dict] с транзакциями.
     """
     try:
-        logger.info(f"Вызов функции 'transaction_parser' с параметром '{file_path}'")
+        logger.info("Вызов функции 'transaction_parser' с параметром '%s'", file_path)
+        if exceeds_budget(file_path, memory_budget()):
+            logger.warning("Файл '%s' загружается целиком (по частям — 'load_transactions').", file_path)
         if file_path.endswith("xlsx"):
             transactions = pd.read_excel(file_path)
         else:
-            logger.error(f"Неподдерживаемый формат файла '{file_path}'")
+            logger.error("Неподдерживаемый формат файла '%s'", file_path)
             return []
 
-        logger.info(f"Файл '{file_path}' успешно загружен. Найдено {len(transactions)} операций")
+        logger.info("Файл '%s' успешно загружен. Найдено %s операций", file_path, len(transactions))
 
         if as_dataframe:
             return transactions
@@ -32,16 +52,162 @@ def transaction_parser(file_path: str, as_dataframe: bool = True) -> Union[List[
             return transactions.to_dict(orient="records")
 
     except FileNotFoundError:
-        logger.error(f"Файл по пути '{file_path}' не найден", exc_info=True)
+        logger.error("Файл по пути '%s' не найден", file_path, exc_info=True)
         return []
     except pd.errors.EmptyDataError:
-        logger.warning(f"Файл '{file_path}' пустой.", exc_info=True)
+        logger.warning("Файл '%s' пустой.", file_path, exc_info=True)
+        return []
+    except Exception as e:
+        logger.error("Произошла ошибка при обработке файла '%s': %s", file_path, e, exc_info=True)
+        return []
+
+
+def _csv_value(value: str) -> Union[str, float, None]:
+    """Приводит значение из CSV к числу, если это возможно. Пустая строка становится None."""
+    if value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+@timed()
+def read_transaction_records(file_path: str) -> List[Dict]:
+    """
+    Загружает транзакции из файла 'XLSX' или 'CSV' в виде списка словарей без использования pandas.
+    Подходит для коротких запусков (например, поиска из командной строки), где импорт pandas дороже самой обработки.
+    Пустые ячейки становятся None.
+    :param file_path: Путь до файла с транзакциями.
+    :return: Список словарей с транзакциями. При возникновении ошибки возвращает пустой список.
+    """
+    try:
+        logger.info("Вызов функции 'read_transaction_records' с параметром '%s'", file_path)
+        if file_path.endswith("xlsx"):
+            import openpyxl
+
+            workbook = openpyxl.load_workbook(file_path, read_only=True)
+            try:
+                rows = workbook.active.iter_rows(values_only=True)
+                header = next(rows, None) or ()
+                transactions = [dict(zip(header, row)) for row in rows]
+            finally:
+                workbook.close()
+        elif file_path.endswith("csv"):
+            with open(file_path, encoding="utf-8", newline="") as file:
+                transactions = [{key: _csv_value(value) for key, value in row.items()} for row in csv.DictReader(file)]
+        else:
+            logger.error("Неподдерживаемый формат файла '%s'", file_path)
+            return []
+
+        logger.info("Файл '%s' успешно загружен. Найдено %s операций", file_path, len(transactions))
+        return transactions
+
+    except FileNotFoundError:
+        logger.error("Файл по пути '%s' не найден", file_path, exc_info=True)
         return []
     except Exception as e:
-        logger.error(f"Произошла ошибка при обработке файла '{file_path}': {e}", exc_info=True)
+        logger.error("Произошла ошибка при обработке файла '%s': %s", file_path, e, exc_info=True)
         return []
 
 
+def _excel_chunk(rows: List[tuple], header: tuple) -> pd.DataFrame:
+    """Собирает DataFrame из строк листа с теми же типами столбцов, что и 'pd.read_excel'."""
+    chunk = pd.DataFrame.from_records(rows, columns=header)
+    for column in chunk.columns:
+        values = chunk[column]
+        if values.dtype == object:
+            chunk[column] = values.where(values.notna(), np.nan)
+        elif values.dtype == "float64" and values.notna().all() and (values % 1 == 0).all():
+            chunk[column] = values.astype("int64")
+    return chunk
+
+
+def iter_transaction_chunks(file_path: str, chunk_size: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Читает транзакции из файла 'XLSX' или 'CSV' по частям, не загружая файл целиком.
+    :param file_path: Путь до файла с транзакциями.
+    :param chunk_size: Количество строк в одной части.
+    :return: Итератор DataFrame с транзакциями.
+    """
+    if file_path.endswith("xlsx"):
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(file_path, read_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None) or ()
+            while chunk := list(islice(rows, chunk_size)):
+                yield _excel_chunk(chunk, header)
+        finally:
+            workbook.close()
+    elif file_path.endswith("csv"):
+        yield from pd.read_csv(file_path, chunksize=chunk_size)
+    else:
+        logger.error("Неподдерживаемый формат файла '%s'", file_path)
+
+
+def read_transactions_chunked(
+    file_path: str,
+    chunk_filter: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    chunk_size: int = DEFAULT_CHUNK_ROWS,
+) -> pd.DataFrame:
+    """
+    Читает файл с транзакциями по частям и оставляет от каждой части только строки, отобранные 'chunk_filter'
+    (например, транзакции нужного месяца), поэтому в памяти одновременно находятся одна часть и результат.
+    :param file_path: Путь до файла с транзакциями в формате 'XLSX' или 'CSV'.
+    :param chunk_filter: Построчный фильтр: результат должен совпадать с применением фильтра к файлу целиком.
+    :param chunk_size: Количество строк в одной части.
+    :return: DataFrame с отобранными транзакциями. При возникновении ошибки возвращает пустой DataFrame.
+    """
+    try:
+        with track_stage("read_transactions_chunked") as stage:
+            parts, rows = [], 0
+            for chunk in iter_transaction_chunks(file_path, chunk_size):
+                rows += len(chunk)
+                parts.append(chunk_filter(chunk) if chunk_filter else chunk)
+            stage["rows"] = rows
+        transactions = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+        logger.info(
+            "Файл '%s' обработан по частям: прочитано %s операций, отобрано %s.", file_path, rows, len(transactions)
+        )
+        return transactions
+    except FileNotFoundError:
+        logger.error("Файл по пути '%s' не найден", file_path, exc_info=True)
+        return pd.DataFrame()
+    except Exception as e:
+        logger.error("Произошла ошибка при обработке файла '%s': %s", file_path, e, exc_info=True)
+        return pd.DataFrame()
+
+
+def load_transactions(
+    file_path: str,
+    budget: Optional[int] = None,
+    chunk_filter: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    chunk_size: int = DEFAULT_CHUNK_ROWS,
+) -> pd.DataFrame:
+    """
+    Загружает транзакции с учётом бюджета памяти: файл, не помещающийся в бюджет,
+    читается по частям через 'read_transactions_chunked', иначе загружается целиком без фильтрации.
+    :param file_path: Путь до файла с транзакциями в формате 'XLSX' или 'CSV'.
+    :param budget: Бюджет памяти в байтах (по умолчанию — переменная окружения MEMORY_BUDGET_MB).
+    :param chunk_filter: Построчный фильтр, применяемый к частям файла при чтении по частям.
+    :param chunk_size: Количество строк в одной части.
+    :return: DataFrame с транзакциями. При возникновении ошибки возвращает пустой DataFrame.
+    """
+    budget = memory_budget() if budget is None else budget
+    if exceeds_budget(file_path, budget):
+        return read_transactions_chunked(file_path, chunk_filter, chunk_size)
+    if file_path.endswith("csv"):
+        try:
+            return pd.read_csv(file_path)
+        except Exception as e:
+            logger.error("Произошла ошибка при обработке файла '%s': %s", file_path, e, exc_info=True)
+            return pd.DataFrame()
+    transactions = transaction_parser(file_path)
+    return transactions if is_dataframe(transactions) else pd.DataFrame()
+
+
 def get_greeting() -> str:
     """
     Функция подбирает необходимое приветствие в соответствии с текущим временем суток.
@@ -49,7 +215,7 @@ def get_greeting() -> str:
     """
     try:
         current_hour = datetime.now().hour
-        logger.info(f"Определение приветствия. Текущее время: {current_hour}:00")
+        logger.info("Определение приветствия. Текущее время: %s:00", current_hour)
 
         if 6 <= current_hour < 12:
             greeting = "Доброе утро"
@@ -60,28 +226,30 @@ def get_greeting() -> str:
         else:
             greeting = "Доброй ночи"
 
-        logger.info(f"Определено приветствие: '{greeting}'.")
+        logger.info("Определено приветствие: '%s'.", greeting)
         return greeting
 
     except Exception as e:
-        logger.error(f"Ошибка при определении приветствия: {e}.", exc_info=True)
+        logger.error("Ошибка при определении приветствия: %s.", e, exc_info=True)
         return "Ошибка: невозможно определить время"
 
 
-def filter_transactions_by_month(transactions: pd.DataFrame, current_date: str) -> pd.DataFrame:
+def filter_transactions_by_month(transactions: Union[pd.DataFrame, DateIndex], current_date: str) -> pd.DataFrame:
     """
     Отфильтровывает транзакции, совершённые с начала месяца по текущую дату.
-    :param transactions: DataFrame с данными о транзакциях.
+    Окно выбирается бинарным поиском по индексу дат; для многих запросов передайте готовый индекс (DateIndex).
+    :param transactions: DataFrame с данными о транзакциях или индекс по датам (DateIndex).
                         Столбец "Дата операции" должен содержать дату в формате '%d.%m.%Y %H:%M:%S'.
     :param current_date: Строка с текущей датой в формате ISO-8601.
     :return: Отфильтрованный DataFrame с транзакциями за текущий месяц. В случае ошибки возвращает пустой DataFrame.
     """
     logger.info(
-        f"""Вызов функции 'filter_transactions_by_month' с параметром '{current_date}'.
-Количество полученных транзакций: {len(transactions)}."""
+        "Вызов функции 'filter_transactions_by_month' с параметром '%s'. Количество полученных транзакций: %s.",
+        current_date,
+        len(transactions),
     )
 
-    if not isinstance(transactions, pd.DataFrame):
+    if not is_dataframe(transactions) and not isinstance(transactions, DateIndex):
         logger.error("Ошибка: Ожидается DataFrame в качестве входных данных.")
         return pd.DataFrame()
 
@@ -89,89 +257,83 @@ def filter_transactions_by_month(transactions: pd.DataFrame, current_date: str)
     start_date = today_date.replace(day=1)
 
     try:
-        transactions["Дата операции"] = pd.to_datetime(transactions["Дата операции"], format="%d.%m.%Y %H:%M:%S")
+        if is_dataframe(transactions):
+            # Разобранные даты сохраняются в DataFrame: следующие этапы не разбирают строки повторно
+            transactions["Дата операции"] = parse_operation_dates(transactions["Дата операции"], errors="raise")
+        filtered_transactions = DateIndex.of(transactions).between_days(start_date, today_date)
 
-        filtered_transactions = transactions[
-            (transactions["Дата операции"].dt.date >= start_date)
-            & (transactions["Дата операции"].dt.date <= today_date)
-        ]
-
-        logger.info(f"Количество транзакций после фильтрации: {len(filtered_transactions)}.")
+        logger.info("Количество транзакций после фильтрации: %s.", len(filtered_transactions))
         return filtered_transactions
 
     except Exception as e:
-        logger.error(f"Ошибка при фильтрации транзакций: {e}.", exc_info=True)
+        logger.error("Ошибка при фильтрации транзакций: %s.", e, exc_info=True)
         return pd.DataFrame()
 
 
-def cost_analysis(transactions: pd.DataFrame) -> pd.DataFrame:
+def cost_analysis(
+    transactions: Union[pd.DataFrame, SpendingCube],
+    rules: Optional[CashbackRules] = None,
+    percentiles: Sequence[float] = (),
+    distribution: Optional[SpendingDistribution] = None,
+) -> pd.DataFrame:
     """
     Функция группирует траты по картам.
-    :param transactions: DataFrame с данными о транзакциях.
+    :param transactions: DataFrame с данными о транзакциях или уже построенный куб трат (SpendingCube).
+    :param rules: Правила начисления кэшбэка (по умолчанию — 1% на все траты). Для готового куба не используются.
+    :param percentiles: Уровни процентилей суммы траты по карте (например, (0.5, 0.9, 0.99)).
+                        Добавляются столбцами 'p50', 'p90', 'p99'.
+    :param distribution: Готовое распределение трат (SpendingDistribution). Для куба процентили считаются
+                         только по нему, для DataFrame по умолчанию строится скетч.
     :return: DataFrame с информацией о картах. В случае ошибки возвращает пустой DataFrame.
     """
-    logger.info(f"Вызов функции 'cost_analysis'. Количество полученных транзакций: {len(transactions)}.")
+    logger.info("Вызов функции 'cost_analysis'. Количество полученных транзакций: %s.", len(transactions))
     try:
-        transactions["Сумма операции"] = pd.to_numeric(transactions["Сумма операции"], errors="coerce").fillna(0)
-        transactions["Номер карты"] = transactions["Номер карты"].astype(str)
-
-        spending_transactions = transactions[transactions["Сумма операции"] < 0].copy()
-        spending_transactions["last_digits"] = spending_transactions["Номер карты"].fillna("N/A").astype(str).str[-4:]
-
-        card_summary = spending_transactions.groupby("last_digits", as_index=False)["Сумма операции"].sum()
-        card_summary["Сумма операции"] = card_summary["Сумма операции"].abs()
-        card_summary["cashback"] = card_summary["Сумма операции"] * 0.01
-
-        result = card_summary.rename(columns={"Сумма операции": "total_spent"})
-
-        logger.info(f"Обработано карт: {len(result)}.")
+        if isinstance(transactions, SpendingCube):
+            cube = transactions
+        else:
+            cube = SpendingCube.from_transactions(transactions, rules)
+        result = cube.card_totals()
+
+        if percentiles:
+            if distribution is None and not isinstance(transactions, SpendingCube):
+                distribution = SpendingDistribution.from_transactions(transactions)
+            if distribution is None:
+                logger.warning("Для куба трат процентили считаются только по готовому распределению.")
+            else:
+                card_percentiles = distribution.percentiles("card", percentiles).drop(columns="count")
+                result = result.merge(card_percentiles, how="left", left_on="last_digits", right_on="card")
+                result = result.drop(columns="card")
+
+        logger.info("Обработано карт: %s.", len(result))
         return result
 
     except Exception as e:
-        logger.error(f"Ошибка при анализе расходов по картам: {e}.", exc_info=True)
+        logger.error("Ошибка при анализе расходов по картам: %s.", e, exc_info=True)
         return pd.DataFrame()
 
 
-def get_top_transactions(transactions: pd.DataFrame) -> pd.DataFrame:
+def get_top_transactions(transactions: pd.DataFrame, n: int = 5) -> pd.DataFrame:
     """
-    Функция для подсчёта 5-ти самых затратных транзакций.
+    Функция для подсчёта N самых затратных транзакций (без учёта операций со статусом 'FAILED').
     :param transactions: DataFrame с данными о транзакциях.
-    :return: DataFrame с данными о 5-ти самых затратных транзакциях. В случае ошибки возвращает пустой DataFrame.
+    :param n: Количество транзакций в топе.
+    :return: DataFrame с данными о N самых затратных транзакциях. В случае ошибки возвращает пустой DataFrame.
     """
-    logger.info(f"Вызов функции 'get_top_transactions'. Количество полученных транзакций: {len(transactions)}.")
+    logger.info(
+        "Вызов функции 'get_top_transactions' с параметром n - %s. Количество полученных транзакций: %s.",
+        n,
+        len(transactions),
+    )
     try:
-        transactions["Сумма операции"] = pd.to_numeric(transactions["Сумма операции"], errors="coerce").fillna(0)
-
-        spending_transactions = transactions[
-            (transactions["Сумма операции"] < 0) & (transactions["Статус"].str.upper() != "FAILED")
-        ]
+        result = StreamingTopK(n).update(transactions).top()
 
-        if spending_transactions.empty:
+        if result.empty:
             logger.warning("Не найдено ни одной подходящей операции.")
-            return pd.DataFrame()
-
-        top_5_transactions = spending_transactions.nsmallest(5, "Сумма операции")
-
-        result = top_5_transactions[["Дата операции", "Сумма операции", "Категория", "Описание"]].copy()
-
-        result["Дата операции"] = result["Дата операции"].fillna("N/A")
-        result["Сумма операции"] = result["Сумма операции"].fillna(0)
-        result["Категория"] = result["Категория"].fillna("Неизвестно")
-        result["Описание"] = result["Описание"].fillna("Без описания")
-
-        result.rename(
-            columns={
-                "Дата операции": "date",
-                "Сумма операции": "amount",
-                "Категория": "category",
-                "Описание": "description",
-            },
-            inplace=True,
-        )
+            return result
 
-        logger.info(f"Топ-5 транзакций успешно сформирован. Количество: {len(result)}.")
+        logger.info("Топ-%s транзакций успешно сформирован. Количество: %s.", n, len(result))
         return result
 
     except Exception as e:
-        logger.error(f"Ошибка в 'get_top_transactions': {e}.", exc_info=True)
+        logger.error("Ошибка в 'get_top_transactions': %s.", e, exc_info=True)
         return pd.DataFrame()
@@ -1,101 +1,275 @@
+from __future__ import annotations
+
+import asyncio
 import json
 import os
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
-import pandas as pd
-
-from src.external_api import currency_exchanger, stock_exchanger
+from src.async_api import AsyncRunner, get_runner
+from src.cashback_rules import CashbackRules
+from src.dates import parse_operation_dates
+from src.external_api import currency_exchanger, currency_exchanger_async, stock_exchanger, stock_exchanger_async
+from src.lazy import lazy_import
 from src.logger_config import add_logger
+from src.memory import exceeds_budget, memory_budget
+from src.metrics import peak_rss_bytes, timed, track_stage
+from src.serialization import dumps, to_records
+from src.timeseries import history_filter, spending_trend
 from src.utils import (cost_analysis, filter_transactions_by_month, get_greeting, get_top_transactions,
-                       transaction_parser)
+                       read_transactions_chunked, transaction_parser)
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
 
 # Настройка логирования
 logger = add_logger("views.log", "views")
 
 path_project = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
+DEFAULT_TRANSACTIONS = os.path.join("data", "operations.xlsx")
+DEFAULT_SETTINGS = {"user_currencies": ["USD", "EUR"], "user_stocks": ["INTC", "NVDA"]}
+
 
-def convert_timestamps(obj):
+def load_user_settings(settings_path: Optional[str] = None) -> Dict:
     """
-    Рекурсивно конвертирует pandas.Timestamp в строки внутри списка или словаря.
+    Загружает пользовательские настройки. Если файл не найден, возвращает настройки по умолчанию.
+    :param settings_path: Путь до файла настроек (по умолчанию 'user_settings.json' в корне проекта).
+    :return: Словарь с настройками пользователя.
     """
-    if isinstance(obj, pd.Timestamp):
-        return obj.strftime("%Y-%m-%d %H:%M:%S")
-    if isinstance(obj, list):
-        return [convert_timestamps(item) for item in obj]
-    if isinstance(obj, dict):
-        return {key: convert_timestamps(value) for key, value in obj.items()}
-    return obj
+    settings_path = os.path.join(path_project, settings_path or "user_settings.json")
+    try:
+        with open(settings_path) as file:
+            user_settings: Dict = json.load(file)
+        logger.info("Файл '%s' успешно загружен.", settings_path)
+    except FileNotFoundError:
+        logger.warning("Файл '%s' не найден. Используются настройки по умолчанию.", settings_path)
+        user_settings = dict(DEFAULT_SETTINGS)
+    return user_settings
 
 
-def main_view(current_datetime: str, transactions_path: str = None) -> str:
+def _transaction_sections(
+    current_datetime: str, transactions_path: Optional[str], user_settings: Dict
+) -> Tuple[List, List, Dict]:
     """
-    Главная функция обработки данных и формирования JSON-ответа.
-    :param current_datetime: Строка с датой и временем в формате 'YYYY-MM-DD HH:MM:SS'.
-    :param transactions_path: Путь до файла с транзакциями.
-    :return: JSON-ответ с анализом транзакций, курсами валют и акциями.
+    Загружает транзакции и формирует разделы главной страницы, которые зависят только от них.
+    Если файл не помещается в бюджет памяти (ключ "memory_budget_mb" настроек или переменная окружения
+    MEMORY_BUDGET_MB), он читается по частям и в памяти остаются только транзакции, нужные разделам:
+    с начала предыдущего месяца (или окна скользящего среднего) по текущую дату.
+    :return: Расходы по картам, топ транзакций и динамика трат.
     """
-    try:
-        logger.info("Начало работы приложения.")
+    # Загрузка транзакций в DataFrame
+    transactions_path = os.path.join(path_project, transactions_path or DEFAULT_TRANSACTIONS)
+    with track_stage("main_view.load_transactions") as stage:
+        if exceeds_budget(transactions_path, memory_budget(user_settings)):
+            transactions = read_transactions_chunked(transactions_path, history_filter(current_datetime))
+        else:
+            transactions = transaction_parser(transactions_path, as_dataframe=True).copy()
+        stage["rows"] = len(transactions)
+    logger.info("Транзакции успешно загружены. Размер: %s.", transactions.shape)
 
-        # Определение путей
-        settings_path = os.path.join(path_project, "user_settings.json")
-        transactions_path = os.path.join(path_project, transactions_path)
+    return dashboard_sections(transactions, current_datetime, user_settings)
 
-        # Загрузка пользовательских настроек
-        try:
-            with open(settings_path) as file:
-                user_settings = json.load(file)
-            logger.info("Файл 'user_settings.json' успешно загружен.")
-        except FileNotFoundError:
-            logger.warning("Файл 'user_settings.json' не найден. Используются настройки по умолчанию.")
-            user_settings = {"user_currencies": ["USD", "EUR"], "user_stocks": ["INTC", "NVDA"]}
 
-        user_currencies = user_settings.get("user_currencies", [])
-        user_stocks = user_settings.get("user_stocks", [])
+def dashboard_sections(
+    transactions: pd.DataFrame, current_datetime: str, user_settings: Dict
+) -> Tuple[List, List, Dict]:
+    """
+    Формирует разделы главной страницы по уже загруженным транзакциям.
+    :param transactions: DataFrame с данными о транзакциях (не изменяется).
+    :param current_datetime: Строка с датой и временем в формате 'YYYY-MM-DD HH:MM:SS'.
+    :param user_settings: Пользовательские настройки.
+    :return: Расходы по картам и топ транзакций в виде списков словарей и динамика трат по дням.
+    """
+    transactions = transactions.copy()
+
+    # Даты разбираются один раз, следующие этапы используют столбец datetime64.
+    # Если в файле есть некорректные даты, столбец остаётся строковым и их обрабатывает фильтр по месяцу.
+    with track_stage("main_view.parse_dates", len(transactions)):
+        try:
+            transactions["Дата операции"] = parse_operation_dates(transactions["Дата операции"], errors="raise")
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning("Не удалось разобрать даты операций: %s.", e)
 
-        # Загрузка транзакций в DataFrame
-        transactions = transaction_parser(transactions_path, as_dataframe=True).copy()
-        logger.info(f"Транзакции успешно загружены. Размер: {transactions.shape}.")
+    # Траты по дням со скользящими средними и сравнение с предыдущим месяцем
+    with track_stage("main_view.spending_trend", len(transactions)):
+        trend = spending_trend(transactions, current_datetime)
 
-        # Фильтрация транзакций за текущий месяц
+    # Фильтрация транзакций за текущий месяц
+    with track_stage("main_view.filter_by_month", len(transactions)):
         monthly_transactions = filter_transactions_by_month(transactions, current_datetime).copy()
-        logger.info(f"Транзакции успешно отфильтрованы за месяц. Размер: {monthly_transactions.shape}.")
+    logger.info("Транзакции успешно отфильтрованы за месяц. Размер: %s.", monthly_transactions.shape)
 
-        # Анализ расходов по картам
-        card_spends = cost_analysis(monthly_transactions).copy()
+    # Анализ расходов по картам
+    with track_stage("main_view.cost_analysis", len(monthly_transactions)):
+        cashback_rules = CashbackRules.from_config(user_settings.get("cashback_rules"))
+        percentiles = user_settings.get("spending_percentiles", ())
+        card_spends = cost_analysis(monthly_transactions, cashback_rules, percentiles).copy()
         card_spends["last_digits"] = card_spends["last_digits"].fillna("N/A")  # Обработка NaN
-        logger.info(f"Расходы по картам успешно подсчитаны. Размер: {card_spends.shape}.")
+    logger.info("Расходы по картам успешно подсчитаны. Размер: %s.", card_spends.shape)
 
-        # Составление топа транзакций
-        top_transactions = get_top_transactions(monthly_transactions).copy()
-        logger.info(f"Топ транзакций успешно составлен. Размер: {top_transactions.shape}.")
+    # Составление топа транзакций
+    with track_stage("main_view.top_transactions", len(monthly_transactions)):
+        top_transactions = get_top_transactions(
+            monthly_transactions, user_settings.get("top_transactions_count", 5)
+        ).copy()
+    logger.info("Топ транзакций успешно составлен. Размер: %s.", top_transactions.shape)
 
-        # Получение курсов валют и акций
-        currency_rates = currency_exchanger(user_currencies)
-        logger.info(f"Курсы валют успешно получены. Количество: {len(currency_rates)}.")
+    return to_records(card_spends), to_records(top_transactions), trend
 
-        stock_rates = stock_exchanger(user_stocks)
-        logger.info(f"Курсы акций успешно получены. Количество: {len(stock_rates)}.")
 
-        # Формирование JSON-ответа с конвертацией Timestamp
+def dashboard_response(
+    cards: List,
+    top_transactions: List,
+    trend: Dict,
+    currency_rates: List,
+    stock_rates: List,
+    compact: bool = False,
+) -> str:
+    """
+    Формирует JSON-ответ главной страницы из готовых разделов; даты уже отформатированы на уровне столбцов.
+    :return: JSON-ответ главной страницы.
+    """
+    with track_stage("main_view.serialize"):
         response = {
             "greeting": get_greeting(),
-            "cards": card_spends.to_dict(orient="records"),
-            "top_transactions": top_transactions.to_dict(orient="records"),
+            "cards": cards,
+            "top_transactions": top_transactions,
+            "spending_trend": trend,
             "currency_rates": currency_rates,
             "stock_rates": stock_rates,
         }
-        response = convert_timestamps(response)  # Конвертация Timestamps
 
-        result = json.dumps(response, ensure_ascii=False, indent=4)
-        logger.info("JSON-ответ успешно сформирован.")
-        return result
+        result = dumps(response, compact)
+    logger.info("JSON-ответ успешно сформирован.")
+    return result
+
+
+def build_main_view(
+    current_datetime: str,
+    transactions_path: Optional[str] = None,
+    settings_path: Optional[str] = None,
+    currency_rates: Optional[List[Dict]] = None,
+    stock_rates: Optional[List[Dict]] = None,
+    compact: bool = False,
+) -> str:
+    """
+    Формирует JSON-ответ главной страницы. В отличие от 'main_view', ошибки не перехватываются,
+    поэтому вызывающий код (например, пакетная обработка) может отличить сбой от готового ответа.
+    Параметры совпадают с 'main_view'.
+    :return: JSON-ответ с анализом транзакций, курсами валют и акциями.
+    """
+    # Загрузка пользовательских настроек
+    with track_stage("main_view.load_settings"):
+        user_settings = load_user_settings(settings_path)
+
+    user_currencies = user_settings.get("user_currencies", [])
+    user_stocks = user_settings.get("user_stocks", [])
+
+    cards, top_transactions, trend = _transaction_sections(current_datetime, transactions_path, user_settings)
+
+    # Получение курсов валют и акций
+    with track_stage("main_view.currency_rates"):
+        if currency_rates is None:
+            currency_rates = currency_exchanger(user_currencies)
+        else:
+            currency_rates = [rate for rate in currency_rates if rate["currency"] in user_currencies]
+    logger.info("Курсы валют успешно получены. Количество: %s.", len(currency_rates))
+
+    with track_stage("main_view.stock_rates"):
+        if stock_rates is None:
+            stock_rates = stock_exchanger(user_stocks)
+        else:
+            stock_rates = [rate for rate in stock_rates if rate["stock"] in user_stocks]
+    logger.info("Курсы акций успешно получены. Количество: %s.", len(stock_rates))
+
+    return dashboard_response(cards, top_transactions, trend, currency_rates, stock_rates, compact)
+
+
+@timed()
+def main_view(
+    current_datetime: str,
+    transactions_path: Optional[str] = None,
+    settings_path: Optional[str] = None,
+    currency_rates: Optional[List[Dict]] = None,
+    stock_rates: Optional[List[Dict]] = None,
+    compact: bool = False,
+) -> str:
+    """
+    Главная функция обработки данных и формирования JSON-ответа.
+    :param current_datetime: Строка с датой и временем в формате 'YYYY-MM-DD HH:MM:SS'.
+    :param transactions_path: Путь до файла с транзакциями (по умолчанию 'data/operations.xlsx').
+    :param settings_path: Путь до файла пользовательских настроек (по умолчанию 'user_settings.json').
+    :param currency_rates: Заранее полученные курсы валют. Если переданы, API не вызывается.
+    :param stock_rates: Заранее полученные цены акций. Если переданы, API не вызывается.
+    :param compact: Если True, возвращает компактный JSON без отступов.
+    :return: JSON-ответ с анализом транзакций, курсами валют и акциями или JSON с описанием ошибки.
+    """
+    try:
+        logger.info("Начало работы приложения.")
+        return build_main_view(
+            current_datetime, transactions_path, settings_path, currency_rates, stock_rates, compact
+        )
+
+    except Exception as e:
+        logger.error("Произошла ошибка при работе программы: %s.", e, exc_info=True)
+        return dumps({"error": "Произошла ошибка при обработке запроса."}, compact)
+    finally:
+        peak_rss = peak_rss_bytes()
+        peak_rss_mb = round(peak_rss / 2**20, 1) if peak_rss is not None else None
+        logger.info("Завершение работы программы. Пиковый RSS процесса: %s МБ.", peak_rss_mb)
+
+
+@timed()
+async def main_view_async(
+    current_datetime: str,
+    transactions_path: Optional[str] = None,
+    settings_path: Optional[str] = None,
+    compact: bool = False,
+    runner: Optional[AsyncRunner] = None,
+) -> str:
+    """
+    Асинхронный вариант 'main_view' для использования внутри asyncio-приложений.
+    Разбор XLSX и расчёты выполняются в исполнителе (см. 'async_api.configure_async'), а запросы курсов валют
+    и акций — одновременно с ними, не блокируя цикл событий. При отмене задачи незавершённые запросы отменяются.
+    :param current_datetime: Строка с датой и временем в формате 'YYYY-MM-DD HH:MM:SS'.
+    :param transactions_path: Путь до файла с транзакциями (по умолчанию 'data/operations.xlsx').
+    :param settings_path: Путь до файла пользовательских настроек (по умолчанию 'user_settings.json').
+    :param compact: Если True, возвращает компактный JSON без отступов.
+    :param runner: Исполнитель (по умолчанию — 'async_api.get_runner()').
+    :return: JSON-ответ с анализом транзакций, курсами валют и акциями.
+    """
+    runner = runner or get_runner()
+    try:
+        logger.info("Начало асинхронной работы приложения.")
+        user_settings = await runner.run(load_user_settings, settings_path)
+
+        # Курсы запрашиваются, пока в исполнителе обрабатываются транзакции
+        rates = asyncio.gather(
+            currency_exchanger_async(user_settings.get("user_currencies", [])),
+            stock_exchanger_async(user_settings.get("user_stocks", [])),
+        )
+        try:
+            cards, top_transactions, trend = await runner.run(
+                _transaction_sections, current_datetime, transactions_path, user_settings
+            )
+        except BaseException:
+            rates.cancel()
+            raise
+        currency_rates, stock_rates = await rates
+        logger.info("Курсы получены. Валют: %s, акций: %s.", len(currency_rates), len(stock_rates))
+
+        return dashboard_response(cards, top_transactions, trend, currency_rates, stock_rates, compact)
 
+    except asyncio.CancelledError:
+        logger.info("Формирование ответа отменено.")
+        raise
     except Exception as e:
-        logger.error(f"Произошла ошибка при работе программы: {e}.", exc_info=True)
-        return json.dumps({"error": "Произошла ошибка при обработке запроса."}, ensure_ascii=False, indent=4)
+        logger.error("Произошла ошибка при работе программы: %s.", e, exc_info=True)
+        return dumps({"error": "Произошла ошибка при обработке запроса."}, compact)
     finally:
-        logger.info("Завершение работы программы.")
+        logger.info("Завершение асинхронной работы программы.")
 
 
 if __name__ == "__main__":
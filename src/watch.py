@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from src.external_api import currency_exchanger, stock_exchanger
+from src.lazy import is_dataframe, lazy_import
+from src.logger_config import add_logger
+from src.metrics import record_cache, track_stage
+from src.reports import category_spending
+from src.serialization import dumps, to_records
+from src.utils import read_transaction_records, transaction_parser
+from src.views import dashboard_response, dashboard_sections, load_user_settings, path_project
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+# Настройка логирования
+logger = add_logger("watch.log", "watch")
+
+TRANSACTION_EXTENSIONS = (".xlsx", ".csv")
+DASHBOARD_FILE = "dashboard.json"
+STATUS_FILE = "status.json"
+REPORTS_DIR = "reports"
+
+# Символы, недопустимые в имени файла отчёта (разделители путей и запрещённые в Windows)
+UNSAFE_FILENAME_CHARS = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+# Подпись файла: (время изменения в наносекундах, размер)
+Signature = Tuple[int, int]
+
+
+def _signature(path: str) -> Optional[Signature]:
+    """Возвращает подпись файла или None, если файла нет."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def report_filename(category: str) -> str:
+    """
+    Имя файла отчёта 'spending_by_category' для категории. Разделители путей и недопустимые символы
+    заменяются на '_', например 'Ж/д билеты' -> 'spending_by_category_Ж_д билеты.json'.
+    """
+    name = UNSAFE_FILENAME_CHARS.sub("_", category).strip(" .") or "_"
+    return f"spending_by_category_{name}.json"
+
+
+def _write_atomic(path: str, text: str) -> None:
+    """Записывает файл целиком через временный файл, чтобы читатели не видели частично записанный результат."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(temporary_path, path)
+
+
+def _load_file(path: str) -> pd.DataFrame:
+    """Загружает транзакции из файла 'XLSX' или 'CSV'. При ошибке возвращает пустой DataFrame."""
+    if path.endswith(".csv"):
+        return pd.DataFrame(read_transaction_records(path))
+    transactions = transaction_parser(path, as_dataframe=True)
+    return transactions if is_dataframe(transactions) else pd.DataFrame()
+
+
+def read_output(output_dir: str = "dashboards_data", name: str = DASHBOARD_FILE) -> str:
+    """
+    Читает готовый результат, подготовленный в режиме наблюдения (без пересчёта).
+    :param output_dir: Каталог с результатами (относительно корня проекта, если путь не абсолютный).
+    :param name: Имя файла, например 'dashboard.json' или 'reports/spending_by_category_Переводы.json'.
+    :return: Содержимое файла.
+    """
+    with open(os.path.join(path_project, output_dir, name), encoding="utf-8") as file:
+        return file.read()
+
+
+class DashboardWatcher:
+    """
+    Режим наблюдения: следит за файлом или каталогом с транзакциями и файлом настроек и после изменений
+    заново формирует главную страницу и отчёты в каталоге результатов. Читателям достаточно прочитать готовый файл.
+    Изменения определяются по времени изменения и размеру файлов и объединяются с задержкой 'debounce':
+    пересчёт начинается, когда файлы перестали меняться. Повторно загружаются только изменившиеся файлы.
+    """
+
+    def __init__(
+        self,
+        transactions_path: str,
+        settings_path: Optional[str] = None,
+        output_dir: str = "dashboards_data",
+        debounce: float = 2.0,
+        interval: float = 1.0,
+        report_categories: Optional[List[str]] = None,
+        rates_ttl: float = 3600.0,
+        compact: bool = False,
+    ) -> None:
+        """
+        :param transactions_path: Файл с транзакциями или каталог с файлами 'XLSX'/'CSV'.
+        :param settings_path: Путь до файла пользовательских настроек (по умолчанию 'user_settings.json').
+        :param output_dir: Каталог для результатов (относительно корня проекта, если путь не абсолютный).
+        :param debounce: Сколько секунд файлы не должны меняться перед пересчётом.
+        :param interval: Период проверки файлов в секундах.
+        :param report_categories: Категории для отчёта 'spending_by_category'
+                                  (по умолчанию — ключ "report_categories" в настройках).
+        :param rates_ttl: Сколько секунд курсы валют и акций используются повторно без запроса к API.
+        :param compact: Если True, результаты записываются компактным JSON.
+        """
+        self.transactions_path = os.path.join(path_project, transactions_path)
+        self.settings_path = os.path.join(path_project, settings_path or "user_settings.json")
+        self.output_dir = os.path.join(path_project, output_dir)
+        self.debounce = debounce
+        self.interval = interval
+        self.report_categories = report_categories
+        self.rates_ttl = rates_ttl
+        self.compact = compact
+
+        self.refreshes = 0
+        self._signatures: Dict[str, Signature] = {}
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._rates: Optional[Tuple[float, Tuple, List[Dict], List[Dict]]] = None
+
+    def _transaction_files(self) -> List[str]:
+        if os.path.isdir(self.transactions_path):
+            return sorted(
+                os.path.join(self.transactions_path, name)
+                for name in os.listdir(self.transactions_path)
+                if name.endswith(TRANSACTION_EXTENSIONS)
+            )
+        return [self.transactions_path]
+
+    def _snapshot(self) -> Dict[str, Signature]:
+        signatures = {path: _signature(path) for path in self._transaction_files() + [self.settings_path]}
+        return {path: signature for path, signature in signatures.items() if signature is not None}
+
+    def poll(self) -> Set[str]:
+        """
+        Проверяет файлы и запоминает их текущее состояние.
+        :return: Множество изменившихся, новых и удалённых файлов с момента предыдущей проверки.
+        """
+        snapshot = self._snapshot()
+        changed = {
+            path
+            for path in snapshot.keys() | self._signatures.keys()
+            if snapshot.get(path) != self._signatures.get(path)
+        }
+        self._signatures = snapshot
+        return changed
+
+    def _transactions(self, changed: Set[str]) -> pd.DataFrame:
+        """Объединяет транзакции всех файлов, заново загружая только изменившиеся."""
+        files = self._transaction_files()
+        for path in list(self._frames):
+            if path not in files:
+                del self._frames[path]
+        for path in files:
+            reload = path in changed or path not in self._frames
+            record_cache("watch.transactions", not reload)
+            if reload and os.path.exists(path):
+                self._frames[path] = _load_file(path)
+                logger.info("Файл '%s' загружен. Транзакций: %s.", path, len(self._frames[path]))
+
+        frames = [self._frames[path] for path in files if path in self._frames]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def _exchange_rates(self, user_settings: Dict) -> Tuple[List[Dict], List[Dict]]:
+        """Курсы валют и цены акций; повторно запрашиваются по истечении 'rates_ttl' или при смене настроек."""
+        key = (tuple(user_settings.get("user_currencies", [])), tuple(user_settings.get("user_stocks", [])))
+        now = time.monotonic()
+        rates = self._rates
+        fresh = rates is not None and rates[1] == key and now - rates[0] < self.rates_ttl
+        record_cache("watch.rates", fresh)
+        if rates is None or not fresh:
+            rates = self._rates = (now, key, currency_exchanger(list(key[0])), stock_exchanger(list(key[1])))
+        return rates[2], rates[3]
+
+    def refresh(self, changed: Optional[Set[str]] = None, current_datetime: Optional[str] = None) -> List[str]:
+        """
+        Формирует главную страницу и отчёты и записывает их в каталог результатов.
+        :param changed: Изменившиеся файлы (по умолчанию все файлы загружаются заново).
+        :param current_datetime: Дата и время в формате 'YYYY-MM-DD HH:MM:SS' (по умолчанию — текущие).
+        :return: Список записанных файлов.
+        """
+        current_datetime = current_datetime or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        changed = set(self._frames) if changed is None else changed
+        logger.info("Обновление результатов. Изменившиеся файлы: %s.", sorted(changed))
+
+        with track_stage("watch.refresh") as stage:
+            user_settings = load_user_settings(self.settings_path)
+            transactions = self._transactions(changed)
+            stage["rows"] = len(transactions)
+
+            written = []
+            cards, top_transactions, trend = dashboard_sections(transactions, current_datetime, user_settings)
+            currency_rates, stock_rates = self._exchange_rates(user_settings)
+            dashboard = dashboard_response(cards, top_transactions, trend, currency_rates, stock_rates, self.compact)
+            written.append(os.path.join(self.output_dir, DASHBOARD_FILE))
+            _write_atomic(written[-1], dashboard)
+
+            categories = self.report_categories
+            if categories is None:
+                categories = user_settings.get("report_categories", [])
+            for category in categories:
+                # Без сохранения в 'reports_data': отчёт записывается в каталог результатов
+                report = category_spending(transactions.copy(), category, current_datetime[:10])
+                written.append(os.path.join(self.output_dir, REPORTS_DIR, report_filename(category)))
+                _write_atomic(written[-1], dumps(to_records(report), self.compact))
+
+            status = {
+                "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "current_datetime": current_datetime,
+                "transactions": len(transactions),
+                "sources": sorted(self._frames),
+                "outputs": [os.path.relpath(path, self.output_dir) for path in written],
+            }
+            _write_atomic(os.path.join(self.output_dir, STATUS_FILE), dumps(status, self.compact))
+
+        self.refreshes += 1
+        logger.info("Результаты обновлены: %s.", written)
+        return written
+
+    def run(self, stop_event: Optional[threading.Event] = None, max_refreshes: Optional[int] = None) -> None:
+        """
+        Формирует результаты и затем обновляет их после каждого изменения файлов, пока не будет установлен
+        'stop_event' (или не выполнено 'max_refreshes' обновлений).
+        """
+        stop_event = stop_event or threading.Event()
+        self.poll()
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error("Ошибка при формировании результатов: %s.", e, exc_info=True)
+
+        pending: Set[str] = set()
+        last_change = 0.0
+        while not stop_event.is_set() and (max_refreshes is None or self.refreshes < max_refreshes):
+            changed = self.poll()
+            if changed:
+                pending |= changed
+                last_change = time.monotonic()
+                logger.info("Обнаружены изменения: %s.", sorted(changed))
+            elif pending and time.monotonic() - last_change >= self.debounce:
+                try:
+                    self.refresh(pending)
+                except Exception as e:
+                    logger.error("Ошибка при обновлении результатов: %s.", e, exc_info=True)
+                pending = set()
+            stop_event.wait(self.interval)
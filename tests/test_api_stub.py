@@ -0,0 +1,86 @@
+from datetime import date
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from benchmarks.api_load import run_load
+from benchmarks.api_stub import (STOCK_LATEST_PATH, StubApiServer, fixture_key, load_fixtures, save_fixtures,
+                                 stub_endpoints)
+from src.external_api import currency_exchanger, currency_timeseries, stock_exchanger
+
+
+def test_stub_replays_recorded_responses() -> None:
+    """Функции получения курсов работают с заглушкой без изменений и получают записанные ответы."""
+    with StubApiServer() as server, stub_endpoints(server):
+        currencies = currency_exchanger(["USD", "EUR"])
+        stocks = stock_exchanger(["AAPL", "NVDA"])
+
+    assert currencies == [{"currency": "USD", "rate": 91.24}, {"currency": "EUR", "rate": 98.28}]
+    assert stocks[0] == {"stock": "AAPL", "price": 188.85}
+    assert stocks[1]["stock"] == "NVDA"
+    assert server.stats["replayed"] == 3
+    assert server.stats["synthesized"] == 1
+
+
+def test_stub_synthesizes_timeseries() -> None:
+    """Незаписанные запросы получают ответ в структуре настоящего API."""
+    with StubApiServer(fixtures_path=None) as server, stub_endpoints(server):
+        result = currency_timeseries(["USD", "EUR"], date(2024, 1, 1), date(2024, 1, 3))
+
+    assert set(result) == {"USD", "EUR"}
+    assert list(result["USD"]) == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert server.stats["synthesized"] == 1
+
+
+def test_stub_errors_quota_and_timeout() -> None:
+    """Ошибки сервера, исчерпание лимита и превышение времени ожидания приводят к пустому или неполному результату."""
+    with StubApiServer(error_rate=1.0) as server, stub_endpoints(server):
+        assert currency_exchanger(["USD"]) == []
+        assert stock_exchanger(["AAPL"]) == []
+        assert server.stats["errors"] == 2
+
+    with StubApiServer(quota=1) as server, stub_endpoints(server):
+        assert stock_exchanger(["AAPL", "AMZN"]) == [{"stock": "AAPL", "price": 188.85}]
+        assert server.stats["quota_exceeded"] == 1
+
+    with StubApiServer(latency=0.5) as server, stub_endpoints(server, timeout=0.05):
+        assert currency_exchanger(["USD"]) == []
+
+
+def test_stub_requires_api_key() -> None:
+    """Без ключа доступа заглушка отвечает так же, как настоящий API."""
+    server = StubApiServer()
+
+    status, body = server.respond(STOCK_LATEST_PATH, {"symbols": "AAPL"})
+
+    assert status == 401
+    assert body["error"]["code"] == "missing_access_key"
+
+
+@patch("requests.get")
+def test_stub_records_responses_without_keys(mock_get: Any, tmp_path: Path) -> None:
+    """В режиме записи ответ настоящего API сохраняется без ключа доступа и затем воспроизводится."""
+    mock_get.return_value.status_code = 200
+    mock_get.return_value.json.return_value = {"data": [{"close": 42.0, "symbol": "AAPL"}]}
+    fixtures_path = str(tmp_path / "api_responses.json")
+
+    with StubApiServer(fixtures_path=fixtures_path, record=True) as server:
+        server.respond(STOCK_LATEST_PATH, {"access_key": "secret", "symbols": "AAPL"})
+    save_fixtures(server.fixtures, fixtures_path)
+
+    assert "secret" not in Path(fixtures_path).read_text(encoding="utf-8")
+    assert mock_get.call_args.kwargs["params"]["access_key"] == "secret"
+    fixtures = load_fixtures(fixtures_path)
+    assert fixtures[fixture_key(STOCK_LATEST_PATH, {"symbols": "AAPL"})][1]["data"][0]["close"] == 42.0
+
+
+def test_run_load_smoke() -> None:
+    """Нагрузочный замер возвращает пропускную способность, процентили задержки и счётчики сервера."""
+    results = run_load(calls=6, concurrency=3, currencies=["USD"], stocks=["AAPL", "AMZN"])
+
+    assert set(results) == {"currency_exchanger[sync]", "stock_exchanger[sync]"}
+    stock = results["stock_exchanger[sync]"]
+    assert stock["failed_calls"] == 0
+    assert stock["server"]["requests"] == 12
+    assert stock["p50_ms"] <= stock["p99_ms"] <= stock["max_ms"]
+    assert stock["calls_per_second"] > 0
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from src.async_api import AsyncRunner, cashback_analysis_async
+from src.external_api import currency_exchanger_async
+from src.metrics import metrics_summary, reset_metrics, timed
+from src.services import cashback_analysis
+from src.views import main_view, main_view_async
+
+CURRENCY_STUB = [{"currency": "USD", "rate": 73.21}]
+STOCK_STUB = [{"stock": "AAPL", "price": 150.12}]
+
+
+def test_runner_limits_concurrency() -> None:
+    """Одновременно выполняется не больше 'max_concurrency' задач."""
+    runner = AsyncRunner(max_concurrency=2)
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def work(value: int) -> int:
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.02)
+        with lock:
+            state["running"] -= 1
+        return value * 2
+
+    async def scenario():
+        return await asyncio.gather(*(runner.run(work, value) for value in range(6)))
+
+    assert asyncio.run(scenario()) == [0, 2, 4, 6, 8, 10]
+    assert state["peak"] == 2
+    assert runner.running == 0
+
+
+def test_runner_cancels_queued_tasks() -> None:
+    """Отменённая задача, ожидающая очереди, не запускается, а исполнитель остаётся работоспособным."""
+    runner = AsyncRunner(max_concurrency=1)
+    started = []
+
+    def work(name: str) -> str:
+        started.append(name)
+        time.sleep(0.05)
+        return name
+
+    async def scenario():
+        first = asyncio.create_task(runner.run(work, "first"))
+        queued = asyncio.create_task(runner.run(work, "queued"))
+        await asyncio.sleep(0.01)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        return await first, await runner.run(work, "next")
+
+    assert asyncio.run(scenario()) == ("first", "next")
+    assert started == ["first", "next"]
+
+
+def test_offloaded_service_matches_sync(sample_transactions_cashback) -> None:
+    """Асинхронный вариант сервиса возвращает тот же результат, что и синхронный."""
+    result = asyncio.run(cashback_analysis_async(sample_transactions_cashback, 2024, 1))
+
+    assert result == cashback_analysis(sample_transactions_cashback, 2024, 1)
+    assert cashback_analysis_async.__name__ == "cashback_analysis_async"
+
+
+def test_timed_measures_coroutines() -> None:
+    """Декоратор 'timed' замеряет время выполнения корутины, а не её создания."""
+    reset_metrics()
+
+    @timed("async_stage")
+    async def wait(items):
+        await asyncio.sleep(0.02)
+        return len(items)
+
+    assert asyncio.run(wait([1, 2])) == 2
+    stage = metrics_summary()["stages"]["async_stage"]
+    assert stage["calls"] == 1
+    assert stage["rows"] == 2
+    assert stage["max_seconds"] >= 0.02
+
+
+@patch("src.external_api.requests.get")
+def test_currency_exchanger_async_without_aiohttp(mock_get: Any) -> None:
+    """Без aiohttp асинхронная функция выполняет синхронные запросы в отдельном потоке."""
+    mock_get.return_value.json.return_value = {"result": 73.21}
+
+    with patch("src.external_api.AIOHTTP_AVAILABLE", False), patch("src.external_api.API_KEY_CURRENCY", "key"):
+        result = asyncio.run(currency_exchanger_async(["USD"]))
+
+    assert result == CURRENCY_STUB
+
+
+def test_main_view_async_matches_sync(sample_transactions) -> None:
+    """Асинхронная главная страница совпадает с синхронной при тех же курсах."""
+
+    async def currencies(_):
+        return CURRENCY_STUB
+
+    async def stocks(_):
+        return STOCK_STUB
+
+    with (
+        patch("src.views.transaction_parser", return_value=sample_transactions),
+        patch("src.views.currency_exchanger_async", currencies),
+        patch("src.views.stock_exchanger_async", stocks),
+        patch("src.views.load_user_settings", return_value={"user_currencies": ["USD"], "user_stocks": ["AAPL"]}),
+    ):
+        result = json.loads(asyncio.run(main_view_async("2024-02-11 12:00:00", "data/operations.xlsx")))
+        expected = json.loads(
+            main_view(
+                "2024-02-11 12:00:00", "data/operations.xlsx", currency_rates=CURRENCY_STUB, stock_rates=STOCK_STUB
+            )
+        )
+
+    assert result == expected
+    assert result["currency_rates"] == CURRENCY_STUB
+
+
+def test_main_view_async_cancels_rate_requests(sample_transactions) -> None:
+    """При отмене главной страницы незавершённые запросы курсов отменяются."""
+    cancelled = []
+
+    async def slow_rates(_):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    def slow_parser(*args, **kwargs):
+        time.sleep(0.05)
+        return sample_transactions
+
+    async def scenario():
+        task = asyncio.create_task(main_view_async("2024-02-11 12:00:00", "data/operations.xlsx"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+
+    with (
+        patch("src.views.transaction_parser", side_effect=slow_parser),
+        patch("src.views.currency_exchanger_async", slow_rates),
+        patch("src.views.stock_exchanger_async", slow_rates),
+    ):
+        asyncio.run(scenario())
+
+    assert cancelled == [True, True]
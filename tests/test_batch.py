@@ -0,0 +1,91 @@
+import json
+import logging
+from unittest.mock import patch
+
+import pandas as pd
+
+from src.batch import run_batch
+
+
+@patch("src.batch.stock_exchanger")
+@patch("src.batch.currency_exchanger")
+def test_run_batch_shares_rates(mock_currency_exchanger, mock_stock_exchanger, sample_transactions, tmp_path) -> None:
+    """Курсы запрашиваются один раз на все аккаунты, каждый результат записывается в свой файл."""
+    mock_currency_exchanger.return_value = [{"currency": "USD", "rate": 88.64}, {"currency": "EUR", "rate": 95.1}]
+    mock_stock_exchanger.return_value = [{"stock": "AAPL", "price": 145.32}]
+
+    accounts = []
+    for name, currencies in [("first", ["USD"]), ("second", ["USD", "EUR"])]:
+        transactions_file = tmp_path / f"{name}.xlsx"
+        sample_transactions.to_excel(transactions_file, index=False)
+        settings_file = tmp_path / f"{name}.json"
+        settings_file.write_text(json.dumps({"user_currencies": currencies, "user_stocks": ["AAPL"]}))
+        accounts.append((str(transactions_file), str(settings_file)))
+
+    results = run_batch(accounts, "2024-02-11 12:00:00", str(tmp_path / "out"), max_workers=2)
+
+    mock_currency_exchanger.assert_called_once_with(["USD", "EUR"])
+    mock_stock_exchanger.assert_called_once_with(["AAPL"])
+    assert len(results) == 2
+
+    with open(results[0], encoding="utf-8") as file:
+        first = json.load(file)
+    with open(results[1], encoding="utf-8") as file:
+        second = json.load(file)
+
+    assert first["currency_rates"] == [{"currency": "USD", "rate": 88.64}]
+    assert len(second["currency_rates"]) == 2
+    assert len(first["top_transactions"]) == 5
+
+
+def test_run_batch_missing_settings_uses_defaults(tmp_path) -> None:
+    """Отсутствующий файл настроек не прерывает обработку."""
+    transactions_file = tmp_path / "only.xlsx"
+    pd.DataFrame({"Дата операции": ["11.02.2024 10:30:00"], "Сумма операции": [-500]}).to_excel(
+        transactions_file, index=False
+    )
+
+    with patch("src.batch.currency_exchanger", return_value=[]), patch("src.batch.stock_exchanger", return_value=[]):
+        accounts = [(str(transactions_file), str(tmp_path / "missing.json"))]
+        results = run_batch(accounts, "2024-02-11 12:00:00", str(tmp_path / "out"), max_workers=1)
+
+    assert len(results) == 1
+
+
+def test_run_batch_keys_results_by_account(sample_transactions, tmp_path) -> None:
+    """Аккаунты с одним файлом транзакций и разными настройками получают отдельные результаты."""
+    transactions_file = tmp_path / "shared.xlsx"
+    sample_transactions.to_excel(transactions_file, index=False)
+    accounts = []
+    for name, currencies in [("usd", ["USD"]), ("eur", ["EUR"])]:
+        settings_file = tmp_path / f"{name}.json"
+        settings_file.write_text(json.dumps({"user_currencies": currencies, "user_stocks": []}))
+        accounts.append((str(transactions_file), str(settings_file)))
+    rates = [{"currency": "USD", "rate": 88.64}, {"currency": "EUR", "rate": 95.1}]
+
+    with patch("src.batch.currency_exchanger", return_value=rates), patch("src.batch.stock_exchanger"):
+        results = run_batch(accounts, "2024-02-11 12:00:00", str(tmp_path / "out"), max_workers=1)
+
+    assert sorted(results) == [0, 1]
+    assert results[0] != results[1]
+    with open(results[1], encoding="utf-8") as file:
+        assert json.load(file)["currency_rates"] == [{"currency": "EUR", "rate": 95.1}]
+
+
+def test_run_batch_excludes_failed_accounts(sample_transactions, tmp_path, caplog) -> None:
+    """Аккаунт с недоступным файлом транзакций не попадает в результат, ошибка записывается в лог."""
+    transactions_file = tmp_path / "good.xlsx"
+    sample_transactions.to_excel(transactions_file, index=False)
+    settings_file = tmp_path / "settings.json"
+    settings_file.write_text(json.dumps({"user_currencies": [], "user_stocks": []}))
+    accounts = [(str(tmp_path / "missing.xlsx"), str(settings_file)), (str(transactions_file), str(settings_file))]
+
+    with patch("src.batch.currency_exchanger", return_value=[]), patch("src.batch.stock_exchanger", return_value=[]):
+        with caplog.at_level(logging.ERROR, logger="batch"):
+            results = run_batch(accounts, "2024-02-11 12:00:00", str(tmp_path / "out"), max_workers=1)
+
+    assert list(results) == [1]
+    with open(results[1], encoding="utf-8") as file:
+        assert "error" not in json.load(file)
+    assert any("Ошибка при обработке аккаунта 0" in message for message in caplog.messages)
+    assert len(list((tmp_path / "out").iterdir())) == 1
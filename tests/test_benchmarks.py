@@ -0,0 +1,38 @@
+from benchmarks.run import compare_results, run_benchmarks
+from benchmarks.startup import measure_import
+
+
+def test_compare_results_flags_regressions() -> None:
+    """Ухудшение сверх допуска помечается как регрессия, новые замеры игнорируются."""
+    baseline = {"cost_analysis@10000": {"seconds": 1.0, "peak_mb": 10.0}}
+    results = {
+        "cost_analysis@10000": {"seconds": 1.5, "peak_mb": 10.5},
+        "get_top_transactions@10000": {"seconds": 9.0, "peak_mb": 9.0},
+    }
+
+    regressions = compare_results(results, baseline, tolerance=0.25)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("cost_analysis@10000: seconds")
+
+
+def test_run_benchmarks_smoke() -> None:
+    """Бенчмарки запускаются на маленькой выборке с заглушками внешних API."""
+    results = run_benchmarks([200], repeats=1, only=["main_view", "cost_analysis"])
+
+    assert set(results) == {"main_view@200", "cost_analysis@200"}
+    assert all(metrics["seconds"] >= 0 and metrics["peak_mb"] >= 0 for metrics in results.values())
+
+
+def test_cli_import_is_lightweight() -> None:
+    """Импорт командной строки не загружает тяжёлые библиотеки."""
+    result = measure_import("src.cli", repeats=1)
+
+    assert result["loaded"] == []
+    assert result["seconds"] >= 0
+
+
+def test_views_and_reports_import_without_pandas() -> None:
+    """Импорт главной страницы, отчётов и выгрузки не загружает pandas."""
+    for module in ("src.views", "src.reports", "src.export"):
+        assert "pandas" not in measure_import(module, repeats=1)["loaded"]
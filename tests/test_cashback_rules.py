@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cashback_rules import DEFAULT_RULES, CashbackRules
+from src.cube import SpendingCube
+from src.services import cashback_analysis_result
+from src.utils import cost_analysis
+
+
+@pytest.fixture
+def rule_transactions() -> pd.DataFrame:
+    """Траты по одной карте за два месяца с разными категориями и MCC."""
+    return pd.DataFrame(
+        {
+            "Дата операции": [
+                "01.05.2024 10:00:00",
+                "02.05.2024 10:00:00",
+                "03.05.2024 10:00:00",
+                "04.05.2024 10:00:00",
+                "01.06.2024 10:00:00",
+            ],
+            "Номер карты": ["*1111", "*1111", "*1111", "*1111", "*1111"],
+            "Сумма операции": [-1000.0, -2000.0, -500.0, 300.0, -1000.0],
+            "Категория": ["Супермаркеты", "Рестораны", "Переводы", "Пополнения", "Супермаркеты"],
+            "MCC": [5411, 5812, 4829, np.nan, 5411],
+        }
+    )
+
+
+@pytest.fixture
+def rules() -> CashbackRules:
+    return CashbackRules.from_config(
+        {
+            "default_rate": 0.01,
+            "categories": {"Рестораны": 0.05},
+            "mcc": {"5411": 0.03},
+            "excluded_categories": ["Переводы"],
+        }
+    )
+
+
+def test_rates_priority(rule_transactions, rules) -> None:
+    """Ставка по MCC важнее ставки категории, исключённые категории дают 0."""
+    result = rules.rates(rule_transactions["Категория"], rule_transactions["MCC"])
+
+    np.testing.assert_allclose(result, [0.03, 0.05, 0.0, 0.01, 0.03])
+
+
+def test_default_rules_match_one_percent(rule_transactions) -> None:
+    """Правила по умолчанию совпадают с прежним расчётом 1% от трат."""
+    result = cost_analysis(rule_transactions)
+
+    assert result["total_spent"].tolist() == [4500.0]
+    np.testing.assert_allclose(result["cashback"], [45.0])
+
+
+def test_cashback_analysis_with_rules(rule_transactions, rules) -> None:
+    """Кэшбэк по категориям считается по правилам, исключённые категории не попадают в результат."""
+    records = rule_transactions.to_dict(orient="records")
+
+    result = cashback_analysis_result(records, 2024, 5, rules).values
+
+    assert set(result) == {"Супермаркеты", "Рестораны"}
+    assert result["Супермаркеты"] == pytest.approx(30.0)
+    assert result["Рестораны"] == pytest.approx(100.0)
+
+
+def test_list_path_uses_rule_engine(rule_transactions, rules) -> None:
+    """Построчный расчёт по списку и расчёт по кубу дают одинаковый кэшбэк при любых правилах."""
+    records = rule_transactions.to_dict(orient="records")
+
+    for cashback_rules in (None, rules):
+        from_list = cashback_analysis_result(records, 2024, 5, cashback_rules).values
+        from_frame = cashback_analysis_result(rule_transactions, 2024, 5, cashback_rules).values
+        assert from_list == pytest.approx(from_frame)
+    assert rules.rate("Супермаркеты", 5411) == 0.03
+    assert rules.rate("Переводы", 5411) == 0.0
+    assert rules.rate("Кафе", None) == DEFAULT_RULES.default_rate
+
+
+def test_monthly_cap_applies_chronologically(rule_transactions) -> None:
+    """Лимит исчерпывается в порядке операций и обнуляется в новом месяце."""
+    capped = CashbackRules(default_rate=0.05, monthly_cap=70.0)
+
+    cube = SpendingCube.from_transactions(rule_transactions.iloc[::-1], capped)
+
+    assert cube.category_totals(2024, 5, "cashback").to_dict() == pytest.approx(
+        {"Переводы": 0.0, "Рестораны": 20.0, "Супермаркеты": 50.0}
+    )
+    assert cube.category_totals(2024, 6, "cashback").to_dict() == pytest.approx({"Супермаркеты": 50.0})
+
+
+def test_monthly_cap_with_incremental_update(rule_transactions) -> None:
+    """При дополнении куба учитывается кэшбэк, уже начисленный в этом месяце."""
+    capped = CashbackRules(default_rate=0.05, monthly_cap=70.0)
+
+    full = SpendingCube.from_transactions(rule_transactions, capped)
+    incremental = SpendingCube.from_transactions(rule_transactions.iloc[:2], capped).update(rule_transactions.iloc[2:])
+
+    pd.testing.assert_frame_equal(full.card_totals(), incremental.card_totals())
+    assert full.card_totals()["cashback"].tolist() == pytest.approx([120.0])
@@ -0,0 +1,65 @@
+import json
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from src.cli import build_parser, main
+
+
+@pytest.fixture
+def transactions_csv(tmp_path) -> str:
+    """CSV-файл с несколькими транзакциями."""
+    path = tmp_path / "operations.csv"
+    pd.DataFrame(
+        {
+            "Дата операции": ["10.02.2024 12:00:00", "11.02.2024 13:00:00", "01.01.2024 10:00:00"],
+            "Сумма операции": [-150.0, -200.0, -50.0],
+            "Категория": ["Супермаркеты", "Одежда и обувь", "Супермаркеты"],
+            "Описание": ["Магнит", "Ozon.ru", "Колхоз"],
+        }
+    ).to_csv(path, index=False)
+    return str(path)
+
+
+def test_search_command(transactions_csv, capsys) -> None:
+    """Подкоманда 'search' выводит найденные транзакции в JSON."""
+    assert main(["search", "ozon", "--transactions", transactions_csv]) == 0
+
+    result = json.loads(capsys.readouterr().out)
+    assert [transaction["Описание"] for transaction in result] == ["Ozon.ru"]
+
+
+def test_fuzzy_search_command(transactions_csv, capsys) -> None:
+    """Нечёткий поиск находит транзакции по запросу на кириллице."""
+    assert main(["search", "озон", "--fuzzy", "--limit", "1", "--transactions", transactions_csv]) == 0
+
+    result = json.loads(capsys.readouterr().out)
+    assert [transaction["Описание"] for transaction in result] == ["Ozon.ru"]
+
+
+def test_cashback_command(transactions_csv, capsys) -> None:
+    """Подкоманда 'cashback' считает кэшбэк за указанный месяц."""
+    main(["cashback", "2024", "2", "--transactions", transactions_csv, "--compact"])
+
+    assert json.loads(capsys.readouterr().out) == {"Супермаркеты": 1.5, "Одежда и обувь": 2.0}
+
+
+def test_parser_requires_command() -> None:
+    """Без подкоманды парсер завершает работу с ошибкой."""
+    with pytest.raises(SystemExit):
+        build_parser().parse_args([])
+
+
+def test_search_does_not_import_heavy_modules(transactions_csv) -> None:
+    """Поиск из командной строки не загружает pandas и requests."""
+    code = (
+        "import sys; from src.cli import main; main(['search', 'Магнит', '--transactions', sys.argv[1]]); "
+        "print('pandas' in sys.modules, 'requests' in sys.modules)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code, transactions_csv], capture_output=True, text=True, check=True
+    ).stdout
+
+    assert output.strip().splitlines()[-1] == "False False"
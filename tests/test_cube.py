@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cube import SpendingCube
+from src.services import cashback_analysis_result
+from src.synthetic import generate_transactions
+from src.utils import cost_analysis
+
+
+@pytest.fixture(scope="module")
+def synthetic_transactions() -> pd.DataFrame:
+    """Синтетические транзакции с пропусками в номерах карт и категориях."""
+    transactions = generate_transactions(3_000, seed=11)
+    transactions.loc[::50, "Номер карты"] = np.nan
+    transactions.loc[::70, "Категория"] = None
+    return transactions
+
+
+def test_card_totals_match_row_scan(synthetic_transactions) -> None:
+    """Траты по картам из куба совпадают с прямым подсчётом по строкам."""
+    spending = synthetic_transactions[synthetic_transactions["Сумма операции"] < 0]
+    expected = spending.groupby(spending["Номер карты"].astype(str).str[-4:])["Сумма операции"].sum().abs()
+
+    result = cost_analysis(SpendingCube.from_transactions(synthetic_transactions))
+
+    assert result["last_digits"].tolist() == expected.index.tolist()
+    np.testing.assert_allclose(result["total_spent"], expected.to_numpy())
+    np.testing.assert_allclose(result["cashback"], expected.to_numpy() * 0.01)
+
+
+def test_cashback_from_cube_matches_row_path(synthetic_transactions) -> None:
+    """Кэшбэк по кубу совпадает с построчным расчётом по списку словарей."""
+    records = synthetic_transactions.to_dict(orient="records")
+    cube = SpendingCube.from_transactions(synthetic_transactions)
+
+    expected = cashback_analysis_result(records, 2020, 6).values
+    result = cashback_analysis_result(cube, 2020, 6).values
+
+    # Пропущенная категория в DataFrame становится NaN, в списке словарей остаётся None
+    assert [None if pd.isna(key) else key for key in result] == [None if pd.isna(key) else key for key in expected]
+    np.testing.assert_allclose(list(result.values()), list(expected.values()), atol=0.011)
+
+
+def test_incremental_update(synthetic_transactions) -> None:
+    """Куб, дополненный частями, совпадает с кубом, построенным по всем транзакциям сразу."""
+    full = SpendingCube.from_transactions(synthetic_transactions)
+    incremental = SpendingCube.from_transactions(synthetic_transactions.iloc[:1_000])
+    incremental.update(synthetic_transactions.iloc[1_000:2_000]).update(synthetic_transactions.iloc[2_000:])
+
+    assert len(incremental) == len(full) == len(synthetic_transactions)
+    pd.testing.assert_frame_equal(incremental.card_totals(), full.card_totals())
+    pd.testing.assert_frame_equal(incremental.monthly_totals("Такси"), full.monthly_totals("Такси"))
+
+
+def test_slice_and_invalid_rows() -> None:
+    """Срез по измерениям и учёт строк с некорректной датой."""
+    transactions = pd.DataFrame(
+        {
+            "Дата операции": ["10.02.2024 12:00:00", "11.02.2024 13:00:00", "не дата"],
+            "Номер карты": ["*7197", "*4556", "*7197"],
+            "Статус": ["OK", "FAILED", "OK"],
+            "Сумма операции": [-100.0, -50.0, -10.0],
+            "Категория": ["Такси", "Такси", "Фастфуд"],
+        }
+    )
+    cube = SpendingCube.from_transactions(transactions)
+
+    assert cube.invalid_rows == 1
+    assert cube.slice(card="7197", month="2024-02")["spent"].sum() == 100.0
+    assert cube.slice(category="Такси", status="OK")["count"].sum() == 1
+    assert cube.category_totals(2024, 2).to_dict() == {"Такси": 150.0}
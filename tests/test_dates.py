@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.dates import (NAT_MONTH_CODE, DateIndex, _parse_day, month_code, month_codes, operation_date, operation_days,
+                       parse_operation_dates)
+from src.reports import category_spending
+from src.services import cashback_analysis_result, investment_bank_matrix
+from src.utils import filter_transactions_by_month
+
+
+def test_parse_operation_dates_matches_pandas() -> None:
+    """Векторный разбор совпадает с pd.to_datetime для всех дней 1900-2100, включая високосные годы."""
+    days = pd.date_range("1900-01-01", "2100-12-31")
+    dates = pd.Series(days.strftime("%d.%m.%Y 23:59:58"))
+
+    expected = pd.to_datetime(dates, format="%d.%m.%Y %H:%M:%S")
+    assert (parse_operation_dates(dates).to_numpy() == expected.to_numpy()).all()
+
+
+def test_parse_operation_dates_invalid_values() -> None:
+    """Несуществующие даты и строки другого вида становятся NaT, при некорректном времени берётся день."""
+    dates = pd.Series(
+        ["29.02.2023 10:00:00", "31.04.2024 10:00:00", "10.02.2024 24:00:00", "10.02.2024", "неправильная дата", None]
+    )
+    result = parse_operation_dates(dates)
+
+    assert result.iloc[:2].isna().all()
+    assert result.iloc[2] == result.iloc[3] == pd.Timestamp("2024-02-10")
+    assert result.iloc[4:].isna().all()
+    with pytest.raises(ValueError):
+        parse_operation_dates(dates, errors="raise")
+
+
+def test_operation_days_takes_day_before_space() -> None:
+    """День операции берётся из части до пробела, даже если время записано в другом формате."""
+    dates = pd.Series(["10.02.2024 9:05", "11.02.2024 10:00:00", "1.02.2024 10:00:00"], index=[5, 6, 7])
+    result = operation_days(dates)
+
+    assert list(result.index) == [5, 6, 7]
+    assert result.tolist() == [pd.Timestamp("2024-02-10"), pd.Timestamp("2024-02-11"), pd.Timestamp("2024-02-01")]
+
+
+def test_month_codes() -> None:
+    """Коды месяцев совпадают с порядковыми номерами pd.Period, для некорректных дат — NAT_MONTH_CODE."""
+    codes = month_codes(pd.Series(["15.01.2024 10:00:00", "01.12.1969 00:00:00", "ошибка"]))
+
+    assert codes[0] == month_code(2024, 1) == pd.Period("2024-01", freq="M").ordinal
+    assert codes[1] == -1
+    assert codes[2] == NAT_MONTH_CODE
+    assert codes.dtype == np.int64
+
+
+def test_operation_date_cached() -> None:
+    """Повторяющиеся дни разбираются один раз."""
+    _parse_day.cache_clear()
+    first = operation_date("03.03.2024 10:00:00")
+    assert first == operation_date("03.03.2024 18:30:00")
+    assert first.isoformat() == "2024-03-03"
+    assert _parse_day.cache_info().hits == 1
+    with pytest.raises(ValueError):
+        operation_date("32.03.2024 10:00:00")
+
+
+@pytest.fixture
+def date_index(sample_transactions) -> DateIndex:
+    transactions = pd.concat(
+        [sample_transactions, pd.DataFrame({"Дата операции": ["ошибка"], "Сумма операции": [-1.0]})],
+        ignore_index=True,
+    )
+    return DateIndex(transactions)
+
+
+def test_date_index_between_days(date_index, sample_transactions) -> None:
+    """Окно из целых дней совпадает с фильтрацией маской, порядок строк исходный, некорректные даты исключены."""
+    days = pd.to_datetime(sample_transactions["Дата операции"], format="%d.%m.%Y %H:%M:%S").dt.normalize()
+    expected = sample_transactions.index[(days >= "2024-02-06") & (days <= "2024-02-10")]
+
+    assert len(date_index) == 11
+    assert list(date_index.between_days("2024-02-06", "2024-02-10").index) == list(expected)
+    assert date_index.between_days("2024-03-01", "2024-03-31").empty
+    assert date_index.between("2024-02-10 12:45:00", "2024-02-10 14:00:00")["Сумма операции"].tolist() == [-200, -1500]
+
+
+def test_date_index_window_totals(date_index, sample_transactions) -> None:
+    """Суммы по множеству окон совпадают с прямым подсчётом."""
+    starts = ["2023-12-01", "2024-02-01", "2024-02-10 13:00:00", "2024-03-01"]
+    ends = ["2024-01-31 23:59:59", "2024-02-11 23:59:59", "2024-02-10 14:00:00", "2024-02-01"]
+    result = date_index.window_totals(starts, ends)
+
+    dates = pd.to_datetime(sample_transactions["Дата операции"], format="%d.%m.%Y %H:%M:%S")
+    for row, (start, end) in enumerate(zip(starts, ends)):
+        mask = (dates >= start) & (dates <= end)
+        assert result["count"].iloc[row] == mask.sum()
+        assert result["Сумма операции"].iloc[row] == sample_transactions["Сумма операции"][mask].sum()
+
+
+def test_windowed_functions_accept_date_index(sample_transactions) -> None:
+    """Функции с окнами по датам дают одинаковый результат для DataFrame и индекса по датам."""
+    date_index = DateIndex(sample_transactions)
+
+    by_month = filter_transactions_by_month(sample_transactions.copy(), "2024-02-09")
+    pd.testing.assert_frame_equal(filter_transactions_by_month(date_index, "2024-02-09"), by_month)
+    pd.testing.assert_frame_equal(
+        category_spending(date_index, "Кафе", "2024-02-11"),
+        category_spending(sample_transactions.copy(), "Кафе", "2024-02-11"),
+    )
+    pd.testing.assert_frame_equal(
+        investment_bank_matrix(date_index, [50, 100], "2024-01", "2024-02"),
+        investment_bank_matrix(sample_transactions, [50, 100], "2024-01", "2024-02"),
+    )
+    assert (
+        cashback_analysis_result(date_index, 2024, 2).values
+        == cashback_analysis_result(sample_transactions, 2024, 2).values
+    )
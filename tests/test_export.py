@@ -0,0 +1,124 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cli import main
+from src.cube import SpendingCube
+from src.export import export_result, iter_export_chunks
+from src.reports import save_to_file
+from src.services import searching_transactions_result
+
+
+def test_export_csv_chunks_and_columns(sample_transactions, tmp_path) -> None:
+    """CSV записывается по частям с одним заголовком и только с запрошенными столбцами."""
+    path = tmp_path / "report.csv"
+    rows = export_result(sample_transactions, str(path), columns=["Описание", "Сумма операции"], chunk_size=4)
+
+    result = pd.read_csv(path)
+    assert rows == 11
+    assert list(result.columns) == ["Описание", "Сумма операции"]
+    assert result.equals(sample_transactions[["Описание", "Сумма операции"]])
+
+
+def test_export_search_result_jsonl(sample_transactions, tmp_path) -> None:
+    """Результат поиска по списку словарей выгружается в JSON Lines без формирования JSON-массива."""
+    found = searching_transactions_result(sample_transactions.to_dict(orient="records"), "кофейня")
+    path = tmp_path / "search.jsonl"
+    found.export(str(path), columns=["Дата операции", "Номер карты"])
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert lines == [
+        {"Дата операции": "10.02.2024 12:45:00", "Номер карты": "*7197"},
+        {"Дата операции": "06.02.2024 20:00:00", "Номер карты": None},
+    ]
+
+
+def test_export_formats_timestamps(tmp_path) -> None:
+    """Столбцы с датами выгружаются строками, итератор частей DataFrame принимается как источник."""
+    frame = pd.DataFrame({"date": pd.to_datetime(["2024-02-10 12:00:00", "2024-02-11 13:30:00"]), "amount": [1, 2]})
+    path = tmp_path / "chunks.jsonl"
+    export_result(iter([frame.iloc[:1], frame.iloc[1:]]), str(path))
+
+    assert [json.loads(line)["date"] for line in path.read_text(encoding="utf-8").splitlines()] == [
+        "2024-02-10 12:00:00",
+        "2024-02-11 13:30:00",
+    ]
+
+
+def test_export_parquet_dictionary_encoded(sample_transactions, tmp_path) -> None:
+    """Parquet записывается группами строк, строковые столбцы кодируются словарём."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "cube.parquet"
+    rows = export_result(SpendingCube.from_transactions(sample_transactions), str(path), chunk_size=5)
+
+    metadata = pq.ParquetFile(path).metadata
+    columns = [metadata.schema.column(i).name for i in range(metadata.num_columns)]
+    category = metadata.row_group(0).column(columns.index("category"))
+    spent = metadata.row_group(0).column(columns.index("spent"))
+    assert metadata.num_rows == rows
+    assert metadata.num_row_groups == int(np.ceil(rows / 5))
+    assert "RLE_DICTIONARY" in category.encodings
+    assert "RLE_DICTIONARY" not in spent.encodings
+    assert pd.read_parquet(path)["month"].str.match(r"\d{4}-\d{2}$").all()
+
+
+def test_export_parquet_unifies_chunk_schemas(tmp_path) -> None:
+    """Столбец, пустой в первой части или сменивший тип, не ломает выгрузку в Parquet."""
+    pytest.importorskip("pyarrow")
+    records = [{"a": "x", "b": 1, "c": None}] * 3 + [{"a": "y", "b": None, "c": "z"}] * 3
+    path = tmp_path / "records.parquet"
+
+    assert export_result(records, str(path), chunk_size=3) == 6
+    result = pd.read_parquet(path)
+    assert result["c"].tolist() == [None] * 3 + ["z"] * 3
+    assert result["b"].tolist()[:3] == [1, 1, 1]
+
+    drifting = iter([pd.DataFrame({"amount": [1, 2]}), pd.DataFrame({"amount": [2.5], "note": ["тест"]})])
+    export_result(drifting, str(path))
+    result = pd.read_parquet(path)
+    assert result["amount"].tolist() == [1.0, 2.0, 2.5]
+    assert result["note"].tolist() == [None, None, "тест"]
+    assert not (tmp_path / "records.parquet.partial").exists()
+
+
+def test_export_json_array(sample_transactions, tmp_path) -> None:
+    """JSON записывается потоково одним массивом, совпадающим с записями DataFrame."""
+    path = tmp_path / "report.json"
+    rows = export_result(sample_transactions, str(path), columns=["Описание", "Сумма операции"], chunk_size=4)
+
+    expected = sample_transactions[["Описание", "Сумма операции"]].to_dict(orient="records")
+    assert rows == 11
+    assert json.loads(path.read_text(encoding="utf-8")) == expected
+
+
+def test_export_errors(sample_transactions, tmp_path) -> None:
+    """Неизвестный формат и отсутствующие столбцы приводят к ошибке."""
+    with pytest.raises(ValueError):
+        export_result(sample_transactions, str(tmp_path / "report.xml"))
+    with pytest.raises(KeyError):
+        list(iter_export_chunks(sample_transactions, columns=["Нет такого столбца"]))
+
+
+def test_save_to_file_csv(tmp_path) -> None:
+    """Декоратор записывает DataFrame в CSV, если задан формат."""
+    path = tmp_path / "report.csv"
+
+    @save_to_file(str(path), file_format="csv", columns=["Категория"])
+    def report():
+        return pd.DataFrame({"Категория": ["Продукты"], "Сумма": [1000]})
+
+    report()
+    assert pd.read_csv(path).to_dict(orient="records") == [{"Категория": "Продукты"}]
+
+
+def test_search_command_export(sample_transactions, tmp_path, capsys) -> None:
+    """Подкоманда 'search' с --export записывает найденные транзакции в файл и выводит сводку."""
+    transactions = tmp_path / "operations.csv"
+    sample_transactions.to_csv(transactions, index=False)
+    path = tmp_path / "found.csv"
+    main(["search", "такси", "--transactions", str(transactions), "--export", str(path), "--columns", "Описание"])
+
+    assert json.loads(capsys.readouterr().out) == {"file": str(path), "rows": 2}
+    assert pd.read_csv(path)["Описание"].tolist() == ["Такси", "Такси"]
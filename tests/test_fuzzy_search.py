@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from src.fuzzy_search import TransactionSearchIndex, TrigramIndex, normalize, trigrams
+
+
+def test_normalize_transliterates() -> None:
+    """Кириллица и латиница приводятся к одной записи."""
+    assert normalize("Озон") == normalize("ozon") == "ozon"
+    assert normalize("Ozon.ru") == "ozon ru"
+    assert normalize("Yandex") == normalize("Яндекс")
+    assert trigrams("Ozon") == {"  o", " oz", "ozo", "zon", "on "}
+
+
+def test_trigram_index_ranks_by_similarity() -> None:
+    """Строки ранжируются по доле совпавших триграмм запроса; дубликаты не добавляются."""
+    index = TrigramIndex()
+    for text in ["Ozon.ru", "Озон Банк", "Магнит", "Ozon.ru"]:
+        index.add(text)
+
+    result = index.search("озон")
+
+    assert len(index) == 3
+    assert [index.strings[string_id] for string_id, _ in result] == ["Ozon.ru", "Озон Банк"]
+    assert result[0][1] == 1.0
+    assert index.search("мгнит", threshold=0.3)[0][0] == 2
+    assert index.search("") == []
+
+
+def test_transaction_index_on_list_and_frame(sample_transactions_searching) -> None:
+    """Индекс по списку словарей и по DataFrame находит одинаковые транзакции в порядке сходства."""
+    records = sample_transactions_searching + [{"Описание": "Перевод Ивaнову", "Категория": None}]
+    frame = pd.DataFrame(records)
+
+    rows, scores = TransactionSearchIndex(records).search("перевод иванов", k=3)
+
+    np.testing.assert_array_equal(rows, TransactionSearchIndex(frame).search("перевод иванов", k=3)[0])
+    assert rows.tolist()[0] == 1
+    assert len(rows) == 3
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_transaction_index_limits_results() -> None:
+    """Для частых значений возвращается не больше k транзакций, каждая один раз."""
+    frame = pd.DataFrame({"Описание": ["Переводы"] * 50, "Категория": ["Переводы"] * 50})
+
+    rows, _ = TransactionSearchIndex(frame).search("переводы", k=5)
+
+    assert rows.tolist() == [0, 1, 2, 3, 4]
@@ -0,0 +1,91 @@
+from datetime import date
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.external_api import currency_timeseries
+from src.fx_rates import HistoricalRateStore, to_rub
+
+RATES = {
+    "USD": {"2021-12-01": 70.0, "2021-12-03": 72.0, "2021-12-10": 75.0},
+    "EUR": {"2021-12-01": 80.0, "2021-12-10": 85.0},
+}
+
+
+class FakeFetcher:
+    """Заглушка загрузки курсов, запоминающая вызовы."""
+
+    def __init__(self) -> None:
+        self.calls = []
+
+    def __call__(self, currencies, start, end):
+        self.calls.append((tuple(currencies), start, end))
+        return {
+            currency: {
+                day: rate for day, rate in RATES[currency].items() if start.isoformat() <= day <= end.isoformat()
+            }
+            for currency in currencies
+        }
+
+
+@pytest.fixture
+def fx_transactions() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Дата операции": [
+                "02.12.2021 10:00:00",
+                "05.12.2021 12:00:00",
+                "05.12.2021 13:00:00",
+                "10.12.2021 09:00:00",
+                "30.11.2021 09:00:00",
+            ],
+            "Сумма операции": [-10.0, -1.0, -500.0, -2.0, -3.0],
+            "Валюта операции": ["USD", "USD", "RUB", "EUR", "USD"],
+        }
+    )
+
+
+def test_to_rub_as_of_join(tmp_path, fx_transactions) -> None:
+    """Суммы пересчитываются по последнему курсу не позже даты операции, все валюты — одним запросом."""
+    fetch = FakeFetcher()
+    store = HistoricalRateStore(str(tmp_path / "fx.json"), fetch)
+
+    result = to_rub(fx_transactions, store)
+
+    assert fetch.calls == [(("EUR", "USD"), date(2021, 11, 30), date(2021, 12, 10))]
+    np.testing.assert_allclose(result["Сумма операции"][:4], [-700.0, -72.0, -500.0, -170.0])
+    # Курса до первой загруженной даты нет
+    assert np.isnan(result["Сумма операции"][4])
+    assert set(result["Валюта операции"]) == {"RUB"}
+    assert fx_transactions["Валюта операции"].tolist()[0] == "USD"
+
+
+def test_prefetch_uses_local_cache(tmp_path) -> None:
+    """Повторная загрузка берёт курсы из файла кэша и догружает только недостающий период."""
+    cache_path = str(tmp_path / "fx.json")
+    HistoricalRateStore(cache_path, FakeFetcher()).prefetch(["USD"], date(2021, 12, 1), date(2021, 12, 5))
+
+    fetch = FakeFetcher()
+    store = HistoricalRateStore(cache_path, fetch)
+
+    assert store.prefetch(["USD", "RUB"], date(2021, 12, 2), date(2021, 12, 4)) == 0
+    assert store.prefetch(["USD"], date(2021, 12, 1), date(2021, 12, 10)) == 1
+    assert fetch.calls == [(("USD",), date(2021, 12, 6), date(2021, 12, 10))]
+    assert store.coverage("USD") == (date(2021, 12, 1), date(2021, 12, 10))
+    assert len(store.table()) == 3
+
+
+@patch("src.external_api.requests.get")
+def test_currency_timeseries_splits_period(mock_get: Any) -> None:
+    """Период длиннее года загружается несколькими запросами, курсы пересчитываются к рублю."""
+    mock_get.return_value.json.return_value = {"rates": {"2021-01-01": {"USD": 0.0125, "EUR": 0.01}}}
+
+    with patch("src.external_api.API_KEY_CURRENCY", "key"):
+        result = currency_timeseries(["USD", "EUR"], date(2021, 1, 1), date(2022, 6, 30))
+
+    assert mock_get.call_count == 2
+    assert mock_get.call_args.kwargs["params"]["start_date"] == "2022-01-01"
+    assert result == {"USD": {"2021-01-01": 80.0}, "EUR": {"2021-01-01": 100.0}}
@@ -0,0 +1,15 @@
+import json
+from unittest.mock import patch
+
+from src.lazy import LazyModule
+
+
+def test_lazy_module_imports_once() -> None:
+    """Модуль импортируется при первом обращении к атрибуту и затем берётся из кэша."""
+    module = LazyModule("json")
+
+    with patch("src.lazy.importlib.import_module", return_value=json) as import_module:
+        assert module.dumps is json.dumps
+        assert module.loads is json.loads
+
+    import_module.assert_called_once_with("json")
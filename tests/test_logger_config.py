@@ -0,0 +1,77 @@
+import logging
+
+import pytest
+
+from src import logger_config, utils
+from src.logger_config import RowEventLog, add_logger, configure_logging, shutdown_logging
+from src.services import investment_bank
+
+
+@pytest.fixture
+def restore_logging():
+    """Возвращает настройки логирования к исходным после теста."""
+    settings = {**logger_config._settings, "levels": dict(logger_config._settings["levels"])}
+    yield
+    configure_logging(use_queue=settings["use_queue"], default_level=settings["default_level"])
+    logger_config._settings.update(settings)
+    configure_logging()
+
+
+def test_queue_mode_writes_in_background(tmp_path, monkeypatch, restore_logging) -> None:
+    """В режиме очереди сообщения записываются в файл фоновым потоком."""
+    monkeypatch.setattr(logger_config, "LOGS_DIR", str(tmp_path))
+    logging.getLogger("queue_test").propagate = False  # Иначе обработчики pytest на корневом логгере мешают настройке
+    logger = add_logger("queue_test.log", "queue_test")
+
+    configure_logging(use_queue=True)
+    assert any(isinstance(handler, logging.handlers.QueueHandler) for handler in logger.handlers)
+
+    logger.info("Сообщение %s", 1)
+    shutdown_logging()
+
+    assert "Сообщение 1" in (tmp_path / "queue_test.log").read_text(encoding="utf-8")
+
+
+def test_per_module_levels(restore_logging) -> None:
+    """Уровень логирования настраивается отдельно для каждого модуля."""
+    configure_logging(levels={"services": "WARNING"})
+
+    assert logging.getLogger("services").level == logging.WARNING
+    assert utils.logger.level == logging.DEBUG
+
+
+def test_row_event_log_limits_and_summarizes(caplog) -> None:
+    """После лимита построчные события только подсчитываются и попадают в сводку."""
+    logger = logging.getLogger("row_events_test")
+    row_log = RowEventLog(logger, logging.INFO, limit=2)
+
+    with caplog.at_level(logging.INFO, logger="row_events_test"):
+        for i in range(5):
+            row_log.log("Событие %s", i)
+        row_log.summary("Пропущено событий: %s")
+
+    assert caplog.messages == ["Событие 0", "Событие 1", "Пропущено событий: 3"]
+
+
+def test_investment_bank_logs_summary(caplog, restore_logging) -> None:
+    """'investment_bank' записывает ограниченное число строк и итоговую сводку."""
+    configure_logging(row_events_limit=1)
+    transactions = [{"Дата операции": "15.01.2024 12:30:00", "Сумма операции": -1530}] * 3
+
+    with caplog.at_level(logging.INFO):
+        investment_bank(transactions, "2024-01", 100)
+
+    assert caplog.text.count("отложено в копилку") == 1
+    assert "Отложено в копилку ещё по 2 транзакциям" in caplog.text
+
+
+def test_log_file_is_opened_on_first_record(tmp_path) -> None:
+    """Папка и файл лога создаются только при первой записи, а не при создании обработчика."""
+    handler = logger_config._DeferredFileHandler(str(tmp_path / "logs" / "lazy.log"))
+
+    assert not (tmp_path / "logs").exists()
+
+    handler.emit(logging.makeLogRecord({"msg": "Сообщение"}))
+    handler.close()
+
+    assert (tmp_path / "logs" / "lazy.log").read_text(encoding="utf-8").strip() == "Сообщение"
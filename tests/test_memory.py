@@ -0,0 +1,86 @@
+import json
+from functools import partial
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.memory import estimate_memory, exceeds_budget, memory_budget, memory_report
+from src.utils import filter_transactions_by_month, load_transactions, read_transactions_chunked
+from src.views import main_view
+
+
+@pytest.fixture
+def transactions_xlsx(tmp_path, sample_transactions) -> str:
+    """XLSX-файл с транзакциями, в котором есть пропуски и целочисленные столбцы."""
+    transactions = sample_transactions.copy()
+    transactions["Бонусы (включая кэшбэк)"] = np.arange(len(transactions))
+    transactions["MCC"] = [5411.0, np.nan] * 5 + [5812.0]
+    path = tmp_path / "operations.xlsx"
+    transactions.to_excel(path, index=False)
+    return str(path)
+
+
+def test_memory_budget_sources(monkeypatch) -> None:
+    """Бюджет берётся из настроек, затем из переменной окружения; некорректное значение игнорируется."""
+    monkeypatch.delenv("MEMORY_BUDGET_MB", raising=False)
+    assert memory_budget() is None
+
+    monkeypatch.setenv("MEMORY_BUDGET_MB", "2")
+    assert memory_budget() == 2 * 2**20
+    assert memory_budget({"memory_budget_mb": 0.5}) == 2**19
+    assert memory_budget({"memory_budget_mb": "много"}) is None
+
+
+def test_exceeds_budget(transactions_xlsx) -> None:
+    """Оценка памяти пропорциональна размеру файла и сравнивается с бюджетом."""
+    estimate = estimate_memory(transactions_xlsx)
+
+    assert estimate > 0
+    assert estimate_memory("нет такого файла.xlsx") == 0
+    assert not exceeds_budget(transactions_xlsx, None)
+    assert not exceeds_budget(transactions_xlsx, estimate)
+    assert exceeds_budget(transactions_xlsx, estimate - 1)
+
+
+def test_chunked_read_matches_full_read(transactions_xlsx, tmp_path) -> None:
+    """Чтение по частям даёт тот же DataFrame, что и загрузка целиком, в том числе после фильтра."""
+    expected = pd.read_excel(transactions_xlsx)
+    pd.testing.assert_frame_equal(read_transactions_chunked(transactions_xlsx, chunk_size=3), expected)
+
+    month_filter = partial(filter_transactions_by_month, current_date="2024-02-11 12:00:00")
+    pd.testing.assert_frame_equal(
+        read_transactions_chunked(transactions_xlsx, month_filter, chunk_size=4),
+        month_filter(expected.copy()).reset_index(drop=True),
+    )
+
+    csv_path = str(tmp_path / "operations.csv")
+    expected.to_csv(csv_path, index=False)
+    pd.testing.assert_frame_equal(load_transactions(csv_path, budget=1, chunk_size=5), pd.read_csv(csv_path))
+    assert read_transactions_chunked(str(tmp_path / "нет.xlsx")).empty
+
+
+def test_main_view_falls_back_to_chunks(transactions_xlsx) -> None:
+    """При превышении бюджета главная страница считается по частям файла с тем же результатом."""
+    settings = {"user_currencies": [], "user_stocks": []}
+    with patch("src.views.load_user_settings", return_value=settings):
+        expected = json.loads(main_view("2024-02-11 12:00:00", transactions_xlsx, currency_rates=[], stock_rates=[]))
+        with (
+            patch("src.views.memory_budget", return_value=1),
+            patch("src.views.transaction_parser", side_effect=AssertionError("файл загружен целиком")),
+        ):
+            result = json.loads(main_view("2024-02-11 12:00:00", transactions_xlsx, currency_rates=[], stock_rates=[]))
+
+    assert result == expected
+    assert len(result["top_transactions"]) == 5
+
+
+def test_memory_report(monkeypatch) -> None:
+    """Отчёт содержит бюджет и пиковый RSS процесса."""
+    monkeypatch.setenv("MEMORY_BUDGET_MB", "1")
+    report = memory_report()
+
+    assert report["budget_bytes"] == 2**20
+    assert report["peak_rss_bytes"] is None or report["peak_rss_bytes"] > 0
+    assert isinstance(report["stages"], dict)
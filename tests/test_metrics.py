@@ -0,0 +1,131 @@
+import json
+from pathlib import Path
+from typing import List
+from unittest.mock import patch
+
+import pytest
+
+from src.metrics import (metrics_json, metrics_prometheus, metrics_summary, record_cache, reset_metrics,
+                         set_memory_tracking, timed, track_stage)
+from src.services import find_phone_numbers
+from src.utils import read_transaction_records
+from src.views import main_view
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    reset_metrics()
+    yield
+    reset_metrics()
+
+
+def test_timed_records_calls_rows_and_errors() -> None:
+    """Декоратор учитывает вызовы, строки и ошибки."""
+
+    @timed("stage")
+    def process(items):
+        if not items:
+            raise ValueError("пусто")
+        return len(items)
+
+    process([1, 2, 3])
+    with pytest.raises(ValueError):
+        process([])
+
+    stage = metrics_summary()["stages"]["stage"]
+    assert stage["calls"] == 2
+    assert stage["errors"] == 1
+    assert stage["rows"] == 3
+    assert stage["total_seconds"] >= stage["max_seconds"] >= 0
+
+
+def test_timed_counts_result_rows_for_path_argument(tmp_path: Path) -> None:
+    """Для функций, принимающих путь, строки считаются по результату, а не по длине пути."""
+    path = tmp_path / "operations.csv"
+    path.write_text("a\n1\n2\n", encoding="utf-8")
+
+    @timed("load")
+    def load(file_path: str) -> List[str]:
+        return path.read_text(encoding="utf-8").splitlines()[1:]
+
+    @timed("render")
+    def render(current_datetime: str) -> str:
+        return "{}"
+
+    load(str(path))
+    render("2020-09-29 22:38:50")
+    stages = metrics_summary()["stages"]
+    assert stages["load"]["rows"] == 2
+    assert stages["render"]["rows"] == 0
+
+
+def test_read_transaction_records_counts_parsed_rows(tmp_path: Path) -> None:
+    """Строки чтения файла — количество прочитанных транзакций."""
+    path = tmp_path / "operations.csv"
+    path.write_text(
+        "Дата операции,Сумма операции\n01.01.2024 10:00:00,-100\n02.01.2024 10:00:00,-200\n", encoding="utf-8"
+    )
+
+    records = read_transaction_records(str(path))
+
+    assert metrics_summary()["stages"]["read_transaction_records"]["rows"] == len(records)
+
+
+def test_track_stage_rows_inside_block() -> None:
+    """Количество строк можно указать внутри блока."""
+    with track_stage("load") as stage:
+        stage["rows"] = 42
+
+    assert metrics_summary()["stages"]["load"]["rows"] == 42
+
+
+def test_cache_and_exports() -> None:
+    """Метрики кэша и экспорт в JSON и формат Prometheus."""
+    record_cache("fx", hit=True)
+    record_cache("fx", hit=False)
+    with track_stage('stage "quoted"'):
+        pass
+
+    summary = json.loads(metrics_json())
+    assert summary["caches"]["fx"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+    text = metrics_prometheus()
+    assert "# TYPE finance_flow_stage_seconds_total counter" in text
+    assert 'finance_flow_cache_hits_total{cache="fx"} 1' in text
+    assert 'finance_flow_stage_calls_total{stage="stage \\"quoted\\""} 1' in text
+
+
+def test_services_and_main_view_are_instrumented(sample_transactions_searching, sample_transactions) -> None:
+    """Функции сервисов и этапы главной страницы попадают в метрики."""
+    find_phone_numbers(sample_transactions_searching)
+
+    with patch("src.views.transaction_parser", return_value=sample_transactions):
+        main_view("2024-02-11 12:00:00", "data/operations.xlsx", currency_rates=[], stock_rates=[])
+
+    stages = metrics_summary()["stages"]
+    assert stages["find_phone_numbers"]["rows"] == 5
+    assert stages["main_view.load_transactions"]["rows"] == 11
+    assert stages["main_view.cost_analysis"]["rows"] == 9
+    assert stages["main_view"]["errors"] == 0
+
+
+def test_memory_tracking_nested_stages() -> None:
+    """Пик памяти вложенного этапа учитывается и во внешнем этапе."""
+    set_memory_tracking(True)
+    try:
+        with track_stage("outer"):
+            kept = bytearray(1_000_000)
+            with track_stage("inner"):
+                buffer = bytearray(4_000_000)
+                del buffer
+            with track_stage("small"):
+                pass
+    finally:
+        set_memory_tracking(False)
+
+    memory = metrics_summary()["memory"]
+    assert memory["inner"]["peak_bytes"] >= 4_000_000
+    assert memory["small"]["peak_bytes"] < 100_000
+    assert memory["outer"]["peak_bytes"] >= 5_000_000
+    assert len(kept) == 1_000_000
+    assert 'finance_flow_stage_memory_peak_bytes{stage="outer"}' in metrics_prometheus()
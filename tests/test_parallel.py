@@ -0,0 +1,71 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.parallel import (parallel_cashback_analysis, parallel_find_personal_transfer, parallel_find_phone_numbers,
+                          parallel_investment_bank, parallel_searching_transactions)
+from src.services import (cashback_analysis_result, find_personal_transfer, find_phone_numbers, investment_bank,
+                          searching_transactions)
+
+
+@pytest.fixture
+def many_transactions(sample_transactions_cashback, sample_transactions_searching) -> list:
+    """Повторяет тестовые транзакции, чтобы получилось несколько чанков."""
+    return (sample_transactions_cashback + sample_transactions_searching) * 7
+
+
+@patch("src.parallel.MIN_PARALLEL_SIZE", 0)
+def test_parallel_aggregates_match_serial(many_transactions) -> None:
+    """Параллельные агрегаты в точности совпадают с последовательными."""
+    parallel = json.loads(parallel_cashback_analysis(many_transactions, 2024, 1, max_workers=2, chunk_size=4))
+    assert parallel == cashback_analysis_result(many_transactions, 2024, 1).values
+    assert parallel_investment_bank(many_transactions, "2024-01", 100, max_workers=2, chunk_size=4) == investment_bank(
+        many_transactions, "2024-01", 100
+    )
+
+
+@patch("src.parallel.MIN_PARALLEL_SIZE", 0)
+def test_parallel_sums_do_not_depend_on_chunking() -> None:
+    """Суммы, чувствительные к порядку сложения чисел с плавающей точкой, не зависят от размера чанков."""
+    # При последовательном сложении по чанкам из двух операций кэшбэк получается 1.17 вместо 1.18
+    amounts = [-0.7, -100.5, -0.5, -2.5, -10.5, -0.3, -2.5]
+    transactions = [
+        {"Дата операции": "15.01.2024 12:00:00", "Сумма операции": amount, "Категория": "Супермаркеты"}
+        for amount in amounts
+    ]
+    serial = cashback_analysis_result(transactions, 2024, 1).values
+    saved = investment_bank(transactions, "2024-01", 10)
+
+    for chunk_size in (1, 2, 3):
+        parallel = parallel_cashback_analysis(transactions, 2024, 1, max_workers=2, chunk_size=chunk_size)
+        assert json.loads(parallel) == serial
+        assert parallel_investment_bank(transactions, "2024-01", 10, max_workers=2, chunk_size=chunk_size) == saved
+
+
+@patch("src.parallel.MIN_PARALLEL_SIZE", 0)
+def test_parallel_filters_match_serial(many_transactions) -> None:
+    """Параллельные фильтры возвращают те же транзакции в том же порядке."""
+    assert parallel_searching_transactions(many_transactions, "Кафе", 2, 3) == searching_transactions(
+        many_transactions, "Кафе"
+    )
+    assert parallel_find_phone_numbers(many_transactions, 2, 3) == find_phone_numbers(many_transactions)
+    assert parallel_find_personal_transfer(many_transactions, 2, 3) == find_personal_transfer(many_transactions)
+
+
+@patch("src.parallel.MIN_PARALLEL_SIZE", 0)
+def test_parallel_logs_worker_errors(sample_transactions_cashback, caplog) -> None:
+    """Ошибки из процессов логируются с глобальным номером транзакции."""
+    result = parallel_cashback_analysis(sample_transactions_cashback, 2024, 1, max_workers=2, chunk_size=2)
+
+    assert json.loads(result) == {"Продукты": 38.0, "Кафе": 8.1}
+    assert "Произошла ошибка при обработке транзакции (ID=4)" in caplog.text
+
+
+def test_small_input_runs_serially(sample_transactions_searching) -> None:
+    """Небольшие списки обрабатываются без пула процессов."""
+    with patch("src.parallel.ProcessPoolExecutor") as mock_executor:
+        result = parallel_find_phone_numbers(sample_transactions_searching)
+
+    mock_executor.assert_not_called()
+    assert len(json.loads(result)) == 1
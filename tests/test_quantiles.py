@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.quantiles import ExactQuantiles, KLLSketch, SpendingDistribution, percentile_label
+
+QS = [0.01, 0.5, 0.9, 0.99]
+
+
+def rank_errors(values: np.ndarray, estimates) -> list:
+    """Отклонение доли значений, не превышающих оценку, от уровня квантиля."""
+    return [abs((values <= estimate).mean() - q) for estimate, q in zip(estimates, QS)]
+
+
+@pytest.fixture
+def amounts() -> np.ndarray:
+    return np.random.default_rng(7).lognormal(6, 1.2, 200_000)
+
+
+def test_kll_sketch_accuracy_and_merge(amounts) -> None:
+    """Скетч по всем данным и объединение скетчей частей дают ошибку ранга меньше 1% при размере O(k)."""
+    whole = KLLSketch().update(amounts)
+    merged = KLLSketch()
+    for part in np.array_split(amounts, 50):
+        merged.merge(KLLSketch().update(part))
+
+    for sketch in (whole, merged):
+        assert sketch.count == len(amounts)
+        assert max(rank_errors(amounts, sketch.quantiles(QS))) < 0.01
+        assert sum(map(len, sketch.levels)) < 4 * sketch.k
+    assert whole.quantiles([0, 1]) == [amounts.min(), amounts.max()]
+
+
+def test_exact_quantiles_match_numpy(amounts) -> None:
+    """Точный режим совпадает с numpy и не зависит от разбиения на части."""
+    exact = ExactQuantiles()
+    for part in np.array_split(amounts, 7):
+        exact.merge(ExactQuantiles().update(part))
+
+    assert exact.quantiles(QS) == np.quantile(amounts, QS, method="inverted_cdf").tolist()
+    assert np.isnan(KLLSketch().quantiles([0.5])[0])
+    assert percentile_label(0.5) == "p50" and percentile_label(0.999) == "p99.9"
+
+
+def test_spending_distribution_by_chunks(sample_transactions) -> None:
+    """Распределение, собранное по частям, совпадает с построенным целиком; учитываются только траты."""
+    transactions = pd.concat([sample_transactions, pd.DataFrame([{"Сумма операции": 1000, "Категория": "Еда"}])])
+    exact = SpendingDistribution.from_transactions(transactions, exact=True)
+    chunked = SpendingDistribution(exact=True)
+    for part in (transactions.iloc[:4], transactions.iloc[4:8], transactions.iloc[8:]):
+        chunked.merge(SpendingDistribution.from_transactions(part, exact=True))
+
+    by_category = exact.percentiles("category", [0.5, 1])
+    pd.testing.assert_frame_equal(chunked.percentiles("category", [0.5, 1]), by_category)
+    assert by_category.set_index("category").loc["Еда"].tolist() == [2, 500.0, 1500.0]
+    assert exact.percentiles("card")["card"].tolist()[:3] == ["0000", "1234", "5678"]
+
+    with pytest.raises(ValueError):
+        exact.merge(SpendingDistribution())
+    with pytest.raises(ValueError):
+        exact.percentiles("month")
+
+
+def test_spending_distribution_persistence(tmp_path, sample_transactions) -> None:
+    """Сохранённое распределение восстанавливается и продолжает дополняться."""
+    distribution = SpendingDistribution.from_transactions(sample_transactions)
+    path = str(tmp_path / "distribution.json")
+    distribution.save(path)
+    restored = SpendingDistribution.load(path)
+
+    pd.testing.assert_frame_equal(restored.percentiles("card"), distribution.percentiles("card"))
+    restored.update(sample_transactions)
+    assert restored.percentiles("category")["count"].sum() == 22
+    assert json.loads(json.dumps(restored.to_dict()))["k"] == distribution.k
+    assert SpendingDistribution.load(str(tmp_path / "нет.json")) is None
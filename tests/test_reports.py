@@ -2,9 +2,10 @@ import json
 import logging
 from unittest.mock import patch
 
+import numpy as np
 import pandas as pd
 
-from src.reports import save_to_file, spending_by_category
+from src.reports import monthly_spending_by_category, save_to_file, spending_by_category
 
 
 def test_save_to_file_success(tmp_path) -> None:
@@ -24,6 +25,18 @@ def test_save_to_file_success(tmp_path) -> None:
         assert pd.DataFrame(saved_data_df).equals(result_df)
 
 
+def test_save_to_file_not_dataframe(tmp_path) -> None:
+    """Результат, не являющийся DataFrame, сохраняется как JSON."""
+    test_file = tmp_path / "test_report.json"
+
+    @save_to_file(str(test_file))
+    def mock_func():
+        return {"Переводы": np.int64(2)}
+
+    mock_func()
+    assert json.loads(test_file.read_text(encoding="utf-8")) == {"Переводы": 2}
+
+
 def test_save_to_file_error(caplog) -> None:
     """Проверяет, логируется ли ошибка при проблемах с записью JSON"""
     with patch("builtins.open", side_effect=OSError("Ошибка доступа")):
@@ -60,3 +73,12 @@ def test_spending_by_category_invalid(sample_transactions_df, caplog) -> None:
 
     assert len(filtered_df) == 0
     assert any("Нет данных по категории 'Развлечения'" in message for message in caplog.messages)
+
+
+def test_monthly_spending_by_category(sample_transactions) -> None:
+    """Помесячные траты по категории, включая месяцы без операций."""
+    result = monthly_spending_by_category.__wrapped__(sample_transactions, "Еда", "2024-02-15", months=3)
+
+    assert result["month"].tolist() == ["2023-12", "2024-01", "2024-02"]
+    assert result["spent"].tolist() == [0.0, 0.0, 2000.0]
+    assert result["count"].tolist() == [0, 0, 2]
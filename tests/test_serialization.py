@@ -0,0 +1,82 @@
+import json
+from datetime import date, datetime
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.serialization import dumps, format_timestamps, iter_json_array, to_records
+from src.services import find_phone_numbers
+
+
+def test_format_timestamps_by_column() -> None:
+    """Столбцы с датами форматируются целиком, остальные остаются без изменений."""
+    data = pd.DataFrame({"date": pd.to_datetime(["2024-02-10 10:30:00"]), "amount": [-500]})
+
+    assert to_records(data) == [{"date": "2024-02-10 10:30:00", "amount": -500}]
+    assert data["date"].dtype == "datetime64[ns]"  # Исходный DataFrame не изменяется
+
+    amounts = data[["amount"]]
+    assert format_timestamps(amounts) is amounts  # Без столбцов с датами копия не создаётся
+
+
+def test_dumps_modes() -> None:
+    """Обычный режим совпадает с прежним выводом, компактный — без отступов."""
+    obj = {"категория": [1, 2]}
+
+    assert dumps(obj) == json.dumps(obj, indent=4, ensure_ascii=False)
+    assert dumps(obj, compact=True) == '{"категория":[1,2]}'
+
+    with patch("src.serialization.orjson", None):
+        assert dumps(obj, compact=True) == '{"категория":[1,2]}'
+
+
+def test_compact_dumps_same_with_and_without_orjson() -> None:
+    """Компактный вывод не зависит от наличия orjson: NaN, даты и значения numpy сериализуются одинаково."""
+    obj = {
+        "amount": float("nan"),
+        "limits": [float("inf"), 1.5],
+        "date": datetime(2024, 2, 10, 10, 30),
+        "timestamp": pd.Timestamp("2024-02-10 10:30:00"),
+        "missing": pd.NaT,
+        "count": np.int64(3),
+        "values": np.array([1.0, np.nan]),
+        date(2024, 2, 10): "day",
+        1: "one",
+    }
+    expected = (
+        '{"amount":null,"limits":[null,1.5],"date":"2024-02-10T10:30:00","timestamp":"2024-02-10T10:30:00",'
+        '"missing":null,"count":3,"values":[1.0,null],"2024-02-10":"day","1":"one"}'
+    )
+
+    assert dumps(obj, compact=True) == expected
+    with patch("src.serialization.orjson", None):
+        assert dumps(obj, compact=True) == expected
+        with pytest.raises(TypeError):
+            dumps({"value": object()}, compact=True)
+
+
+def test_indented_dumps_serializes_numpy_scalars() -> None:
+    """Обычный режим с отступами принимает скаляры numpy и даты так же, как компактный."""
+    obj = {"count": np.int64(3), "amount": np.float64(1.5), "flag": np.bool_(True), "date": date(2024, 2, 10)}
+
+    assert json.loads(dumps(obj)) == {"count": 3, "amount": 1.5, "flag": True, "date": "2024-02-10"}
+    assert dumps(obj).startswith('{\n    "count": 3,')
+
+
+def test_iter_json_array_matches_dumps() -> None:
+    """Потоковый вывод по частям даёт тот же JSON, что и сериализация целиком."""
+    records = [{"id": i, "tags": ["a", "b"]} for i in range(5)]
+
+    assert "".join(iter_json_array(records, chunk_size=2)) == dumps(records)
+    assert json.loads("".join(iter_json_array(records, compact=True, chunk_size=2))) == records
+    assert "".join(iter_json_array([])) == "[]"
+
+
+def test_services_compact_mode(sample_transactions_searching) -> None:
+    """Функции 'services' поддерживают компактный вывод."""
+    result = find_phone_numbers(sample_transactions_searching, compact=True)
+
+    assert "\n" not in result
+    assert json.loads(result) == json.loads(find_phone_numbers(sample_transactions_searching))
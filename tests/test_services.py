@@ -1,13 +1,15 @@
 import json
 import logging
 
-from src.services import (
-    cashback_analysis,
-    find_personal_transfer,
-    find_phone_numbers,
-    investment_bank,
-    searching_transactions,
-)
+import pandas as pd
+
+from src.services import (cashback_analysis, cashback_analysis_result, find_personal_transfer,
+                          find_personal_transfer_result, find_phone_numbers, find_phone_numbers_result,
+                          find_recurring_payments, find_recurring_payments_result, fuzzy_searching_transactions,
+                          fuzzy_searching_transactions_result, investment_bank, investment_bank_matrix,
+                          searching_transactions, searching_transactions_result, spending_percentiles,
+                          spending_percentiles_result)
+from src.synthetic import generate_transactions
 
 
 def test_cashback_analysis(sample_transactions_cashback, caplog) -> None:
@@ -74,3 +76,121 @@ def test_find_personal_transfer(sample_transactions_searching, caplog) -> None:
 
     assert "Вызов функции 'find_personal_transfer'" in caplog.text
     assert "Найдено 2 транзакций с номерами телефонов." in caplog.text
+
+
+def test_result_api_list_and_frame_agree(sample_transactions_searching) -> None:
+    """Результаты для списка словарей и DataFrame совпадают."""
+    frame = pd.DataFrame(sample_transactions_searching)
+
+    for transactions in (sample_transactions_searching, frame):
+        search = searching_transactions_result(transactions, "перевод")
+        assert search.row_ids.tolist() == [1, 3]
+        assert find_phone_numbers_result(transactions).row_ids.tolist() == [4]
+        assert find_personal_transfer_result(transactions).row_ids.tolist() == [1, 3]
+
+    assert searching_transactions_result(frame, "кафе").to_records() == [sample_transactions_searching[0]]
+
+
+def test_filter_result_serializes_on_demand(sample_transactions_searching) -> None:
+    """FilterResult хранит номера строк и сериализуется только по запросу."""
+    result = find_phone_numbers_result(sample_transactions_searching)
+
+    assert len(result) == 1
+    assert result.to_frame()["Категория"].tolist() == ["Связь"]
+    assert result.to_json() == find_phone_numbers(sample_transactions_searching)
+
+
+def test_cashback_analysis_result_on_frame(sample_transactions_cashback) -> None:
+    """Векторный расчёт кэшбэка по DataFrame совпадает с построчным."""
+    from_list = cashback_analysis_result(sample_transactions_cashback, 2024, 1)
+    from_frame = cashback_analysis_result(pd.DataFrame(sample_transactions_cashback), 2024, 1)
+
+    assert from_frame.values == from_list.values == {"Продукты": 38.0, "Кафе": 8.1}
+    assert from_frame.to_series()["Кафе"] == 8.1
+
+
+def test_investment_bank_matrix_matches_single_cells(sample_transactions_cashback) -> None:
+    """Каждая ячейка матрицы совпадает с 'investment_bank' для того же месяца и лимита."""
+    limits = [10, 50, 100, 7]
+    matrix = investment_bank_matrix(sample_transactions_cashback, limits, "2023-12", "2024-02")
+
+    assert matrix.index.tolist() == ["2023-12", "2024-01", "2024-02"]
+    assert matrix.columns.tolist() == limits
+    for month in matrix.index:
+        for limit in limits:
+            assert matrix.loc[month, limit] == investment_bank(sample_transactions_cashback, month, limit)
+
+
+def test_investment_bank_matrix_on_synthetic_frame() -> None:
+    """Для DataFrame и списка словарей с дробными суммами матрица одинакова и совпадает с построчным расчётом."""
+    transactions = generate_transactions(2_000, seed=3, start_date="2021-01-01", end_date="2021-03-31")
+    records = transactions.to_dict(orient="records")
+
+    matrix = investment_bank_matrix(transactions, [10, 50], "2021-01", "2021-03")
+
+    pd.testing.assert_frame_equal(matrix, investment_bank_matrix(records, [10, 50], "2021-01", "2021-03"))
+    assert matrix.loc["2021-02", 50] == investment_bank(records, "2021-02", 50)
+
+
+def _subscription(description: str, dates, amount: float, card: str = "*7197") -> list:
+    return [
+        {
+            "Дата операции": f"{day} 10:00:00",
+            "Номер карты": card,
+            "Статус": "OK",
+            "Сумма операции": amount,
+            "Категория": "Подписки",
+            "Описание": description,
+        }
+        for day in dates
+    ]
+
+
+def test_find_recurring_payments() -> None:
+    """Находятся регулярные платежи с похожей суммой и интервалом, нерегулярные траты и переводы пропускаются."""
+    transactions = (
+        _subscription("Яндекс Плюс №1", ["05.01.2024", "05.02.2024", "05.03.2024", "05.04.2024"], -299.0)
+        + _subscription("Яндекс Плюс №2", ["05.01.2024", "05.02.2024", "05.03.2024"], -299.0, card="*5091")
+        + _subscription("Спортзал", ["01.03.2024", "08.03.2024", "15.03.2024", "22.03.2024"], -1000.0)
+        + _subscription("Магнит", ["01.03.2024", "03.03.2024", "20.03.2024", "21.03.2024"], -500.0)
+        + _subscription("Кино", ["01.01.2024", "01.02.2024", "01.03.2024"], -300.0)
+        + _subscription("Кино", ["01.04.2024"], -1500.0)
+    )
+
+    result = find_recurring_payments_result(transactions)
+
+    assert result[["card", "period_days", "next_date"]].values.tolist() == [
+        ["7197", 7, "2024-03-29"],
+        ["5091", 30, "2024-04-05"],
+        ["7197", 31, "2024-05-05"],
+    ]
+    assert result["description"].tolist()[0] == "Спортзал"
+    assert result["occurrences"].tolist() == [4, 3, 4]
+    assert json.loads(find_recurring_payments(transactions[:4]))[0]["amount"] == 299.0
+
+
+def test_find_recurring_payments_empty() -> None:
+    """Без транзакций возвращается пустой результат."""
+    assert find_recurring_payments_result([]).empty
+    assert json.loads(find_recurring_payments([])) == []
+
+
+def test_fuzzy_searching_transactions(sample_transactions_searching) -> None:
+    """Нечёткий поиск находит транзакции с опечаткой в запросе."""
+    result = json.loads(fuzzy_searching_transactions(sample_transactions_searching, "магазин продуктв", k=1))
+
+    assert [transaction["Описание"] for transaction in result] == ["Магазин продуктов"]
+    assert len(fuzzy_searching_transactions_result(sample_transactions_searching, "zzzz")) == 0
+
+
+def test_spending_percentiles(sample_transactions) -> None:
+    """Процентили скетча совпадают с точными на небольших данных, пустой ввод даёт пустой результат."""
+    records = sample_transactions.to_dict(orient="records")
+    result = json.loads(spending_percentiles(records))
+    exact = spending_percentiles_result(sample_transactions, exact=True)
+
+    assert [row["category"] for row in result] == exact["category"].tolist()
+    assert [row["p50"] for row in result] == exact["p50"].tolist()
+    assert exact.set_index("category").loc["Кафе", "p99"] == 400.0
+    assert spending_percentiles_result(sample_transactions, by="card")["count"].sum() == 11
+    assert spending_percentiles_result([]).columns.tolist() == ["category", "count", "p50", "p90", "p99"]
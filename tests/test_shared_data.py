@@ -0,0 +1,54 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.services import cashback_analysis
+from src.shared_data import attach_transactions, publish_transactions
+from src.utils import cost_analysis
+
+
+def test_publish_and_attach_roundtrip(sample_transactions, tmp_path) -> None:
+    """Опубликованные столбцы подключаются только для чтения и совпадают с исходными."""
+    target = publish_transactions(sample_transactions.copy(), str(tmp_path / "shared"))
+    assert (tmp_path / "shared" / "manifest.json").exists()
+
+    attached = attach_transactions(target)
+
+    assert list(attached.columns) == list(sample_transactions.columns)
+    assert attached["Сумма операции"].tolist() == sample_transactions["Сумма операции"].tolist()
+    assert attached["Дата операции"].dtype == "datetime64[ns]"
+    assert not attached["Сумма операции"].to_numpy().flags.writeable
+    assert pd.isna(attached.loc[4, "Номер карты"])
+    # Строковые столбцы хранятся кодами минимального целочисленного типа
+    manifest = json.loads((tmp_path / "shared" / "manifest.json").read_text(encoding="utf-8"))
+    category_file = next(entry["file"] for entry in manifest["columns"] if entry["name"] == "Категория")
+    assert np.load(tmp_path / "shared" / category_file).dtype == np.int8
+
+
+def test_attached_frame_accepted_by_utils(sample_transactions, tmp_path) -> None:
+    """Функции 'utils' работают с подключённым DataFrame так же, как с исходным."""
+    attached = attach_transactions(publish_transactions(sample_transactions.copy(), str(tmp_path)))
+
+    expected = cost_analysis(sample_transactions.copy()).set_index("last_digits")
+    result = cost_analysis(attached).set_index("last_digits")
+
+    for digits in ["7197", "1234", "5678", "0000"]:
+        assert result.loc[digits, "total_spent"] == expected.loc[digits, "total_spent"]
+    assert result["total_spent"].sum() == expected["total_spent"].sum()
+
+
+def test_attach_as_records_for_services(sample_transactions, tmp_path) -> None:
+    """Список словарей из подключённых данных подходит для функций 'services'."""
+    records = attach_transactions(publish_transactions(sample_transactions.copy(), str(tmp_path)), False)
+
+    assert records[0]["Дата операции"] == "11.02.2024 10:30:00"
+    assert records[4]["Номер карты"] is None
+    assert json.loads(cashback_analysis(records, 2024, 2)) == json.loads(
+        cashback_analysis(sample_transactions.to_dict(orient="records"), 2024, 2)
+    )
+
+
+def test_attach_missing_directory(tmp_path) -> None:
+    """При отсутствии опубликованных данных возвращается пустой список."""
+    assert attach_transactions(str(tmp_path / "missing")) == []
@@ -0,0 +1,45 @@
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.services import find_personal_transfer_result, find_phone_numbers_result
+from src.shared_data import attach_transactions
+from src.synthetic import generate_transactions, write_transactions
+
+
+def test_generate_transactions_schema() -> None:
+    """Синтетические данные повторяют схему реальной выгрузки."""
+    transactions = generate_transactions(500)
+    original = pd.read_excel("data/operations.xlsx", nrows=1)
+
+    assert list(transactions.columns) == list(original.columns)
+    assert len(transactions) == 500
+
+    dates = pd.to_datetime(transactions["Дата операции"], format="%d.%m.%Y %H:%M:%S")
+    assert dates.is_monotonic_decreasing
+    assert len(find_phone_numbers_result(transactions)) > 0
+    assert len(find_personal_transfer_result(transactions)) > 0
+
+
+def test_generate_transactions_is_seeded() -> None:
+    """Одинаковый seed даёт одинаковые данные, разный — разные."""
+    pd.testing.assert_frame_equal(generate_transactions(100, seed=1), generate_transactions(100, seed=1))
+    assert not generate_transactions(100, seed=1).equals(generate_transactions(100, seed=2))
+
+
+def test_write_transactions_formats(tmp_path) -> None:
+    """Запись в CSV и в столбцовый формат сохраняет данные."""
+    transactions = generate_transactions(50)
+
+    csv_path = write_transactions(transactions, str(tmp_path / "operations.csv"))
+    assert pd.read_csv(csv_path)["Сумма операции"].tolist() == transactions["Сумма операции"].tolist()
+
+    columnar_path = write_transactions(transactions, str(tmp_path / "columnar"))
+    assert attach_transactions(columnar_path)["Сумма операции"].tolist() == transactions["Сумма операции"].tolist()
+
+
+def test_write_transactions_xlsx_limit(tmp_path) -> None:
+    """Выборки больше лимита Excel нельзя записать в XLSX."""
+    with patch("src.synthetic.XLSX_MAX_ROWS", 5), pytest.raises(ValueError):
+        write_transactions(generate_transactions(10), str(tmp_path / "big.xlsx"))
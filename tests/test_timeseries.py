@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.reports import daily_spending_report
+from src.timeseries import daily_spending, history_filter, monthly_deltas, rolling_mean, spending_trend
+
+
+def test_rolling_mean_matches_naive() -> None:
+    """Скользящее среднее через накопленные суммы совпадает с прямым подсчётом по окну."""
+    values = np.random.default_rng(0).uniform(0, 1000, 100)
+    for window in (1, 7, 30):
+        expected = [values[slice(max(0, end - window + 1), end + 1)].mean() for end in range(len(values))]
+        assert np.allclose(rolling_mean(values, window), expected)
+
+
+def test_daily_spending_fills_missing_days(sample_transactions) -> None:
+    """Дни без трат входят в ряд с нулём, поступления не учитываются."""
+    transactions = pd.concat(
+        [sample_transactions, pd.DataFrame({"Дата операции": ["07.02.2024 09:00:00"], "Сумма операции": [10000]})],
+        ignore_index=True,
+    )
+    result = daily_spending(transactions, "2024-02-01", "2024-02-11")
+
+    assert list(result.columns) == ["date", "spent", "count", "ma_7", "ma_30"]
+    assert len(result) == 11
+    assert result.set_index("date").loc["2024-02-04", "spent"] == 0
+    assert result.set_index("date").loc["2024-02-07", "spent"] == 500
+    assert result.set_index("date").loc["2024-02-10", "count"] == 2
+    # Окно за 7 дней до 11.02 включает 05.02 - 11.02
+    assert result["ma_7"].iloc[-1] == pytest.approx(round((500 + 1700 + 1500 + 900 + 500 + 400 + 300) / 7, 2))
+    # Окно за 30 дней учитывает траты до начала ряда (31.01)
+    assert result["ma_30"].iloc[-1] == pytest.approx(round((5800 + 150) / 30, 2))
+
+
+def test_monthly_deltas(sample_transactions) -> None:
+    """Месяцы без трат входят в ряд с нулём, изменение считается к предыдущему месяцу."""
+    result = monthly_deltas(sample_transactions)
+
+    assert list(result["month"]) == ["2023-12", "2024-01", "2024-02"]
+    assert list(result["spent"]) == [50, 150, 5800]
+    assert list(result["delta"].iloc[1:]) == [100, 5650]
+    assert np.isnan(result["delta_pct"].iloc[0])
+    assert result["delta_pct"].iloc[1] == 200
+
+
+def test_spending_trend_month_to_date() -> None:
+    """Траты с начала месяца сравниваются с тем же периодом предыдущего месяца."""
+    transactions = pd.DataFrame(
+        {
+            "Дата операции": [
+                "02.02.2024 10:00:00",
+                "03.03.2024 10:00:00",
+                "29.02.2024 10:00:00",
+                "01.03.2024 09:00:00",
+            ],
+            "Сумма операции": [-100, -50, -300, -200],
+        }
+    )
+    trend = spending_trend(transactions, "2024-03-02 12:00:00")
+
+    assert [day["date"] for day in trend["daily"]] == ["2024-03-01", "2024-03-02"]
+    assert trend["daily"][0]["spent"] == 200
+    assert trend["month_to_date"] == {"current": 200.0, "previous": 100.0, "delta": 100.0, "delta_pct": 100.0}
+
+
+def test_history_filter(sample_transactions) -> None:
+    """Фильтр для чтения по частям оставляет операции с начала предыдущего месяца по текущую дату."""
+    result = history_filter("2024-02-09 12:00:00")(sample_transactions)
+    assert sorted(result["Дата операции"].str.slice(0, 10)) == [
+        "05.02.2024",
+        "06.02.2024",
+        "07.02.2024",
+        "08.02.2024",
+        "09.02.2024",
+        "09.02.2024",
+        "31.01.2024",
+    ]
+
+
+def test_daily_spending_report(sample_transactions) -> None:
+    """Отчёт содержит заданное число дней, заканчивая датой отсчёта."""
+    result = daily_spending_report.__wrapped__(sample_transactions, "2024-02-11", days=14)
+
+    assert len(result) == 14
+    assert result["date"].iloc[-1] == "2024-02-11"
+    assert result["spent"].sum() == 5950
@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+
+from src.synthetic import generate_transactions
+from src.top_k import MonthToDateTopK, StreamingTopK
+from src.utils import get_top_transactions
+
+
+def reference_top(transactions: pd.DataFrame, n: int) -> pd.DataFrame:
+    """Топ трат через 'nsmallest' по всему DataFrame."""
+    spending = transactions[(transactions["Сумма операции"] < 0) & (transactions["Статус"].str.upper() != "FAILED")]
+    result = spending.nsmallest(n, "Сумма операции")[["Дата операции", "Сумма операции", "Категория", "Описание"]]
+    result.columns = ["date", "amount", "category", "description"]
+    return result.reset_index(drop=True)
+
+
+@pytest.fixture(scope="module")
+def synthetic_transactions() -> pd.DataFrame:
+    """Синтетические транзакции с повторяющимися суммами."""
+    transactions = generate_transactions(5_000, seed=7)
+    # Одинаковые суммы: при равенстве выше должна быть более ранняя строка
+    transactions.loc[[10, 20], "Сумма операции"] = transactions["Сумма операции"].min()
+    return transactions
+
+
+@pytest.mark.parametrize("n", [1, 5, 30])
+def test_streaming_matches_nsmallest(synthetic_transactions, n) -> None:
+    """Топ по частям совпадает с 'nsmallest' по всему DataFrame."""
+    top_k = StreamingTopK(n)
+    for start in range(0, len(synthetic_transactions), 700):
+        end = start + 700
+        top_k.update(synthetic_transactions.iloc[start:end])
+
+    pd.testing.assert_frame_equal(top_k.top(), reference_top(synthetic_transactions, n))
+    pd.testing.assert_frame_equal(get_top_transactions(synthetic_transactions, n), top_k.top())
+
+
+def test_top_by_card_and_category(synthetic_transactions) -> None:
+    """За один проход строится топ для каждой карты и каждой категории."""
+    top_k = StreamingTopK(3, group_by=["Номер карты", "Категория"]).update(synthetic_transactions)
+
+    by_card = top_k.top_by("Номер карты")
+    assert None in by_card  # Операции без карты собираются под ключом None
+    for card, top in by_card.items():
+        if card is not None:
+            expected = reference_top(synthetic_transactions[synthetic_transactions["Номер карты"] == card], 3)
+            pd.testing.assert_frame_equal(top, expected)
+
+    for category, top in top_k.top_by("Категория").items():
+        expected = reference_top(synthetic_transactions[synthetic_transactions["Категория"] == category], 3)
+        pd.testing.assert_frame_equal(top, expected)
+
+
+def test_invalid_size() -> None:
+    """Размер топа должен быть положительным."""
+    with pytest.raises(ValueError):
+        StreamingTopK(0)
+
+
+def test_month_to_date_incremental() -> None:
+    """Топ с начала месяца дополняется новыми транзакциями и сбрасывается при смене месяца."""
+    first = pd.DataFrame(
+        {
+            "Дата операции": ["01.02.2024 10:00:00", "31.01.2024 10:00:00"],
+            "Сумма операции": [-100, -5000],
+            "Категория": ["Еда", "Еда"],
+            "Описание": ["Кафе", "Ресторан"],
+            "Статус": ["OK", "OK"],
+        }
+    )
+    second = first.assign(**{"Дата операции": ["05.02.2024 09:00:00", "20.02.2024 09:00:00"]})
+
+    month_top = MonthToDateTopK(n=5)
+    month_top.update(first, "2024-02-01")
+    assert month_top.top()["amount"].tolist() == [-100]
+
+    month_top.update(second, "2024-02-10")  # Транзакция от 20.02 ещё в будущем
+    assert month_top.top()["amount"].tolist() == [-100, -100]
+
+    month_top.update(second, "2024-03-01")
+    assert month_top.top().empty
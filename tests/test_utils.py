@@ -4,6 +4,7 @@ from unittest.mock import patch
 import pandas as pd
 import pytest
 
+from src.utils import read_transaction_records
 from src.views import (cost_analysis, filter_transactions_by_month, get_greeting, get_top_transactions,
                        transaction_parser)
 
@@ -47,6 +48,21 @@ def test_transaction_parser_empty_file() -> None:
         assert transactions == []
 
 
+def test_read_transaction_records_matches_parser(tmp_path, sample_transactions_load: List[Dict]) -> None:
+    """XLSX и CSV читаются без pandas в тот же список словарей, что и через 'transaction_parser'."""
+    pd.DataFrame(sample_transactions_load).to_excel(tmp_path / "operations.xlsx", index=False)
+    pd.DataFrame(sample_transactions_load).to_csv(tmp_path / "operations.csv", index=False)
+
+    assert read_transaction_records(str(tmp_path / "operations.xlsx")) == sample_transactions_load
+    assert read_transaction_records(str(tmp_path / "operations.csv")) == sample_transactions_load
+
+
+def test_read_transaction_records_errors() -> None:
+    """При отсутствии файла или неподдерживаемом формате возвращается пустой список."""
+    assert read_transaction_records("data/missing.xlsx") == []
+    assert read_transaction_records("data/operations.txt") == []
+
+
 @pytest.mark.parametrize(
     "mock_hour, expected_greeting",
     [
@@ -121,6 +137,15 @@ def test_cost_analysis(sample_transactions: pd.DataFrame) -> None:
         assert result.loc[result["last_digits"] == "N/A", "total_spent"].values[0] == 450
 
 
+def test_cost_analysis_percentiles(sample_transactions: pd.DataFrame) -> None:
+    """Процентили сумм трат добавляются рядом с итогами по картам."""
+    result = cost_analysis(sample_transactions, percentiles=(0.5, 1)).set_index("last_digits")
+
+    assert result.columns.tolist() == ["total_spent", "cashback", "p50", "p100"]
+    assert result.loc["7197", "p100"] == 1500
+    assert result.loc["1234", "p50"] == 300
+
+
 def test_cost_analysis_empty() -> None:
     """Тест обработки пустого DataFrame."""
     empty_df = pd.DataFrame(columns=["Номер карты", "Сумма операции"])
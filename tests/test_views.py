@@ -41,6 +41,7 @@ def test_main_view_success(
     assert "greeting" in response
     assert "cards" in response
     assert "top_transactions" in response
+    assert "spending_trend" in response
     assert "currency_rates" in response
     assert "stock_rates" in response
     assert len(response["cards"]) == 1
@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.metrics import metrics_summary, reset_metrics
+from src.watch import DashboardWatcher, read_output, report_filename
+
+CURRENCY_STUB = [{"currency": "USD", "rate": 73.21}]
+STOCK_STUB = [{"stock": "AAPL", "price": 150.12}]
+
+
+@pytest.fixture
+def watched_dir(tmp_path, sample_transactions):
+    """Каталог с двумя CSV-файлами транзакций и файлом настроек."""
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    sample_transactions.iloc[:6].to_csv(data_dir / "january.csv", index=False)
+    sample_transactions.iloc[6:].to_csv(data_dir / "february.csv", index=False)
+    settings = {"user_currencies": ["USD"], "user_stocks": ["AAPL"], "report_categories": ["Кафе"]}
+    (tmp_path / "settings.json").write_text(json.dumps(settings), encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def watcher(watched_dir):
+    with (
+        patch("src.watch.currency_exchanger", return_value=CURRENCY_STUB) as currencies,
+        patch("src.watch.stock_exchanger", return_value=STOCK_STUB),
+    ):
+        yield (
+            DashboardWatcher(
+                str(watched_dir / "data"),
+                settings_path=str(watched_dir / "settings.json"),
+                output_dir=str(watched_dir / "out"),
+                debounce=0.2,
+                interval=0.01,
+            ),
+            currencies,
+        )
+
+
+def test_refresh_writes_outputs(watcher) -> None:
+    """Главная страница, отчёты и состояние записываются в каталог результатов."""
+    dashboard_watcher, _ = watcher
+    dashboard_watcher.poll()
+    written = dashboard_watcher.refresh(current_datetime="2024-02-11 12:00:00")
+
+    dashboard = json.loads(read_output(dashboard_watcher.output_dir))
+    report = json.loads(read_output(dashboard_watcher.output_dir, "reports/spending_by_category_Кафе.json"))
+    status = json.loads(read_output(dashboard_watcher.output_dir, "status.json"))
+
+    assert len(written) == 2
+    assert dashboard["currency_rates"] == CURRENCY_STUB
+    assert len(dashboard["top_transactions"]) == 5
+    assert sorted(transaction["Описание"] for transaction in report) == ["Кофейня", "Кофейня"]
+    assert status["transactions"] == 11
+    assert not any(name.endswith(".tmp") for name in os.listdir(dashboard_watcher.output_dir))
+
+
+def test_refresh_reloads_only_changed_files(watcher, watched_dir, sample_transactions) -> None:
+    """Повторно загружаются только изменившиеся файлы, удалённые файлы исключаются, курсы берутся из кэша."""
+    dashboard_watcher, currencies = watcher
+    dashboard_watcher.poll()
+    dashboard_watcher.refresh(current_datetime="2024-02-11 12:00:00")
+
+    sample_transactions.iloc[6:8].to_csv(watched_dir / "data" / "february.csv", index=False)
+    os.remove(watched_dir / "data" / "january.csv")
+    changed = dashboard_watcher.poll()
+    assert {os.path.basename(path) for path in changed} == {"january.csv", "february.csv"}
+
+    reset_metrics()
+    with patch("src.watch._load_file", wraps=pd.read_csv) as load_file:
+        dashboard_watcher.refresh(changed, current_datetime="2024-02-11 12:00:00")
+
+    assert [os.path.basename(call.args[0]) for call in load_file.call_args_list] == ["february.csv"]
+    assert json.loads(read_output(dashboard_watcher.output_dir, "status.json"))["transactions"] == 2
+    assert currencies.call_count == 1
+    assert metrics_summary()["caches"]["watch.rates"]["hits"] == 1
+
+
+def test_run_debounces_changes(watcher, watched_dir, sample_transactions) -> None:
+    """Несколько изменений подряд приводят к одному пересчёту после паузы."""
+    dashboard_watcher, _ = watcher
+    stop_event = threading.Event()
+    thread = threading.Thread(target=dashboard_watcher.run, args=(stop_event, 2))
+    thread.start()
+    try:
+        while dashboard_watcher.refreshes < 1:
+            stop_event.wait(0.01)
+        for rows in (1, 2, 3):
+            sample_transactions.iloc[:rows].to_csv(watched_dir / "data" / "january.csv", index=False)
+            stop_event.wait(0.02)
+        thread.join(timeout=5)
+    finally:
+        stop_event.set()
+        thread.join()
+
+    assert dashboard_watcher.refreshes == 2
+    assert json.loads(read_output(dashboard_watcher.output_dir, "status.json"))["transactions"] == 8
+
+
+def test_report_filename_is_safe(watcher, watched_dir) -> None:
+    """Разделители путей в названии категории не создают подкаталоги."""
+    dashboard_watcher, _ = watcher
+    dashboard_watcher.report_categories = ["Ж/д билеты"]
+    dashboard_watcher.poll()
+    dashboard_watcher.refresh(current_datetime="2024-02-11 12:00:00")
+
+    assert report_filename("Ж/д билеты") == "spending_by_category_Ж_д билеты.json"
+    assert os.listdir(os.path.join(dashboard_watcher.output_dir, "reports")) == [report_filename("Ж/д билеты")]
+
+
+def test_run_survives_failed_first_refresh(watcher) -> None:
+    """Ошибка при первом формировании результатов не останавливает наблюдение."""
+    dashboard_watcher, _ = watcher
+    stop_event = threading.Event()
+    stop_event.set()
+
+    with patch.object(dashboard_watcher, "refresh", side_effect=OSError("файл занят")) as refresh:
+        dashboard_watcher.run(stop_event)
+
+    refresh.assert_called_once()